@@ -0,0 +1,284 @@
+"""CPU-bound end-of-session work, run in a process pool instead of on the event loop.
+
+Two whole-session jobs are left at ``session_end`` once the streaming
+accumulators have answered: the vitals DSP pass and rendering the raw dump
+(JSON for every frame, the heaviest step for full-mesh scans). On the event
+loop or in a thread they hold the GIL and freeze every other bridge and
+dashboard. Here they run in worker processes:
+
+* the dump's columns are copied once into a ``multiprocessing.shared_memory``
+  block; workers map it by name and render chunks straight to JSON text, so
+  no landmark lists are pickled, and chunks render on several cores
+* the DSP job gets the four small vitals columns as arrays
+
+``NEURO_SENTRY_ANALYSIS_WORKERS=0`` (the default on a single-CPU host) keeps
+the in-process behaviour: DSP in a thread, dump chunks rendered on the loop.
+
+    NEURO_SENTRY_ANALYSIS_WORKERS=3      worker processes (default: CPUs - 1, at most 4)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from multiprocessing import shared_memory
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from features import asymmetry_frames, masked_mean
+from gemini_prompt import compute_bio_features
+import ingest
+import logs
+from session_store import SessionStore
+from vitals_dsp import vitals_features
+
+ANALYSIS_WORKERS = int(os.getenv("NEURO_SENTRY_ANALYSIS_WORKERS", str(min(4, (os.cpu_count() or 1) - 1))))
+_ALIGN = 64
+
+# Column name -> SessionStore attribute, in shared-memory layout order
+_COLUMNS = ("timestamps", "heart_rate", "breathing_rate", "quality", "point_counts", "landmarks")
+
+
+def compute_stats(store: SessionStore) -> Dict[str, Any]:
+    """Basic stats: mean HR/BR/quality + simple facial asymmetry if points exist."""
+    if not len(store):
+        return {"count": 0, "heart_rate_mean": None, "breathing_rate_mean": None, "quality_mean": None, "duration_ms": 0}
+
+    asym = asymmetry_frames(store.landmarks, store.point_counts, store.landmark_indices)
+
+    def column_mean(col: np.ndarray) -> float | None:
+        return masked_mean(col, ~np.isnan(col))
+
+    def percent_mean(values: np.ndarray) -> float | None:
+        value = masked_mean(values, asym.has_points)
+        return None if value is None else value * 100
+
+    return {
+        "count": len(store),
+        "heart_rate_mean": column_mean(store.heart_rate),
+        "breathing_rate_mean": column_mean(store.breathing_rate),
+        "quality_mean": column_mean(store.quality),
+        "mouth_asymmetry_mean": percent_mean(asym.mouth_raw),
+        "brow_asymmetry_mean": percent_mean(asym.brow_raw),
+        "duration_ms": store.duration_ms(),
+    }
+
+
+def analyse_store(store: SessionStore) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """``(stats, features)`` recomputed from a whole store, as session_end would produce them."""
+    stats = compute_stats(store)
+    stats["vitals_dsp"] = vitals_features(store)
+    return stats, compute_bio_features(store)
+
+
+class SharedStore:
+    """A finished store's columns in one shared-memory block.
+
+    ``descriptor`` (block name, column layout, sparse extras) is all a worker
+    needs to map the store; the creator must ``close()`` it when done.
+    """
+
+    def __init__(self, store: SessionStore) -> None:
+        columns = [(name, np.ascontiguousarray(getattr(store, name))) for name in _COLUMNS]
+        size = sum(-(-col.nbytes // _ALIGN) * _ALIGN for _, col in columns)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, size))
+        layout: List[Tuple[str, str, Tuple[int, ...], int]] = []
+        offset = 0
+        for name, col in columns:
+            np.ndarray(col.shape, col.dtype, buffer=self._shm.buf, offset=offset)[...] = col
+            layout.append((name, col.dtype.str, col.shape, offset))
+            offset += -(-col.nbytes // _ALIGN) * _ALIGN
+        self.nbytes = size
+        self.descriptor: Dict[str, Any] = {
+            "name": self._shm.name,
+            "columns": layout,
+            "landmark_indices": store.landmark_indices,
+            "blood_pressure": store.blood_pressure,
+            "regions": store.regions,
+        }
+
+    def close(self) -> None:
+        if self._shm is None:
+            return
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+
+def _attached_store(shm: shared_memory.SharedMemory, descriptor: Dict[str, Any]) -> SessionStore:
+    columns = {
+        name: np.ndarray(shape, np.dtype(dtype), buffer=shm.buf, offset=offset)
+        for name, dtype, shape, offset in descriptor["columns"]
+    }
+    return SessionStore.from_columns(
+        **columns,
+        blood_pressure=descriptor["blood_pressure"],
+        regions=descriptor["regions"],
+        landmark_indices=descriptor["landmark_indices"],
+    )
+
+
+# --- Worker-side jobs (module level, so they pickle by reference) ---
+
+def _noop() -> None:
+    return None
+
+
+def _vitals_job(timestamps: np.ndarray, heart_rate: np.ndarray, breathing_rate: np.ndarray, quality: np.ndarray) -> Dict[str, Any]:
+    n = timestamps.shape[0]
+    store = SessionStore.from_columns(
+        timestamps, heart_rate, breathing_rate, quality,
+        np.zeros(n, dtype=np.int32), np.empty((n, 0, 3), dtype=np.float32),
+    )
+    return vitals_features(store)
+
+
+def render_dump_chunk(store: SessionStore, session_id: str, seq: int, offset: int, size: int) -> str:
+    """One ``raw_dump_chunk`` message as sent to /live_state clients."""
+    packets = list(store.iter_dump(offset, offset + size))
+    return ingest.dumps({"type": "raw_dump_chunk", "seq": seq, "offset": offset, "packets": packets, "session_id": session_id})
+
+
+def _dump_chunk_job(descriptor: Dict[str, Any], session_id: str, seq: int, offset: int, size: int) -> str:
+    shm = shared_memory.SharedMemory(name=descriptor["name"])
+    try:
+        return render_dump_chunk(_attached_store(shm, descriptor), session_id, seq, offset, size)
+    finally:
+        shm.close()  # the store's views died with the call frame
+
+
+class AnalysisPool:
+    """Lazily started ``ProcessPoolExecutor`` (forkserver) with in-process fallbacks."""
+
+    def __init__(self, workers: int = ANALYSIS_WORKERS) -> None:
+        self.workers = max(0, workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.jobs = 0
+        self.fallbacks = 0
+        self.shared_bytes = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context(method))
+        return self._executor
+
+    def start(self) -> None:
+        """Start the workers now (imports and all) rather than on the first session end."""
+        if self.enabled:
+            pool = self._pool()
+            for _ in range(self.workers):
+                pool.submit(_noop)
+
+    def _broken(self, exc: BaseException) -> None:
+        logs.event("analysis_pool", "broken", level=logging.ERROR, error=f"{type(exc).__name__}: {exc}")
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self.fallbacks += 1
+
+    async def vitals(self, store: SessionStore) -> Dict[str, Any]:
+        """``vitals_features(store)`` in a worker, or a thread when the pool is off."""
+        if not self.enabled or not len(store):
+            return await asyncio.to_thread(vitals_features, store)
+        loop = asyncio.get_running_loop()
+        try:
+            self.jobs += 1
+            return await loop.run_in_executor(
+                self._pool(), _vitals_job, store.timestamps, store.heart_rate, store.breathing_rate, store.quality
+            )
+        except BrokenProcessPool as exc:
+            self._broken(exc)
+            return await asyncio.to_thread(vitals_features, store)
+
+    async def dump_chunks(self, store: SessionStore, session_id: str, chunk_size: int) -> AsyncIterator[str]:
+        """Rendered ``raw_dump_chunk`` messages in order, ``2 * workers`` chunks in flight."""
+        total = len(store)
+        chunk_size = max(1, chunk_size)
+        chunks = [(seq, offset) for seq, offset in enumerate(range(0, total, chunk_size))]
+        if not self.enabled or not chunks:
+            for seq, offset in chunks:
+                yield render_dump_chunk(store, session_id, seq, offset, chunk_size)
+                await asyncio.sleep(0)
+            return
+
+        shared = await asyncio.to_thread(SharedStore, store)
+        self.shared_bytes += shared.nbytes
+        pending: Deque[Future] = deque()
+        done = 0
+        try:
+            pool = self._pool()
+
+            def submit(seq: int, offset: int) -> Future:
+                self.jobs += 1
+                return pool.submit(_dump_chunk_job, shared.descriptor, session_id, seq, offset, chunk_size)
+
+            queue = iter(chunks)
+            for seq, offset in islice(queue, 2 * self.workers):
+                pending.append(submit(seq, offset))
+            while pending:
+                text = await asyncio.wrap_future(pending.popleft())
+                done += 1
+                following = next(queue, None)
+                if following is not None:
+                    pending.append(submit(*following))
+                yield text
+        except BrokenProcessPool as exc:
+            self._broken(exc)
+            for seq, offset in chunks[done:]:
+                yield render_dump_chunk(store, session_id, seq, offset, chunk_size)
+                await asyncio.sleep(0)
+        finally:
+            for future in pending:
+                future.cancel()
+            shared.close()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"workers": self.workers, "jobs": self.jobs, "fallbacks": self.fallbacks, "shared_bytes": self.shared_bytes}
+
+
+_pool: Optional[AnalysisPool] = None
+
+
+def analysis_pool() -> AnalysisPool:
+    """The process-wide pool, created on first use (or at app startup)."""
+    global _pool
+    if _pool is None:
+        _pool = AnalysisPool()
+        logs.event("analysis_pool", "created", workers=_pool.workers)
+    return _pool
+
+
+def shutdown_analysis_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+__all__ = [
+    "ANALYSIS_WORKERS",
+    "AnalysisPool",
+    "SharedStore",
+    "analyse_store",
+    "analysis_pool",
+    "compute_stats",
+    "render_dump_chunk",
+    "shutdown_analysis_pool",
+]
@@ -0,0 +1,212 @@
+"""On-disk archive of finished sessions, read back through memory-mapped arrays.
+
+Layout under ``NEURO_SENTRY_ARCHIVE_DIR`` (default ``backend/archive``)::
+
+    index.jsonl                 one meta record per archived session (append-only)
+    <archive_id>/meta.json      session id, times, frame/landmark counts, stats
+    <archive_id>/report.json    final triage report
+    <archive_id>/extras.json    sparse blood_pressure / regions by frame index, landmark subset
+    <archive_id>/*.npy          timestamps, heart_rate, breathing_rate, quality,
+                                point_counts and the (frames, landmarks, 3) float32 block
+    <archive_id>/mesh/*.npy     the same columns for the rate-limited full meshes of a
+                                landmark-profile session (absent without a profile)
+
+Set ``NEURO_SENTRY_ARCHIVE_DIR=""`` to disable archiving.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from session_store import SessionStore
+
+BASE_DIR = Path(__file__).resolve().parent
+ARCHIVE_DIR = os.getenv("NEURO_SENTRY_ARCHIVE_DIR", str(BASE_DIR / "archive"))
+
+COLUMNS = ("timestamps", "heart_rate", "breathing_rate", "quality", "point_counts", "landmarks")
+INDEX_FILE = "index.jsonl"
+
+
+def _iso(epoch: Optional[float]) -> Optional[str]:
+    if epoch is None:
+        return None
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class SessionArchive:
+    """Writes finished sessions to disk and lists/opens them by id and time."""
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._index_lock = threading.Lock()
+
+    # --- Writes (blocking; call via asyncio.to_thread from the event loop) ---
+
+    def write(
+        self,
+        session_id: str,
+        store: SessionStore,
+        report: Optional[Dict[str, Any]] = None,
+        stats: Optional[Dict[str, Any]] = None,
+        mesh_store: Optional[SessionStore] = None,
+    ) -> Dict[str, Any]:
+        """Persist ``store`` + ``report`` (and the profile's full meshes, if any); returns the index record."""
+        n = len(store)
+        started = float(store.timestamps[0]) if n else datetime.now(timezone.utc).timestamp()
+        ended = float(store.timestamps[-1]) if n else started
+        stamp = datetime.fromtimestamp(started, timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        archive_id = f"{stamp}-{_safe(session_id)}-{uuid.uuid4().hex[:6]}"
+        mesh_frames = len(mesh_store) if mesh_store is not None else 0
+
+        tmp = self.root / f".{archive_id}.tmp"
+        tmp.mkdir(parents=True)
+        try:
+            width = _save_columns(tmp, store)
+            if mesh_frames:
+                (tmp / "mesh").mkdir()
+                _save_columns(tmp / "mesh", mesh_store)
+            extras = {
+                "blood_pressure": {str(k): v for k, v in store.blood_pressure.items()},
+                "regions": {str(k): v for k, v in store.regions.items()},
+                "landmark_indices": None if store.landmark_indices is None else list(store.landmark_indices),
+            }
+            (tmp / "extras.json").write_text(json.dumps(extras))
+            (tmp / "report.json").write_text(json.dumps(report))
+            meta = {
+                "archive_id": archive_id,
+                "session_id": session_id,
+                "started_at": _iso(started),
+                "ended_at": _iso(ended),
+                "started_ts": started,
+                "frames": n,
+                "landmarks": width,
+                "mesh_frames": mesh_frames,
+                "risk_level": (report or {}).get("risk_level"),
+                "stats": stats,
+            }
+            (tmp / "meta.json").write_text(json.dumps(meta))
+            tmp.rename(self.root / archive_id)
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        with self._index_lock, open(self.root / INDEX_FILE, "a") as index:
+            index.write(json.dumps({k: v for k, v in meta.items() if k != "stats"}) + "\n")
+        return meta
+
+    # --- Reads ---
+
+    def list(
+        self,
+        session_id: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """Newest-first index records, filtered by session id and start time (epoch seconds)."""
+        path = self.root / INDEX_FILE
+        if not path.exists():
+            return []
+        records = []
+        with open(path) as index:
+            for line in index:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if session_id is not None and record.get("session_id") != session_id:
+                    continue
+                ts = record.get("started_ts") or 0.0
+                if (since is not None and ts < since) or (until is not None and ts > until):
+                    continue
+                records.append(record)
+        records.sort(key=lambda r: r.get("started_ts") or 0.0, reverse=True)
+        return records[: max(0, limit)]
+
+    def ids(self) -> List[str]:
+        """Every archived session directory, oldest first (a scan; ``index.jsonl`` is not needed)."""
+        if not self.root.exists():
+            return []
+        return sorted(p.name for p in self.root.iterdir() if not p.name.startswith(".") and (p / "meta.json").exists())
+
+    def _dir(self, archive_id: str) -> Path:
+        path = self.root / _safe(archive_id)
+        if not (path / "meta.json").exists():
+            raise KeyError(archive_id)
+        return path
+
+    def meta(self, archive_id: str) -> Dict[str, Any]:
+        return json.loads((self._dir(archive_id) / "meta.json").read_text())
+
+    def report(self, archive_id: str) -> Optional[Dict[str, Any]]:
+        return json.loads((self._dir(archive_id) / "report.json").read_text())
+
+    def open(self, archive_id: str) -> SessionStore:
+        """The archived frames as a read-only store backed by ``np.load(mmap_mode="r")``."""
+        path = self._dir(archive_id)
+        extras = json.loads((path / "extras.json").read_text())
+        return _open_columns(
+            path,
+            blood_pressure={int(k): v for k, v in extras.get("blood_pressure", {}).items()},
+            regions={int(k): v for k, v in extras.get("regions", {}).items()},
+            landmark_indices=extras.get("landmark_indices"),
+        )
+
+    def open_mesh(self, archive_id: str) -> Optional[SessionStore]:
+        """The archived full-mesh frames of a landmark-profile session, or ``None``."""
+        path = self._dir(archive_id) / "mesh"
+        return _open_columns(path) if path.is_dir() else None
+
+
+def _save_columns(path: Path, store: SessionStore) -> int:
+    """Write ``store``'s columns as ``.npy`` files, landmarks cut to the widest frame; returns that width."""
+    width = int(store.point_counts.max()) if len(store) else 0
+    np.save(path / "timestamps.npy", store.timestamps)
+    np.save(path / "heart_rate.npy", store.heart_rate)
+    np.save(path / "breathing_rate.npy", store.breathing_rate)
+    np.save(path / "quality.npy", store.quality)
+    np.save(path / "point_counts.npy", store.point_counts)
+    np.save(path / "landmarks.npy", np.ascontiguousarray(store.landmarks[:, :width]))
+    return width
+
+
+def _open_columns(path: Path, **extras: Any) -> SessionStore:
+    cols = {name: _load(path / f"{name}.npy") for name in COLUMNS}
+    return SessionStore.from_columns(
+        cols["timestamps"],
+        cols["heart_rate"],
+        cols["breathing_rate"],
+        cols["quality"],
+        cols["point_counts"],
+        cols["landmarks"],
+        **extras,
+    )
+
+
+def _load(path: Path) -> np.ndarray:
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError:  # zero-size arrays cannot be mapped
+        return np.load(path)
+
+
+def _safe(name: str) -> str:
+    """Restrict ids to filename-safe characters."""
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in name).lstrip(".") or "_"
+
+
+def default_archive() -> Optional[SessionArchive]:
+    return SessionArchive(ARCHIVE_DIR) if ARCHIVE_DIR else None
+
+
+__all__ = ["ARCHIVE_DIR", "SessionArchive", "default_archive"]
@@ -0,0 +1,258 @@
+"""Benchmark: per-frame ingest and end-of-session hot paths, checked against stored baselines.
+
+Run from the repo root:
+    python backend/benchmarks/bench_hot_paths.py                  # compare with baselines.json
+    python backend/benchmarks/bench_hot_paths.py --check          # exit 1 on a regression
+    python backend/benchmarks/bench_hot_paths.py --save           # record new baselines
+    python backend/benchmarks/bench_hot_paths.py --sizes 1000 --only compute_bio_features
+
+Sessions are synthetic, 30 fps. Sizes up to ``--max-mesh-frames`` carry full
+468-point meshes; larger ones use the clinical landmark profile (as a bridge
+that negotiated it would), which keeps a 100k-frame session in memory.
+Each case reports the best of ``--repeat`` runs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+os.environ.setdefault("NEURO_SENTRY_ARCHIVE_DIR", "")
+os.environ.setdefault("NEURO_SENTRY_MODEL_BACKEND", "stub")
+os.environ.setdefault("NEURO_SENTRY_REPORT_CACHE_SIZE", "0")
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.append(str(BACKEND_DIR))
+
+import numpy as np
+
+import ingest
+import main
+from features import KEY_INDICES
+from gemini_prompt import build_triage_prompt, compute_bio_features
+from live_clients import LiveClient
+from schemas import PresagePacket
+from session_store import DEFAULT_LANDMARKS, SessionStore
+from streaming_stats import SessionAccumulator
+
+BASELINE_FILE = Path(__file__).resolve().parent / "baselines.json"
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+FPS = 30.0
+
+
+def synthetic_store(frames: int, mesh: bool = True, seed: int = 7) -> SessionStore:
+    """A ``frames``-long session: full meshes, or the clinical subset when ``mesh`` is False."""
+    rng = np.random.default_rng(seed)
+    indices = None if mesh else tuple(sorted(KEY_INDICES))
+    width = DEFAULT_LANDMARKS if mesh else len(indices)
+    landmarks = rng.uniform(100.0, 500.0, (frames, width, 3)).astype(np.float32)
+    # Face-shaped key points, so the asymmetry code takes its normal path
+    face = {1: (300, 250), 33: (240, 220), 263: (360, 220), 105: (240, 190),
+            334: (360, 190), 61: (260, 330), 291: (340, 335), 152: (300, 420)}
+    for index, (x, y) in face.items():
+        column = index if indices is None else indices.index(index)
+        landmarks[:, column, 0] = x + rng.normal(0, 1, frames)
+        landmarks[:, column, 1] = y + rng.normal(0, 1, frames)
+    landmarks[:, :, 2] = 0.0
+    return SessionStore.from_columns(
+        timestamps=1.7e9 + np.arange(frames) / FPS,
+        heart_rate=rng.normal(72, 3, frames),
+        breathing_rate=rng.normal(15, 1, frames),
+        quality=rng.uniform(0.5, 1.0, frames),
+        point_counts=np.full(frames, width, dtype=np.int32),
+        landmarks=landmarks,
+        landmark_indices=indices,
+    )
+
+
+def raw_packets(store: SessionStore, frames: int) -> List[Dict[str, Any]]:
+    """The first ``frames`` frames as parsed bridge JSON (what ``model_validate`` sees)."""
+    packets = []
+    for i in range(min(frames, len(store))):
+        dump = store.frame_dump(i)
+        dump["type"] = "vitals"
+        dump["face_points"] = [point[:2] for point in dump["face_points"]]
+        packets.append(dump)
+    return packets
+
+
+class FakeSocket:
+    """Stands in for a /live_state websocket; counts what would have been sent."""
+
+    def __init__(self) -> None:
+        self.sent = 0
+        self.bytes = 0
+
+    async def send_text(self, text: str) -> None:
+        self.sent += 1
+        self.bytes += len(text)
+
+
+async def _broadcast(messages: int, subscribers: int, live_frames: bool, store: SessionStore) -> None:
+    """Fan ``messages`` live payloads to ``subscribers`` fake clients and wait for every queue to drain."""
+    clients = [LiveClient(websocket=FakeSocket(), max_pending=messages) for _ in range(subscribers)]
+    for client in clients:
+        client.start()
+    main.live_clients[:] = clients
+    main.live_encoders.clear()
+    await main.bus.start(main._deliver_event)
+    summary = {"heart_rate": 72.0, "breathing_rate": 15.0, "quality": 0.9, "blood_pressure": None}
+    try:
+        for i in range(messages):
+            if live_frames:
+                points = store.landmarks[i % len(store), :, :2]
+                await main.broadcast_live_frame("bench", {**summary, "session_packet_count": i + 1}, points)
+            else:
+                await main.broadcast_to_live_clients({"type": "live", "data": summary}, "bench")
+        while any(client.pending for client in clients):
+            await asyncio.sleep(0)
+    finally:
+        main.live_clients.clear()
+        main.live_encoders.clear()
+        for client in clients:
+            await client.close()
+
+
+def accumulate(store: SessionStore) -> SessionAccumulator:
+    """Fold every frame into a ``SessionAccumulator``, as /presage_stream does per packet."""
+    accumulator = SessionAccumulator()
+    for i in range(len(store)):
+        accumulator.observe(store, i)
+    return accumulator
+
+
+def _time(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run_cases(sizes: List[int], args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    """``{"case@frames": {"seconds": ..., "per_frame_us": ...}}`` for every selected case.
+
+    Broadcast cases count messages instead of frames and are keyed by
+    ``[subscribers x landmarks]``.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+
+    def record(name: str, frames: int, fn: Callable[[], Any], repeat: int = args.repeat) -> None:
+        if args.only and not any(name.startswith(prefix) for prefix in args.only):
+            return
+        seconds = _time(fn, repeat)
+        key = f"{name}@{frames}"
+        results[key] = {"seconds": round(seconds, 6), "per_frame_us": round(seconds / frames * 1e6, 3)}
+        print(f"  {key:<34} {seconds * 1e3:10.2f} ms  {seconds / frames * 1e6:9.2f} us/frame")
+
+    for frames in sizes:
+        mesh = frames <= args.max_mesh_frames
+        store = synthetic_store(frames, mesh=mesh)
+        print(f"frames={frames} landmarks={store.landmarks.shape[1]} ({'mesh' if mesh else 'clinical'})")
+        accumulator = accumulate(store)
+        stats = accumulator.stats()
+
+        record("accumulator_observe", frames, lambda: accumulate(store))
+        # What session_end pays for the robust summary of the streamed series
+        record("accumulator_bio_features", frames, accumulator.bio_features)
+        record("compute_bio_features", frames, lambda: compute_bio_features(store))
+        # Without precomputed features, so the prompt includes its feature extraction
+        record("build_triage_prompt", frames, lambda: build_triage_prompt(stats, store))
+        record("store_dump", frames, lambda: store.to_dump(), repeat=1)
+
+        if mesh and frames <= args.max_packet_frames:
+            packets = raw_packets(store, frames)
+            record("model_validate", frames, lambda: [PresagePacket.model_validate(p) for p in packets])
+            record("decode_vitals", frames, lambda: [ingest.decode_vitals(p) for p in packets])
+            models = [PresagePacket.model_validate(p) for p in packets]
+            record("model_dump_json", frames, lambda: [m.model_dump(mode="json") for m in models], repeat=1)
+            del packets, models
+
+        # Broadcast cost depends on the frame width and fan-out, not the session length
+        messages = min(frames, args.max_broadcast)
+        width = store.landmarks.shape[1]
+        for subscribers in args.subscribers:
+            if f"broadcast_to_live_clients[{subscribers}]@{messages}" not in results:
+                record(
+                    f"broadcast_to_live_clients[{subscribers}]", messages,
+                    lambda: asyncio.run(_broadcast(messages, subscribers, False, store)),
+                )
+            if f"broadcast_live_frame[{subscribers}x{width}]@{messages}" not in results:
+                record(
+                    f"broadcast_live_frame[{subscribers}x{width}]", messages,
+                    lambda: asyncio.run(_broadcast(messages, subscribers, True, store)),
+                )
+        del store
+    return results
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Print the ratio to the baseline per case; returns the cases slower than ``tolerance``x."""
+    regressions = []
+    cases = baseline.get("cases", {})
+    print(f"\nvs baseline ({baseline.get('recorded_at', '?')}, {baseline.get('machine', '?')}):")
+    for key, result in results.items():
+        old = cases.get(key)
+        if not old:
+            print(f"  {key:<34} (no baseline)")
+            continue
+        ratio = result["seconds"] / old["seconds"] if old["seconds"] else float("inf")
+        flag = ""
+        if ratio > tolerance:
+            flag = "  REGRESSION"
+            regressions.append(key)
+        print(f"  {key:<34} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="session lengths in frames")
+    parser.add_argument("--only", nargs="+", default=None, help="case name prefixes to run")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--subscribers", type=int, nargs="+", default=[1, 16], help="fake /live_state clients")
+    parser.add_argument("--max-mesh-frames", type=int, default=10_000, help="larger sessions use the clinical profile")
+    parser.add_argument("--max-packet-frames", type=int, default=10_000, help="cap for the pydantic cases")
+    parser.add_argument("--max-broadcast", type=int, default=1_000, help="messages per broadcast case")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=1.5, help="slowdown ratio that counts as a regression")
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--check", action="store_true", help="exit non-zero if any case regressed")
+    args = parser.parse_args()
+
+    print(f"orjson={'yes' if ingest.orjson else 'no'} numpy={np.__version__} python={platform.python_version()}")
+    results = run_cases(args.sizes, args)
+
+    if args.save:
+        baseline: Dict[str, Any] = {}
+        if args.baseline.exists():
+            baseline = json.loads(args.baseline.read_text())
+        baseline["recorded_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        baseline["machine"] = f"{platform.machine()} {os.cpu_count()} cpu, python {platform.python_version()}"
+        baseline.setdefault("cases", {}).update(results)
+        args.baseline.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+        print(f"\nbaselines written to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"\nno baseline at {args.baseline}; run with --save to record one")
+        return
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than {args.tolerance}x baseline: {', '.join(regressions)}")
+        if args.check:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,114 @@
+"""Benchmark: pydantic vitals ingestion vs the fast path in ``ingest`` vs binary ``wire`` frames.
+
+Run from the repo root:  python backend/benchmarks/bench_ingest.py [--frames 600] [--points 468]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.append(str(BACKEND_DIR))
+
+import ingest
+import wire
+from schemas import PresagePacket
+from session_store import SessionStore
+
+
+def synthetic_messages(frames: int, points: int, seed: int = 7) -> List[str]:
+    """JSON text frames shaped like the iOS bridge's vitals packets."""
+    rng = random.Random(seed)
+    start = datetime.now(timezone.utc)
+    messages = []
+    for i in range(frames):
+        messages.append(
+            json.dumps(
+                {
+                    "type": "vitals",
+                    "timestamp": (start + timedelta(milliseconds=33 * i)).isoformat().replace("+00:00", "Z"),
+                    "heart_rate": rng.uniform(60, 100),
+                    "breathing_rate": rng.uniform(12, 20),
+                    "quality": rng.uniform(0.5, 1.0),
+                    "blood_pressure": None,
+                    "face_points": [[rng.random(), rng.random()] for _ in range(points)],
+                }
+            )
+        )
+    return messages
+
+
+def pydantic_path(messages: List[str]) -> SessionStore:
+    """The original path: json.loads + PresagePacket.model_validate per frame."""
+    store = SessionStore()
+    for message in messages:
+        store.append_packet(PresagePacket.model_validate(json.loads(message)))
+    return store
+
+
+def fast_path(messages: List[str]) -> SessionStore:
+    store = SessionStore()
+    for message in messages:
+        store.append_frame(ingest.parse_vitals(ingest.loads(message)))
+    return store
+
+
+def to_binary(messages: List[str]) -> List[bytes]:
+    """The same frames in the binary wire format."""
+    frames = []
+    for message in messages:
+        frame = ingest.parse_vitals(json.loads(message))
+        frames.append(wire.encode_frame(frame.timestamp, frame.points, frame.heart_rate, frame.breathing_rate, frame.quality))
+    return frames
+
+
+def binary_path(messages: List[bytes]) -> SessionStore:
+    store = SessionStore()
+    for message in messages:
+        store.append_frame(wire.decode_frame(message))
+    return store
+
+
+def _time(fn: Callable[[list], SessionStore], messages: list, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(messages)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--points", type=int, default=468)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    messages = synthetic_messages(args.frames, args.points)
+    slow = _time(pydantic_path, messages, args.repeat)
+    fast = _time(fast_path, messages, args.repeat)
+    binary_messages = to_binary(messages)
+    binary = _time(binary_path, binary_messages, args.repeat)
+    per_frame = lambda t: t / args.frames * 1e6  # noqa: E731
+
+    print(f"frames={args.frames} points={args.points} orjson={'yes' if ingest.orjson else 'no'}")
+    print(f"  pydantic model_validate : {per_frame(slow):8.1f} us/frame")
+    print(f"  fast path               : {per_frame(fast):8.1f} us/frame")
+    print(f"  binary wire frames      : {per_frame(binary):8.1f} us/frame")
+    print(f"  speedup (fast / binary) : {slow / fast:8.1f}x / {slow / binary:.1f}x")
+    json_bytes = sum(len(m) for m in messages) / len(messages)
+    binary_bytes = sum(len(m) for m in binary_messages) / len(binary_messages)
+    print(f"  bytes/frame json/binary : {json_bytes:8.0f} / {binary_bytes:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""Pub/sub for session events, so live fan-out works across uvicorn workers.
+
+Everything a worker would push to its /live_state clients goes through a bus
+as a ``BusEvent`` and every worker delivers it to the dashboards it holds:
+
+* ``frame``: a vitals frame (summary + landmark block), encoded per client
+  policy by the receiving worker
+* ``message``: a ready JSON payload (``final``, ``provisional``, raw dump, ...)
+* ``reset``: a session restarted, so drop its live encoder state
+
+``LocalBus`` (default) delivers in-process with no serialisation, exactly as
+a single worker always did. ``UnixSocketBus`` also relays events through a
+broker on a Unix socket to the other workers on the host. The first worker
+to take ``<path>.lock`` hosts the broker in its event loop, or one can run
+standalone with ``python backend/bus.py --path ...``. Events are delivered
+locally first, so a worker's own dashboards never wait on the broker.
+
+    NEURO_SENTRY_BUS=local           in-process only (single worker)
+                     unix            relay through the broker (uvicorn --workers N)
+    NEURO_SENTRY_BUS_PATH=/tmp/neuro-sentry-bus.sock
+"""
+
+from __future__ import annotations
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import struct
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+import ingest
+import logs
+
+BUS_KIND = os.getenv("NEURO_SENTRY_BUS", "local").strip().lower()
+BUS_PATH = os.getenv("NEURO_SENTRY_BUS_PATH", "/tmp/neuro-sentry-bus.sock")
+# Bytes buffered towards one peer before droppable events to it are skipped
+MAX_PEER_BUFFER = 4 * 1024 * 1024
+RECONNECT_SECONDS = 1.0
+
+# Frame on the wire: header length, blob length, flags, JSON header, float32 landmark blob
+_PREFIX = struct.Struct("!IIB")
+_DROPPABLE = 0x01
+
+
+@dataclass
+class BusEvent:
+    kind: str                                  # "frame" | "message" | "reset"
+    session_id: Optional[str] = None
+    payload: Optional[Dict[str, Any]] = None   # message payload, or frame summary
+    points: Optional[np.ndarray] = None        # frame landmarks, (n, 2|3)
+    points_list: Optional[list] = None         # parsed JSON form of ``points`` (local delivery only)
+    point_indices: Optional[Sequence[int]] = None
+    text: Optional[str] = None                 # message already rendered to JSON (``payload`` then only has its type)
+    droppable: bool = False
+
+    def encode(self) -> bytes:
+        header: Dict[str, Any] = {"kind": self.kind, "session_id": self.session_id, "payload": self.payload}
+        blob = b""
+        if self.points is not None:
+            points = np.ascontiguousarray(self.points, dtype=np.float32)
+            header["shape"] = list(points.shape)
+            blob = points.tobytes()
+        if self.point_indices is not None:
+            header["point_indices"] = [int(i) for i in self.point_indices]
+        if self.text is not None:
+            header["text"] = self.text
+        head = ingest.dumps(header).encode()
+        return _PREFIX.pack(len(head), len(blob), _DROPPABLE if self.droppable else 0) + head + blob
+
+    @classmethod
+    def decode(cls, head: bytes, blob: bytes, flags: int = 0) -> "BusEvent":
+        header = json.loads(head)
+        points = None
+        if "shape" in header:
+            points = np.frombuffer(blob, dtype=np.float32).reshape(header["shape"])
+        return cls(
+            kind=header["kind"],
+            session_id=header.get("session_id"),
+            payload=header.get("payload"),
+            points=points,
+            point_indices=header.get("point_indices"),
+            text=header.get("text"),
+            droppable=bool(flags & _DROPPABLE),
+        )
+
+
+Deliver = Callable[[BusEvent], Awaitable[None]]
+
+
+async def _read_event(reader: asyncio.StreamReader) -> Tuple[bytes, bytes, bytes, int]:
+    """One framed event as (raw bytes, header, blob, flags); raises ``IncompleteReadError`` at EOF."""
+    prefix = await reader.readexactly(_PREFIX.size)
+    head_len, blob_len, flags = _PREFIX.unpack(prefix)
+    body = await reader.readexactly(head_len + blob_len)
+    return prefix + body, body[:head_len], body[head_len:], flags
+
+
+class SessionBus:
+    """In-process bus: ``publish`` delivers straight to this worker's clients."""
+
+    name = "local"
+
+    def __init__(self) -> None:
+        self._deliver: Optional[Deliver] = None
+        self.published = 0
+        self.received = 0
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def publish(self, event: BusEvent) -> None:
+        self.published += 1
+        if self._deliver is not None:
+            await self._deliver(event)
+
+    async def close(self) -> None:
+        self._deliver = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {"bus": self.name, "published": self.published, "received": self.received}
+
+
+LocalBus = SessionBus
+
+
+class BusBroker:
+    """Relays every event from one connected worker to all the others."""
+
+    def __init__(self, path: str = BUS_PATH) -> None:
+        self.path = path
+        self.peers: Set[asyncio.StreamWriter] = set()
+        self.relayed = 0
+        self.dropped = 0
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # stale socket from a dead broker; callers hold the lock
+        self._server = await asyncio.start_unix_server(self._serve, path=self.path)
+        os.chmod(self.path, 0o600)
+        logs.event("bus", "broker_started", path=self.path)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.peers.add(writer)
+        logs.event("bus", "peer_connected", peers=len(self.peers))
+        try:
+            while True:
+                raw, _, _, flags = await _read_event(reader)
+                droppable = bool(flags & _DROPPABLE)
+                for peer in list(self.peers):
+                    if peer is writer or peer.is_closing():
+                        continue
+                    if droppable and peer.transport.get_write_buffer_size() > MAX_PEER_BUFFER:
+                        self.dropped += 1
+                        continue
+                    peer.write(raw)
+                self.relayed += 1
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.peers.discard(writer)
+            writer.close()
+            logs.event("bus", "peer_disconnected", peers=len(self.peers))
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        for peer in list(self.peers):
+            peer.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class UnixSocketBus(SessionBus):
+    """Local delivery plus relay through a ``BusBroker`` to the other workers on this host."""
+
+    name = "unix"
+
+    def __init__(self, path: str = BUS_PATH) -> None:
+        super().__init__()
+        self.path = path
+        self.dropped = 0
+        self.broker: Optional[BusBroker] = None
+        self._lock_fd: Optional[int] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Deliver) -> None:
+        await super().start(deliver)
+        await self._maybe_host_broker()
+        self._task = asyncio.create_task(self._run())
+
+    async def _maybe_host_broker(self) -> None:
+        """Host the broker if no other process holds ``<path>.lock``."""
+        fd = os.open(self.path + ".lock", os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return
+        self._lock_fd = fd
+        self.broker = BusBroker(self.path)
+        await self.broker.start()
+
+    async def _run(self) -> None:
+        """Stay connected to the broker and deliver what other workers publish."""
+        while True:
+            try:
+                reader, self._writer = await asyncio.open_unix_connection(self.path)
+            except OSError:
+                if self._lock_fd is None and self.broker is None:
+                    await self._maybe_host_broker()  # the hosting worker went away
+                await asyncio.sleep(RECONNECT_SECONDS)
+                continue
+            logs.event("bus", "connected", path=self.path, host=self.broker is not None)
+            try:
+                while True:
+                    _, head, blob, flags = await _read_event(reader)
+                    self.received += 1
+                    if self._deliver is not None:
+                        await self._deliver(BusEvent.decode(head, blob, flags))
+            except (asyncio.IncompleteReadError, ConnectionError) as exc:
+                logs.event("bus", "disconnected", level=logging.WARNING, error=type(exc).__name__)
+            finally:
+                writer, self._writer = self._writer, None
+                if writer is not None:
+                    writer.close()
+            await asyncio.sleep(RECONNECT_SECONDS)
+
+    async def publish(self, event: BusEvent) -> None:
+        await super().publish(event)
+        writer = self._writer
+        if writer is None or writer.is_closing():
+            return
+        if event.droppable and writer.transport.get_write_buffer_size() > MAX_PEER_BUFFER:
+            self.dropped += 1
+            return
+        writer.write(event.encode())
+
+    async def close(self) -> None:
+        await super().close()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._writer is not None:
+            self._writer.close()
+        if self.broker is not None:
+            await self.broker.close()
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def stats(self) -> Dict[str, Any]:
+        out = super().stats()
+        out.update({"path": self.path, "connected": self._writer is not None, "dropped": self.dropped})
+        if self.broker is not None:
+            out["broker"] = {"peers": len(self.broker.peers), "relayed": self.broker.relayed, "dropped": self.broker.dropped}
+        return out
+
+
+def create_bus(kind: str = BUS_KIND, path: str = BUS_PATH) -> SessionBus:
+    if kind == "unix":
+        return UnixSocketBus(path)
+    if kind != "local":
+        raise ValueError(f"unknown NEURO_SENTRY_BUS {kind!r} (local or unix)")
+    return LocalBus()
+
+
+async def _serve_forever(path: str) -> None:
+    broker = BusBroker(path)
+    await broker.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await broker.close()
+
+
+__all__ = ["BUS_KIND", "BUS_PATH", "BusBroker", "BusEvent", "LocalBus", "SessionBus", "UnixSocketBus", "create_bus"]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Standalone session-bus broker for multi-worker deployments")
+    parser.add_argument("--path", default=BUS_PATH)
+    args = parser.parse_args()
+    # Take the same lock a worker would, so workers only connect to this broker
+    lock_fd = os.open(args.path + ".lock", os.O_CREAT | os.O_RDWR, 0o600)
+    fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    try:
+        asyncio.run(_serve_forever(args.path))
+    except KeyboardInterrupt:
+        pass
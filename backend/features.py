@@ -0,0 +1,259 @@
+"""Vectorised facial asymmetry engine shared by session stats and the triage prompt."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# --- MEDIAPIPE INDICES ---
+IDX_NOSE = 1
+IDX_EYE_L = 33
+IDX_MOUTH_L = 61
+IDX_BROW_L = 105
+IDX_CHIN = 152
+IDX_EYE_R = 263
+IDX_MOUTH_R = 291
+IDX_BROW_R = 334
+
+KEY_INDICES = (IDX_NOSE, IDX_EYE_L, IDX_MOUTH_L, IDX_BROW_L, IDX_CHIN, IDX_EYE_R, IDX_MOUTH_R, IDX_BROW_R)
+
+# Face height (nose -> chin) below this is treated as a garbage frame: pixels, and
+# normalised [0, 1] coordinates (frames whose key points all lie within NORMALIZED_MAX).
+MIN_FACE_HEIGHT = 10.0
+MIN_FACE_HEIGHT_NORMALIZED = 0.05
+NORMALIZED_MAX = 2.0
+
+# Robust aggregation: fraction trimmed from each tail, frames per sliding variance window
+TRIM_FRACTION = 0.1
+VARIANCE_WINDOW = 30
+
+# A frame is a full face mesh when it has more landmarks than this (every KEY_INDICES row included).
+FULL_MESH_POINTS = 400
+
+
+@dataclass
+class AsymmetryFrames:
+    """Per-frame asymmetry for a whole session, one array entry per frame.
+
+    ``*_raw`` values are ``|dist(left, nose) - dist(right, nose)|`` on the y axis in
+    landmark units; the unsuffixed ones are divided by face height. Mouth, brow
+    and face height are measured after rotating the face by ``-roll`` (the tilt
+    of the 33 -> 263 eye line) about the nose, so a tilted head does not read as
+    droop; eye asymmetry uses the unrotated points since the rotation levels the
+    eyes by construction. ``has_points`` marks frames that carry every key
+    landmark, ``valid`` additionally requires a usable face height.
+    """
+
+    mouth_raw: np.ndarray
+    brow_raw: np.ndarray
+    eye_raw: np.ndarray
+    face_height: np.ndarray
+    mouth: np.ndarray
+    brow: np.ndarray
+    eye: np.ndarray
+    has_points: np.ndarray
+    valid: np.ndarray
+    roll: np.ndarray
+
+    def __len__(self) -> int:
+        return self.mouth_raw.shape[0]
+
+
+def _empty(n: int) -> AsymmetryFrames:
+    zeros = np.zeros(n, dtype=np.float64)
+    mask = np.zeros(n, dtype=bool)
+    return AsymmetryFrames(zeros, zeros, zeros, zeros, zeros, zeros, zeros, mask, mask, zeros)
+
+
+def key_columns(indices: Optional[Sequence[int]] = None) -> Optional[List[int]]:
+    """Columns of ``KEY_INDICES`` in landmark rows that carry only ``indices``.
+
+    ``None`` means rows are the full MediaPipe mesh (column == index); returns
+    ``None`` as well when a subset lacks a key landmark.
+    """
+    if indices is None:
+        return list(KEY_INDICES)
+    position = {int(index): col for col, index in enumerate(indices)}
+    if not all(index in position for index in KEY_INDICES):
+        return None
+    return [position[index] for index in KEY_INDICES]
+
+
+def asymmetry_frames(
+    landmarks: np.ndarray,
+    point_counts: np.ndarray,
+    indices: Optional[Sequence[int]] = None,
+) -> AsymmetryFrames:
+    """Compute mouth/brow/eye asymmetry for every frame in a few array ops.
+
+    ``landmarks`` is ``(frames, points, 2|3)``; ``point_counts[i]`` is how many
+    rows of frame ``i`` are real points. ``indices`` names the MediaPipe index of
+    each row when frames carry a landmark subset (see ``landmark_profile``).
+    """
+    n = landmarks.shape[0]
+    cols = key_columns(indices)
+    if cols is None:
+        return _empty(n)
+    required = max(cols) + 1
+    if n == 0 or landmarks.ndim != 3 or landmarks.shape[1] < required:
+        return _empty(n)
+
+    xy = landmarks[:, cols, :2].astype(np.float64)
+    x, y = xy[..., 0], xy[..., 1]
+    has_points = (np.asarray(point_counts) >= required) & np.isfinite(xy).all(axis=(1, 2))
+    nose_x, nose_y = x[:, :1], y[:, :1]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Head roll from the eye line (IDX_EYE_L -> IDX_EYE_R); y of every key point after undoing it
+        roll = np.arctan2(y[:, 5] - y[:, 1], x[:, 5] - x[:, 1])
+        roll = np.where(has_points, roll, 0.0)
+        sin, cos = np.sin(roll)[:, None], np.cos(roll)[:, None]
+        level_y = -(x - nose_x) * sin + (y - nose_y) * cos + nose_y
+
+        nose, _, mouth_l, brow_l, chin, _, mouth_r, brow_r = level_y.T
+        eye_l, eye_r = y[:, 1], y[:, 5]
+        nose_raw = y[:, 0]
+        mouth_raw = np.abs(np.abs(mouth_l - nose) - np.abs(mouth_r - nose))
+        brow_raw = np.abs(np.abs(brow_l - nose) - np.abs(brow_r - nose))
+        eye_raw = np.abs(np.abs(eye_l - nose_raw) - np.abs(eye_r - nose_raw))
+        face_height = np.abs(chin - nose)
+        normalized = np.abs(np.where(np.isfinite(xy), xy, 0.0)).max(axis=(1, 2)) <= NORMALIZED_MAX
+        min_height = np.where(normalized, MIN_FACE_HEIGHT_NORMALIZED, MIN_FACE_HEIGHT)
+        valid = has_points & (face_height >= min_height)
+        scale = np.where(valid, face_height, 1.0)
+        mouth = np.where(valid, mouth_raw / scale, 0.0)
+        brow = np.where(valid, brow_raw / scale, 0.0)
+        eye = np.where(valid, eye_raw / scale, 0.0)
+
+    # Frames without points carry NaNs; zero them so sums over masks stay finite.
+    mouth_raw = np.where(has_points, mouth_raw, 0.0)
+    brow_raw = np.where(has_points, brow_raw, 0.0)
+    eye_raw = np.where(has_points, eye_raw, 0.0)
+    face_height = np.where(has_points, face_height, 0.0)
+    return AsymmetryFrames(mouth_raw, brow_raw, eye_raw, face_height, mouth, brow, eye, has_points, valid, roll)
+
+
+def quality_weights(quality: np.ndarray) -> np.ndarray:
+    """Per-frame weights in [0, 1] from the bridge's ``quality``; unreported counts as 1."""
+    quality = np.asarray(quality, dtype=np.float64)
+    return np.where(np.isnan(quality), 1.0, np.clip(quality, 0.0, 1.0))
+
+
+def sliding_variance(values: np.ndarray, window: int = VARIANCE_WINDOW) -> np.ndarray:
+    """Variance of every ``window``-long run of ``values`` (empty if shorter), via cumulative sums."""
+    values = np.asarray(values, dtype=np.float64)
+    if window < 2 or values.shape[0] < window:
+        return np.empty(0, dtype=np.float64)
+    c1 = np.concatenate(([0.0], np.cumsum(values)))
+    c2 = np.concatenate(([0.0], np.cumsum(values * values)))
+    mean = (c1[window:] - c1[:-window]) / window
+    return np.maximum((c2[window:] - c2[:-window]) / window - mean * mean, 0.0)
+
+
+def _ranked(ordered: np.ndarray, rank: float) -> float:
+    """Linear-interpolated value at fractional ``rank`` (``np.percentile``'s default method)."""
+    lo = int(rank)
+    hi = min(lo + 1, ordered.shape[0] - 1)
+    return float(ordered[lo] + (ordered[hi] - ordered[lo]) * (rank - lo))
+
+
+def robust_summary(
+    values: np.ndarray,
+    mask: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+    trim: float = TRIM_FRACTION,
+    window: int = VARIANCE_WINDOW,
+) -> Dict[str, Optional[float]]:
+    """Quality-weighted trimmed mean, median, percentiles and sliding-window variance of ``values[mask]``.
+
+    The trimmed mean drops ``trim`` of the frames from each tail before the
+    weighted average, so a few blinks or head turns cannot drag it.
+    """
+    v = np.asarray(values, dtype=np.float64)[mask]
+    n = v.shape[0]
+    if not n:
+        return {key: None for key in ("mean", "trimmed_mean", "median", "p10", "p90", "window_var_max", "window_var_mean")}
+    w = np.ones(n) if weights is None else np.asarray(weights, dtype=np.float64)[mask]
+    if w.sum() <= 0:
+        w = np.ones(n)
+
+    # One O(n) partition around the trim cuts and the percentile ranks instead of a full sort
+    cut = int(n * trim)
+    ranks = [q / 100 * (n - 1) for q in (10, 50, 90)]
+    kth = {cut, n - cut - 1} if n - 2 * cut > 0 else set()
+    for rank in ranks:
+        kth.update((int(rank), min(int(rank) + 1, n - 1)))
+    order = np.argpartition(v, sorted(kth))
+    ordered = v[order]
+    kept = order[cut : n - cut] if n - 2 * cut > 0 else order
+    kept_w = w[kept]
+    trimmed = float(np.average(v[kept], weights=kept_w)) if kept_w.sum() > 0 else float(v[kept].mean())
+    p10, median, p90 = (_ranked(ordered, rank) for rank in ranks)
+    var = sliding_variance(v, window)
+    return {
+        "mean": float(np.average(v, weights=w)),
+        "trimmed_mean": trimmed,
+        "median": float(median),
+        "p10": float(p10),
+        "p90": float(p90),
+        "window_var_max": float(var.max()) if var.size else None,
+        "window_var_mean": float(var.mean()) if var.size else None,
+    }
+
+
+def asymmetry_features(summary: Dict[str, Optional[float]], count: int) -> Dict[str, Any]:
+    """Flat ``compute_bio_features`` shape from a ``robust_summary`` of mouth asymmetry."""
+
+    def r(value: Optional[float], digits: int = 4) -> Optional[float]:
+        return None if value is None else float(round(value, digits))
+
+    return {
+        "mouth_asymmetry_index": r(summary["trimmed_mean"]) or 0.0,
+        "mouth_asymmetry_median": r(summary["median"]),
+        "mouth_asymmetry_p90": r(summary["p90"]),
+        "mouth_asymmetry_window_var_max": r(summary["window_var_max"], 6),
+        "packets_analyzed": int(count),
+    }
+
+
+def analysis_mask(asym: AsymmetryFrames, point_counts: np.ndarray, indices: Optional[Sequence[int]] = None) -> np.ndarray:
+    """Frames the bio features average over: valid, and a full mesh unless rows are a declared subset."""
+    if indices is not None:
+        return asym.valid
+    return asym.valid & (np.asarray(point_counts) > FULL_MESH_POINTS)
+
+
+def masked_mean(values: np.ndarray, mask: np.ndarray) -> float | None:
+    """Mean of ``values[mask]``, or ``None`` when nothing is selected."""
+    count = int(np.count_nonzero(mask))
+    return float(values[mask].sum() / count) if count else None
+
+
+__all__ = [
+    "AsymmetryFrames",
+    "FULL_MESH_POINTS",
+    "IDX_BROW_L",
+    "IDX_BROW_R",
+    "IDX_CHIN",
+    "IDX_EYE_L",
+    "IDX_EYE_R",
+    "IDX_MOUTH_L",
+    "IDX_MOUTH_R",
+    "IDX_NOSE",
+    "KEY_INDICES",
+    "MIN_FACE_HEIGHT",
+    "MIN_FACE_HEIGHT_NORMALIZED",
+    "NORMALIZED_MAX",
+    "TRIM_FRACTION",
+    "VARIANCE_WINDOW",
+    "analysis_mask",
+    "asymmetry_features",
+    "asymmetry_frames",
+    "key_columns",
+    "masked_mean",
+    "quality_weights",
+    "robust_summary",
+    "sliding_variance",
+]
@@ -266,90 +266,115 @@
 from __future__ import annotations
 
 import asyncio
-import json
-import os
+import logging
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from dotenv import load_dotenv
-from gemini_prompt import build_triage_prompt
-
-try:
-    from google import genai
-    from google.genai import types as genai_types
-except Exception:
-    genai = None
-    genai_types = None
+from gemini_prompt import build_triage_prompt, compute_bio_features
+import logs
+from metrics import STAGE_SECONDS
+from profiling import span
+from model_backends import TriageRunner, create_backend
+from report_cache import ReportCache, feature_key
+from session_store import SessionStore
 
 BASE_DIR = Path(__file__).resolve().parent
 load_dotenv(dotenv_path=BASE_DIR / ".env")
 
+# Reports for near-identical scans (same quantised features + prompt version)
+report_cache = ReportCache.from_env()
+
+# Strict Stroke-Only Schema (No Bell's Palsy)
+REPORT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "risk_level": {"type": "string", "enum": ["LOW", "MED", "HIGH"]},
+        "stroke_probability": {"type": "number", "description": "Probability 0.0 to 1.0"},
+        "summary": {"type": "string", "description": "Professional clinical summary"},
+        "rationale": {"type": "string", "description": "Why did the AI decide this?"},
+        "recommendation": {"type": "string", "description": "Actionable next steps"},
+        "confidence": {"type": "number", "description": "AI Confidence 0.0 to 1.0"},
+    },
+    "required": [
+        "risk_level", 
+        "stroke_probability", 
+        "summary", 
+        "rationale",
+        "recommendation", 
+        "confidence"
+    ],
+}
+
+# One long-lived backend (single genai.Client) behind a bounded worker pool
+_runner: Optional[TriageRunner] = None
+
+
+def triage_runner() -> TriageRunner:
+    """The process-wide runner, created on first use (or at app startup)."""
+    global _runner
+    if _runner is None:
+        _runner = TriageRunner(create_backend())
+        logs.event("Neuro-Sentry", "triage_runner", backend=_runner.stats()["backend"], workers=_runner.workers)
+    return _runner
+
+
+def shutdown_triage_runner() -> None:
+    global _runner
+    if _runner is not None:
+        _runner.shutdown()
+        _runner = None
+
+
 async def call_gemini_report(
     stats: Dict[str, object], 
-    sample_packets: List[Dict[str, object]]
+    sample_packets: SessionStore | List[Dict[str, object]],
+    features: Optional[Dict[str, float]] = None,
 ) -> Dict[str, object]:
     
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key or not genai:
-        print("[Neuro-Sentry] Critical: Gemini SDK/Key missing.")
-        # Return a safe "Healthy" fallback if API fails
+    if features is None:
+        with STAGE_SECONDS.time(stage="bio_features"):
+            features = compute_bio_features(sample_packets)
+    cache_key = feature_key(stats, features)
+    cached = report_cache.get(cache_key)
+    if cached is not None:
+        logs.event("Neuro-Sentry", "cache_hit", key=cache_key[:8], hits=report_cache.hits, misses=report_cache.misses)
+        return cached
+
+    runner = triage_runner()
+    if not runner.available:
+        logs.event("Neuro-Sentry", "backend_missing", level=logging.CRITICAL, detail="Gemini SDK/Key missing")
+        # Return a safe "Healthy" fallback if API fails; ``fallback`` keeps it from replacing a local report
         return {
             "risk_level": "LOW",
             "stroke_probability": 0.01,
             "summary": "System offline. Defaulting to healthy baseline.",
             "recommendation": "Check API configuration.",
-            "confidence": 0.0
+            "confidence": 0.0,
+            "fallback": True,
         }
 
     # 1. Build the Prompt
-    prompt_text = build_triage_prompt(stats, sample_packets)
-
-    # 2. Strict Stroke-Only Schema (No Bell's Palsy)
-    report_schema_dict = {
-        "type": "object",
-        "properties": {
-            "risk_level": {"type": "string", "enum": ["LOW", "MED", "HIGH"]},
-            "stroke_probability": {"type": "number", "description": "Probability 0.0 to 1.0"},
-            "summary": {"type": "string", "description": "Professional clinical summary"},
-            "rationale": {"type": "string", "description": "Why did the AI decide this?"},
-            "recommendation": {"type": "string", "description": "Actionable next steps"},
-            "confidence": {"type": "number", "description": "AI Confidence 0.0 to 1.0"},
-        },
-        "required": [
-            "risk_level", 
-            "stroke_probability", 
-            "summary", 
-            "rationale",
-            "recommendation", 
-            "confidence"
-        ],
-    }
-
-    def _invoke() -> Dict[str, object]:
-        client = genai.Client(api_key=api_key)
-        
-        # --- USING GEMINI 2.0 FLASH ---
-        response = client.models.generate_content(
-            model="gemini-2.0-flash", 
-            contents=prompt_text,
-            config=genai_types.GenerateContentConfig(
-                response_mime_type="application/json",
-                response_schema=report_schema_dict,
-                temperature=0.0, # Deterministic mode
-            ),
-        )
-        return json.loads(response.text)
+    with STAGE_SECONDS.time(stage="prompt_build"), span("prompt"):
+        prompt_text = build_triage_prompt(stats, sample_packets, features=features)
 
     try:
-        print(f"[Neuro-Sentry] Invoking Gemini 2.0 Flash on {len(sample_packets)} packets...")
-        result = await asyncio.to_thread(_invoke)
+        logs.event(
+            "Neuro-Sentry", "invoke", backend=runner.backend.name, packets=len(sample_packets),
+            queued=runner.queued, in_flight=runner.in_flight,
+        )
+        with span("llm"):
+            result = await runner.generate(prompt_text, REPORT_SCHEMA)
         
         # Sanity Check Logging
-        print(f"[Neuro-Sentry] Result: Risk={result['risk_level']} | Prob={result['stroke_probability']}")
+        logs.event("Neuro-Sentry", "result", risk=result["risk_level"], probability=result["stroke_probability"])
+        report_cache.put(cache_key, result)
+        if report_cache.path is not None:
+            await asyncio.to_thread(report_cache.save)
         return result
         
     except Exception as exc:
-        print(f"[Neuro-Sentry] Error: {exc}")
+        logs.event("Neuro-Sentry", "error", level=logging.ERROR, error=f"{type(exc).__name__}: {exc}")
         # Safe fallback on crash
         return {
             "risk_level": "LOW",
@@ -357,7 +382,8 @@ async def call_gemini_report(
             "summary": "Automated triage encountered an error, but biometrics appear stable.",
             "rationale": "Analysis engine fallback.",
             "recommendation": "Repeat scan if symptoms persist.",
-            "confidence": 0.8
+            "confidence": 0.8,
+            "fallback": True,
         }
 
-__all__ = ["call_gemini_report"]
\ No newline at end of file
+__all__ = ["REPORT_SCHEMA", "call_gemini_report", "report_cache", "shutdown_triage_runner", "triage_runner"]
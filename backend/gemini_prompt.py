@@ -240,15 +240,15 @@
 from __future__ import annotations
 
 import json
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional
 
-# --- MEDIAPIPE INDICES ---
-IDX_NOSE = 1
-IDX_CHIN = 152
-IDX_MOUTH_L = 61
-IDX_MOUTH_R = 291
-IDX_EYE_L = 33
-IDX_EYE_R = 263
+import numpy as np
+
+from features import analysis_mask, asymmetry_features, asymmetry_frames, quality_weights, robust_summary
+from session_store import SessionStore
+
+# Bump whenever the prompt text or report schema changes (invalidates cached reports).
+PROMPT_VERSION = "cpss-v3"
 
 # --- RAG: CLINICAL PROTOCOL ---
 # This text block effectively "brainwashes" Gemini to follow real medical rules
@@ -270,64 +270,46 @@ Target Pathology: Acute Ischemic Stroke (AIS).
    - Asymmetry > 0.15 (15%): PROBABLE LESION (DANGER)
 """
 
-def _calculate_physics(points: List[List[float]]) -> Tuple[float, bool]:
-    """Calculates pure mouth asymmetry normalized by face height."""
-    try:
-        nose_y = points[IDX_NOSE][1]
-        chin_y = points[IDX_CHIN][1]
-        mouth_l_y = points[IDX_MOUTH_L][1]
-        mouth_r_y = points[IDX_MOUTH_R][1]
-
-        # Normalization factor (Face Height)
-        face_height = abs(chin_y - nose_y)
-        if face_height < 10: return 0.0, False
-
-        # Calculate Vertical Mouth Offset
-        # How much lower is one corner vs the other?
-        dist_l = abs(mouth_l_y - nose_y)
-        dist_r = abs(mouth_r_y - nose_y)
-        
-        # Raw Offset / Face Height = Percentage Deviation
-        raw_asym = abs(dist_l - dist_r)
-        normalized_asym = raw_asym / face_height
+def compute_bio_features(packets: SessionStore | List[Dict[str, object]]) -> Dict[str, float]:
+    """Roll-compensated mouth asymmetry normalized by face height, robustly aggregated over analysable frames."""
+    store = packets if isinstance(packets, SessionStore) else SessionStore.from_dumps(packets)
+    asym = asymmetry_frames(store.landmarks, store.point_counts, store.landmark_indices)
+    used = analysis_mask(asym, store.point_counts, store.landmark_indices)
 
-        return normalized_asym, True
-    except Exception:
-        return 0.0, False
+    # Quality-weighted trimmed mean, so a few blinks / head turns don't skew it
+    summary = robust_summary(asym.mouth, used, quality_weights(store.quality))
+    return asymmetry_features(summary, int(np.count_nonzero(used)))
+
+# Technician note handed to Gemini, by mouth-asymmetry band
+TECH_NOTES = {
+    "normal": "Technician Note: Asymmetry is within normal physiological limits. PATIENT IS LIKELY HEALTHY.",
+    "mild": "Technician Note: Mild asymmetry detected. Monitor.",
+    "significant": "Technician Note: SIGNIFICANT UNILATERAL DROOP DETECTED. High Stroke Risk.",
+}
 
-def compute_bio_features(packets: List[Dict[str, object]]) -> Dict[str, float]:
-    mouth_scores = []
-    valid_packets = 0
-    
-    for p in packets:
-        points = p.get("face_points", [])
-        if points and len(points) > 400:
-            score, valid = _calculate_physics(points)
-            if valid:
-                mouth_scores.append(score)
-                valid_packets += 1
-    
-    # Smooth out noise using average
-    avg_mouth = sum(mouth_scores) / len(mouth_scores) if mouth_scores else 0.0
-    
-    return {
-        "mouth_asymmetry_index": float(round(avg_mouth, 4)),
-        "packets_analyzed": valid_packets
-    }
 
-def build_triage_prompt(stats: Dict[str, object], sample_packets: List[Dict[str, object]]) -> str:
-    # 1. Run Math
-    features = compute_bio_features(sample_packets)
+def tech_note_band(mouth_val: float) -> str:
+    """Which ``TECH_NOTES`` entry the prompt carries for ``mouth_asymmetry_index``."""
+    if mouth_val < 0.02:
+        return "normal"
+    if mouth_val < 0.15:
+        return "mild"
+    return "significant"
+
+
+def build_triage_prompt(
+    stats: Dict[str, object],
+    sample_packets: SessionStore | List[Dict[str, object]],
+    features: Optional[Dict[str, float]] = None,
+) -> str:
+    # 1. Run Math (unless the caller already has streaming features)
+    if features is None:
+        features = compute_bio_features(sample_packets)
     mouth_val = features["mouth_asymmetry_index"]
     
     # 2. Generate "Technician Notes" for Gemini
     # We force the interpretation here so Gemini doesn't guess.
-    if mouth_val < 0.02:
-        tech_note = "Technician Note: Asymmetry is within normal physiological limits. PATIENT IS LIKELY HEALTHY."
-    elif mouth_val < 0.15:
-        tech_note = "Technician Note: Mild asymmetry detected. Monitor."
-    else:
-        tech_note = "Technician Note: SIGNIFICANT UNILATERAL DROOP DETECTED. High Stroke Risk."
+    tech_note = TECH_NOTES[tech_note_band(mouth_val)]
 
     # 3. Construct the Prompt
     payload = {
@@ -349,4 +331,4 @@ def build_triage_prompt(stats: Dict[str, object], sample_packets: List[Dict[str,
 
     return instructions + "\n\nLIVE TELEMETRY:\n" + json.dumps(payload)
 
-__all__ = ["build_triage_prompt"]
\ No newline at end of file
+__all__ = ["PROMPT_VERSION", "TECH_NOTES", "build_triage_prompt", "compute_bio_features", "tech_note_band"]
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""Landmark profile negotiated on ``session_start``.
+
+A bridge that asks for a profile sends only a subset of MediaPipe landmarks on
+most frames and the full mesh at ``mesh_hz``::
+
+    {"type": "session_start", "landmark_profile": "clinical"}
+    {"type": "session_start", "landmark_profile": {"indices": [1, 33, ...], "mesh_hz": 1}}
+
+The backend answers with ``{"type": "session_ack", "landmark_profile": {...}}``
+holding the indices it will read (always including ``KEY_INDICES``) in the
+order subset frames must list them. Subset frames go to the analysis store at
+full rate; full-mesh frames are also kept, rate-limited, in a separate mesh
+store for visualisation. Without a profile every frame is a full mesh, as before.
+Frames are told apart by size, so a profile may list at most ``FULL_MESH_POINTS``
+indices.
+"""
+
+from __future__ import annotations
+
+from bisect import bisect_left
+from dataclasses import dataclass
+from numbers import Integral
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from features import FULL_MESH_POINTS, KEY_INDICES
+from session_store import DEFAULT_LANDMARKS
+
+DEFAULT_MESH_HZ = 1.0
+
+
+def _parse_indices(requested: Any) -> set:
+    """Requested landmark indices as ints in ``[0, DEFAULT_LANDMARKS)``; anything else is a ``ValueError``."""
+    if isinstance(requested, (str, bytes, dict)) or not hasattr(requested, "__iter__"):
+        raise ValueError(f"landmark indices must be a list of ints, not {requested!r}")
+    indices = set()
+    for i in requested:
+        if isinstance(i, bool) or not isinstance(i, Integral):
+            raise ValueError(f"landmark index {i!r} is not an int")
+        if not 0 <= i < DEFAULT_LANDMARKS:
+            raise ValueError(f"landmark index {i} outside the {DEFAULT_LANDMARKS}-point mesh")
+        indices.add(int(i))
+    return indices
+
+
+@dataclass(frozen=True)
+class LandmarkProfile:
+    name: str = "full"
+    # MediaPipe indices carried by subset frames; None = every frame is a full mesh
+    indices: Optional[Tuple[int, ...]] = None
+    mesh_hz: float = DEFAULT_MESH_HZ
+
+    @classmethod
+    def from_request(cls, value: Any) -> "LandmarkProfile":
+        """Parse the ``landmark_profile`` field of ``session_start`` (``None``/"full" = legacy)."""
+        if value is None or value == "full":
+            return cls()
+        if isinstance(value, str):
+            if value in ("clinical", "key"):
+                return cls(name="clinical", indices=tuple(sorted(KEY_INDICES)))
+            raise ValueError(f"unknown landmark profile {value!r}")
+        if isinstance(value, (list, tuple)):
+            value = {"indices": value}
+        if not isinstance(value, dict):
+            raise ValueError(f"bad landmark profile {value!r}")
+
+        requested = value.get("indices")
+        if requested is None or value.get("name") in ("clinical", "key"):
+            indices = set(KEY_INDICES)
+        else:
+            indices = _parse_indices(requested) | set(KEY_INDICES)
+        if len(indices) > FULL_MESH_POINTS:
+            # A longer subset frame would read as a full mesh
+            raise ValueError(f"landmark profile lists {len(indices)} indices, at most {FULL_MESH_POINTS} allowed")
+        try:
+            mesh_hz = max(0.0, float(value.get("mesh_hz", DEFAULT_MESH_HZ)))
+        except (TypeError, ValueError):
+            mesh_hz = DEFAULT_MESH_HZ
+        return cls(name=str(value.get("name") or "custom"), indices=tuple(sorted(indices)), mesh_hz=mesh_hz)
+
+    @property
+    def is_subset(self) -> bool:
+        return self.indices is not None
+
+    def is_full_mesh(self, points: np.ndarray) -> bool:
+        return points.shape[0] > FULL_MESH_POINTS
+
+    def subset(self, points: np.ndarray) -> np.ndarray:
+        """The profile's rows of a full-mesh frame (subset frames pass through).
+
+        A mesh shorter than the highest index gives the leading indices it has,
+        which is how a short subset frame is read too.
+        """
+        if self.indices is None or not self.is_full_mesh(points):
+            return points
+        return points[list(self.indices[: bisect_left(self.indices, points.shape[0])])]
+
+    def ack(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "indices": None if self.indices is None else list(self.indices),
+            "mesh_hz": self.mesh_hz,
+        }
+
+
+__all__ = ["DEFAULT_MESH_HZ", "LandmarkProfile"]
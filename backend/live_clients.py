@@ -0,0 +1,166 @@
+"""Dashboard subscribers on /live_state: followed sessions, stream policy and outbound queue."""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import os
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Iterable, Optional, Set, Tuple
+
+from fastapi import WebSocket
+
+from live_policy import LivePolicy
+from metrics import BROADCAST_LATENCY
+
+# Droppable (``live``) messages a slow client may have pending before the oldest is dropped.
+LIVE_QUEUE_SIZE = int(os.getenv("NEURO_SENTRY_LIVE_QUEUE", "8"))
+# Characters of undelivered non-droppable messages (final, raw dump chunks) before a client is cut off.
+LIVE_BACKLOG_CHARS = int(os.getenv("NEURO_SENTRY_LIVE_BACKLOG_MB", "64")) * 1024 * 1024
+
+_client_ids = itertools.count(1)
+
+
+def parse_follow(value: Optional[Iterable[str] | str]) -> Optional[Set[str]]:
+    """Turn ``"a,b"`` / ``["a", "b"]`` into a follow set; ``None``/``"*"`` means every session."""
+    if value is None:
+        return None
+    items = value.split(",") if isinstance(value, str) else list(value)
+    follow = {str(item).strip() for item in items if str(item).strip()}
+    if not follow or "*" in follow:
+        return None
+    return follow
+
+
+@dataclass(eq=False)
+class LiveClient:
+    """A /live_state websocket, the session ids it wants (``None`` = all) and its stream policy.
+
+    Broadcasts never await the socket: they ``enqueue`` pre-serialised text and a
+    per-client writer task drains the queue. Droppable messages are bounded by
+    ``max_pending`` (oldest dropped first, delta keyframes only when nothing else
+    can go); the rest (``final``, raw dump chunks) are delivered in order, up to
+    ``max_backlog`` characters pending: past that the client is disconnected
+    (close code 1013) rather than buffered without bound, and can rejoin and
+    pull the dump over HTTP.
+    A dropped keyframe is remembered until the next frame of its session asks
+    the encoder for a fresh one (``take_lost_keyframe``). Each send's time in the queue goes to the
+    per-client ``neuro_sentry_broadcast_latency_seconds`` histogram.
+    """
+
+    websocket: WebSocket
+    follow: Optional[Set[str]] = None
+    policy: LivePolicy = field(default_factory=LivePolicy)
+    max_pending: int = LIVE_QUEUE_SIZE
+    max_backlog: int = LIVE_BACKLOG_CHARS
+    closed: bool = False
+    overflowed: bool = False
+    dropped: int = 0
+    sent: int = 0
+    client_id: str = field(default_factory=lambda: f"c{next(_client_ids)}")
+    # (droppable, text, queued_at, session id if the text is a delta keyframe)
+    _queue: Deque[Tuple[bool, str, float, Optional[str]]] = field(default_factory=deque)
+    _droppable: int = 0
+    _backlog: int = 0
+    _lost_keyframes: Set[str] = field(default_factory=set)
+    _ready: asyncio.Event = field(default_factory=asyncio.Event)
+    _writer: Optional[asyncio.Task] = None
+
+    def wants(self, session_id: Optional[str]) -> bool:
+        return self.follow is None or session_id is None or session_id in self.follow
+
+    @property
+    def pending(self) -> int:
+        return len(self._queue)
+
+    def enqueue(self, text: str, droppable: bool = True, keyframe_of: Optional[str] = None) -> None:
+        """Queue ``text``; ``keyframe_of`` marks a delta keyframe of that session, the last thing dropped."""
+        if self.closed:
+            return
+        if droppable:
+            if self._droppable >= self.max_pending:
+                self._drop_oldest()
+            self._droppable += 1
+        else:
+            if self._backlog + len(text) > self.max_backlog:
+                self._overflow()
+                return
+            self._backlog += len(text)
+        self._queue.append((droppable, text, time.perf_counter(), keyframe_of))
+        self._ready.set()
+
+    def _drop_oldest(self) -> None:
+        victim = None
+        for i, (droppable, _, _, keyframe_of) in enumerate(self._queue):
+            if droppable:
+                if keyframe_of is None:
+                    victim = i
+                    break
+                if victim is None:
+                    victim = i
+        if victim is None:
+            return
+        keyframe_of = self._queue[victim][3]
+        if keyframe_of is not None:
+            self._lost_keyframes.add(keyframe_of)
+        del self._queue[victim]
+        self._droppable -= 1
+        self.dropped += 1
+
+    def _overflow(self) -> None:
+        """Cut off a client too far behind on non-droppable messages; the writer closes the socket."""
+        self.closed = True
+        self.overflowed = True
+        self._queue.clear()
+        self._droppable = self._backlog = 0
+        self._ready.set()
+
+    def take_lost_keyframe(self, session_id: str) -> bool:
+        """Whether a keyframe of ``session_id`` was dropped since the last call."""
+        if session_id in self._lost_keyframes:
+            self._lost_keyframes.discard(session_id)
+            return True
+        return False
+
+    def start(self) -> None:
+        self._writer = asyncio.create_task(self._drain())
+
+    async def _drain(self) -> None:
+        latency = BROADCAST_LATENCY.labels(client=self.client_id)
+        try:
+            while True:
+                await self._ready.wait()
+                while self._queue:
+                    droppable, text, queued_at, _ = self._queue.popleft()
+                    if droppable:
+                        self._droppable -= 1
+                    else:
+                        self._backlog -= len(text)
+                    await self.websocket.send_text(text)
+                    self.sent += 1
+                    latency.observe(time.perf_counter() - queued_at)
+                if self.overflowed:
+                    await self.websocket.close(code=1013)
+                    return
+                self._ready.clear()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Socket went away; the /live_state handler cleans up.
+            self.closed = True
+
+    async def close(self) -> None:
+        self.closed = True
+        self._queue.clear()
+        BROADCAST_LATENCY.remove(client=self.client_id)
+        if self._writer is not None:
+            self._writer.cancel()
+            try:
+                await self._writer
+            except (asyncio.CancelledError, Exception):
+                pass
+
+
+__all__ = ["LIVE_BACKLOG_CHARS", "LIVE_QUEUE_SIZE", "LiveClient", "parse_follow"]
@@ -0,0 +1,198 @@
+"""Per-subscriber live-stream policy: rate caps, landmark subsets, int16 quantisation and deltas.
+
+A /live_state client picks its policy with query params::
+
+    max_hz=10          cap on live messages per second (0 = every frame)
+    mesh_hz=2          cap on messages that carry landmarks; others are vitals-only
+    landmarks=key      full | key | none | comma-separated MediaPipe indices
+    quantize=1         send landmarks as int16 with a per-keyframe scale/offset
+    delta=1            send int16 deltas against the last keyframe (implies quantize);
+                       each message names its keyframe by ``key_id``
+    keyframe_every=30  frames with landmarks between keyframes
+
+Defaults reproduce the original behaviour (every frame, full float mesh).
+Clients sharing a policy share one ``LiveEncoder`` per session.
+"""
+
+from __future__ import annotations
+
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from features import KEY_INDICES
+
+# int16 units a keyframe's bounding box maps onto; the rest of the range is headroom for movement
+KEY_SPAN = 30000
+INT16_MAX = 32767
+
+# Keyframe ids are unique per process, so a delta never matches a keyframe from an earlier encoder
+_key_ids = itertools.count(1)
+
+
+def _flag(value: Optional[str]) -> bool:
+    return (value or "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _float(value: Optional[str], default: float) -> float:
+    try:
+        return max(0.0, float(value)) if value is not None else default
+    except ValueError:
+        return default
+
+
+@dataclass(frozen=True)
+class LivePolicy:
+    max_hz: float = 0.0
+    mesh_hz: float = 0.0
+    # None = full mesh, () = vitals only, otherwise the indices to send
+    indices: Optional[Tuple[int, ...]] = None
+    quantize: bool = False
+    delta: bool = False
+    keyframe_every: int = 30
+
+    @classmethod
+    def from_params(cls, params: Mapping[str, str]) -> "LivePolicy":
+        landmarks = (params.get("landmarks") or "full").strip().lower()
+        if landmarks == "full":
+            indices: Optional[Tuple[int, ...]] = None
+        elif landmarks == "none":
+            indices = ()
+        elif landmarks == "key":
+            indices = tuple(sorted(KEY_INDICES))
+        else:
+            indices = tuple(sorted({int(i) for i in landmarks.split(",") if i.strip().isdigit()}))
+        delta = _flag(params.get("delta"))
+        try:
+            keyframe_every = max(1, int(params.get("keyframe_every") or 30))
+        except ValueError:
+            keyframe_every = 30
+        return cls(
+            max_hz=_float(params.get("max_hz"), 0.0),
+            mesh_hz=_float(params.get("mesh_hz"), 0.0),
+            indices=indices,
+            quantize=delta or _flag(params.get("quantize")),
+            delta=delta,
+            keyframe_every=keyframe_every,
+        )
+
+
+class LiveEncoder:
+    """Turns ingested frames into ``live`` payloads for one (policy, session)."""
+
+    def __init__(self, policy: LivePolicy) -> None:
+        self.policy = policy
+        self._last_sent = float("-inf")
+        self._last_mesh = float("-inf")
+        self._since_keyframe = 0
+        self._force_keyframe = True
+        self._key_q: Optional[np.ndarray] = None
+        self._key_offset: Optional[np.ndarray] = None
+        self._key_scale = 1.0
+        self._key_id = 0
+
+    def request_keyframe(self) -> None:
+        """Next landmark message is a keyframe (e.g. a client just joined)."""
+        self._force_keyframe = True
+
+    def encode(
+        self,
+        summary: Dict[str, Any],
+        points: np.ndarray,
+        points_list: Optional[list] = None,
+        now: Optional[float] = None,
+        point_indices: Optional[Sequence[int]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """Build the ``live`` payload, or ``None`` if the rate cap drops this frame.
+
+        ``summary`` holds the vitals fields; ``points`` is the ``(n, 2|3)`` frame
+        and ``points_list`` an optional ready-made list form of it.
+        ``point_indices`` names each row when the frame is a landmark subset.
+        """
+        policy = self.policy
+        now = time.monotonic() if now is None else now
+        if policy.max_hz and now - self._last_sent < 1.0 / policy.max_hz:
+            return None
+        self._last_sent = now
+
+        data = dict(summary)
+        send_mesh = policy.indices != () and points.shape[0] > 0
+        if send_mesh and policy.mesh_hz and now - self._last_mesh < 1.0 / policy.mesh_hz:
+            send_mesh = False
+        if send_mesh:
+            self._last_mesh = now
+            self._add_points(data, points, points_list, point_indices)
+        return {"type": "live", "data": data}
+
+    def _add_points(
+        self,
+        data: Dict[str, Any],
+        points: np.ndarray,
+        points_list: Optional[list],
+        point_indices: Optional[Sequence[int]] = None,
+    ) -> None:
+        policy = self.policy
+        if point_indices is not None:
+            rows = {int(index): row for row, index in enumerate(point_indices)}
+            wanted = list(rows) if policy.indices is None else [i for i in policy.indices if i in rows]
+            if policy.indices is not None:
+                points = points[[rows[i] for i in wanted]]
+                points_list = None
+            points = points[:, :2]
+            data["face_point_indices"] = wanted
+        elif policy.indices is not None:
+            indices = [i for i in policy.indices if i < points.shape[0]]
+            points = points[indices, :2]
+            points_list = None
+            data["face_point_indices"] = indices
+        else:
+            points = points[:, :2]
+
+        if not policy.quantize:
+            data["face_points"] = points_list if points_list is not None else points.tolist()
+            return
+        data["face_points_q"] = self._quantize(np.asarray(points, dtype=np.float64))
+
+    def _quantize(self, points: np.ndarray) -> Dict[str, Any]:
+        """int16 coordinates: ``point = (key + delta) * scale + offset`` per axis."""
+        policy = self.policy
+        points = np.nan_to_num(points)
+        keyframe = (
+            not policy.delta
+            or self._force_keyframe
+            or self._key_q is None
+            or self._key_q.shape != points.shape
+            or self._since_keyframe >= policy.keyframe_every
+        )
+        if not keyframe:
+            q = np.rint((points - self._key_offset) / self._key_scale)
+            values = q - self._key_q
+            # Face moved outside the keyframe's range: start a new keyframe.
+            keyframe = bool(np.abs(q).max() > INT16_MAX or np.abs(values).max() > INT16_MAX)
+        if keyframe:
+            lo, hi = points.min(axis=0), points.max(axis=0)
+            span = float((hi - lo).max())
+            self._key_scale = span / KEY_SPAN if span > 0 else 1.0
+            # Centre the keyframe's box on zero so movement either way fits.
+            self._key_offset = (lo + hi) / 2
+            self._key_q = np.rint((points - self._key_offset) / self._key_scale)
+            self._key_id = next(_key_ids)
+            self._since_keyframe = 0
+            self._force_keyframe = False
+            values = self._key_q
+        else:
+            self._since_keyframe += 1
+        return {
+            "key": keyframe,
+            "key_id": self._key_id,
+            "scale": self._key_scale,
+            "offset": self._key_offset.tolist(),
+            "dims": int(points.shape[1]),
+            "data": values.astype(np.int16).ravel().tolist(),
+        }
+
+
+__all__ = ["LiveEncoder", "LivePolicy"]
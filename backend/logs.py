@@ -0,0 +1,77 @@
+"""Structured, sampled event logging for the backend.
+
+Events keep the ``[tag] message`` shape of the old prints but carry their
+fields as key/values, and per-message events (every received frame, every
+broadcast) are sampled so logging is not a cost at 30 fps per device::
+
+    event("presage_stream", "session_start", session="abc", profile="clinical")
+    sample("broadcast", "sent", type="live", clients=3)   # 1 in NEURO_SENTRY_LOG_SAMPLE
+
+    NEURO_SENTRY_LOG_FORMAT=text     "[tag] event key=value ..." (default) or "json" (one object per line)
+    NEURO_SENTRY_LOG_SAMPLE=1000     log every Nth occurrence of each sampled event (0 = never, 1 = all)
+    NEURO_SENTRY_LOG_LEVEL=INFO
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+from typing import Any, DefaultDict, Tuple
+
+LOG_FORMAT = os.getenv("NEURO_SENTRY_LOG_FORMAT", "text").strip().lower()
+LOG_SAMPLE = int(os.getenv("NEURO_SENTRY_LOG_SAMPLE", "1000"))
+LOG_LEVEL = os.getenv("NEURO_SENTRY_LOG_LEVEL", "INFO").strip().upper()
+
+logger = logging.getLogger("neuro_sentry")
+if not logger.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.propagate = False
+logger.setLevel(LOG_LEVEL)
+
+_counts: DefaultDict[Tuple[str, str], int] = defaultdict(int)
+
+
+def _text_value(value: Any) -> str:
+    text = str(value)
+    return json.dumps(text) if not text or any(c in text for c in ' ="') else text
+
+
+def format_event(tag: str, name: str, fields: dict, level: int = logging.INFO) -> str:
+    if LOG_FORMAT == "json":
+        record = {"ts": round(time.time(), 3), "level": logging.getLevelName(level).lower(), "tag": tag, "event": name}
+        record.update(fields)
+        return json.dumps(record, default=str, separators=(",", ":"))
+    pairs = " ".join(f"{key}={_text_value(value)}" for key, value in fields.items())
+    return f"[{tag}] {name} {pairs}" if pairs else f"[{tag}] {name}"
+
+
+def event(tag: str, name: str, level: int = logging.INFO, **fields: Any) -> None:
+    """Log one event (connections, session lifecycle, errors)."""
+    if logger.isEnabledFor(level):
+        logger.log(level, format_event(tag, name, fields, level))
+
+
+def sample(tag: str, name: str, level: int = logging.DEBUG, **fields: Any) -> None:
+    """Log every ``LOG_SAMPLE``th occurrence of a per-message event, with its running count.
+
+    Sampled events log at INFO; ``level`` (DEBUG by default) logs every occurrence
+    when the logger is set that low.
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, format_event(tag, name, fields, level))
+        return
+    if LOG_SAMPLE <= 0:
+        return
+    key = (tag, name)
+    _counts[key] += 1
+    if _counts[key] % LOG_SAMPLE == 0 or _counts[key] == 1:
+        event(tag, name, seen=_counts[key], **fields)
+
+
+__all__ = ["LOG_FORMAT", "LOG_SAMPLE", "event", "format_event", "logger", "sample"]
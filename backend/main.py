@@ -4,23 +4,58 @@ from __future__ import annotations
 
 import asyncio
 import json
+import logging
+import os
 import sys
+import time
+import uuid
+import zlib
+from contextlib import aclosing, asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from statistics import mean
-from typing import Dict, List, Any
+from typing import AsyncIterator, Dict, List, Any, Optional, Sequence, Tuple
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+import numpy as np
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 
 BACKEND_DIR = Path(__file__).resolve().parent
 if str(BACKEND_DIR) not in sys.path:
     sys.path.append(str(BACKEND_DIR))
 
-from gemini_dummy import call_gemini_report
-from schemas import PresagePacket
-
-app = FastAPI(title="Neuro-Sentry Backend", version="0.7.0")
+from analysis_pool import analysis_pool, shutdown_analysis_pool
+from archive import default_archive
+from bus import BusEvent, create_bus
+from gemini_dummy import call_gemini_report, report_cache, shutdown_triage_runner, triage_runner
+import ingest
+from landmark_profile import LandmarkProfile
+from live_clients import LiveClient, parse_follow
+from live_policy import LiveEncoder, LivePolicy
+import logs
+import metrics
+import profiling
+from session_store import SessionStore
+from sessions import MAX_SESSIONS, Session, SessionRegistry
+from streaming_stats import SessionAccumulator
+from timings import LatencyWindow
+from triage_engine import TRIAGE_MODE, accept_escalation, local_triage, needs_escalation
+import wire
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Create the model client once so every session_end reuses its connection pool.
+    triage_runner()
+    # Fork the analysis workers before the first session_end needs them
+    analysis_pool().start()
+    await bus.start(_deliver_event)
+    yield
+    await bus.close()
+    shutdown_analysis_pool()
+    shutdown_triage_runner()
+
+
+app = FastAPI(title="Neuro-Sentry Backend", version="0.7.0", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -29,160 +64,808 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Frames per raw_dump_chunk message / per NDJSON write.
+RAW_DUMP_CHUNK = int(os.getenv("NEURO_SENTRY_DUMP_CHUNK", "256"))
+
 # --- Shared State ---
-state_lock = asyncio.Lock()
-live_clients: List[WebSocket] = []
-session_buffer: List[PresagePacket] = []
-session_active: bool = False
-last_raw_dump: List[Dict[str, Any]] | None = None
-last_final_report: Dict[str, Any] | None = None
+clients_lock = asyncio.Lock()
+live_clients: List[LiveClient] = []
+# Per (session, policy) live-stream encoder state shared by the clients using that policy
+live_encoders: Dict[Tuple[str, LivePolicy], LiveEncoder] = {}
+sessions = SessionRegistry()
+archive = default_archive()
+# Live fan-out goes through the bus so dashboards on other workers see this worker's sessions
+bus = create_bus()
+# Latest final report per session seen on the bus, replayed to late joiners of sessions owned by other workers
+bus_finals: Dict[str, Dict[str, Any]] = {}
+# session_end -> first final report, and -> escalated Gemini report
+time_to_final = LatencyWindow()
+time_to_gemini = LatencyWindow()
+# Fire-and-forget work (archiving, Gemini escalations); referenced so it is not garbage-collected
+background_tasks: set[asyncio.Task] = set()
+
+
+def _collect_metrics():
+    """Scrape-time gauges for state that already lives on sessions, clients, the runner and the cache."""
+    buffers = []
+    for session in sessions.all():
+        for name, store in (("analysis", session.store), ("mesh", session.mesh_store), ("last", session.last_store)):
+            if store is not None:
+                buffers.append(({"session_id": session.session_id, "store": name}, store.nbytes))
+    yield ("neuro_sentry_session_buffer_bytes", "gauge", "Landmark/vitals buffer memory per session store.", buffers)
+    yield ("neuro_sentry_live_clients", "gauge", "Connected /live_state clients.", [({}, len(live_clients))])
+    yield ("neuro_sentry_live_queue_depth", "gauge", "Messages waiting in each /live_state client queue.",
+           [({"client": c.client_id}, c.pending) for c in live_clients])
+    yield ("neuro_sentry_live_dropped_total", "counter", "Droppable messages dropped for slow /live_state clients.",
+           [({"client": c.client_id}, c.dropped) for c in live_clients])
+
+    runner = triage_runner()
+    yield ("neuro_sentry_model_queue_depth", "gauge", "Model calls waiting for a worker.", [({}, runner.queued)])
+    yield ("neuro_sentry_model_in_flight", "gauge", "Model calls running.", [({}, runner.in_flight)])
+    yield ("neuro_sentry_model_calls_total", "counter", "Finished model calls by outcome.",
+           [({"outcome": "ok"}, runner.completed), ({"outcome": "error"}, runner.failed), ({"outcome": "timeout"}, runner.timeouts)])
+
+    cache = report_cache.stats()
+    yield ("neuro_sentry_report_cache_lookups_total", "counter", "Report cache lookups by result.",
+           [({"result": "hit"}, cache["hits"]), ({"result": "miss"}, cache["misses"])])
+    yield ("neuro_sentry_report_cache_entries", "gauge", "Reports held in the cache.", [({}, cache["entries"])])
+
+    pool = analysis_pool().stats()
+    yield ("neuro_sentry_analysis_workers", "gauge", "Analysis worker processes (0 = in-process).", [({}, pool["workers"])])
+    yield ("neuro_sentry_analysis_jobs_total", "counter", "Jobs run in the analysis pool.", [({}, pool["jobs"])])
+    yield ("neuro_sentry_analysis_shared_bytes_total", "counter", "Session columns copied to shared memory for workers.",
+           [({}, pool["shared_bytes"])])
+
+    bus_stats = bus.stats()
+    yield ("neuro_sentry_bus_events_total", "counter", "Session-bus events published here or received from other workers.",
+           [({"bus": bus.name, "direction": "published"}, bus_stats["published"]),
+            ({"bus": bus.name, "direction": "received"}, bus_stats["received"])])
+    if "dropped" in bus_stats:
+        yield ("neuro_sentry_bus_dropped_total", "counter", "Droppable events not sent to a backed-up broker.",
+               [({"bus": bus.name}, bus_stats["dropped"])])
+
+
+metrics.REGISTRY.add_collector(_collect_metrics)
 
 
 # --- Helpers ---
 
-def _compute_stats(packets: List[PresagePacket]) -> Dict[str, Any]:
-    """Basic stats: mean HR/BR/quality + simple facial asymmetry if points exist."""
-    if not packets:
-        return {"count": 0, "heart_rate_mean": None, "breathing_rate_mean": None, "quality_mean": None, "duration_ms": 0}
-
-    hr_values = [p.heart_rate for p in packets if p.heart_rate is not None]
-    br_values = [p.breathing_rate for p in packets if p.breathing_rate is not None]
-    quality_values = [p.quality for p in packets if p.quality is not None]
+# Messages a slow client may miss (newer ones supersede them); everything else is guaranteed.
+DROPPABLE_TYPES = {"live", "provisional"}
+
+
+async def _send_to_clients(
+    payload: Dict[str, Any],
+    targets: List[LiveClient],
+    text: Optional[str] = None,
+    keyframe_of: Optional[str] = None,
+) -> None:
+    """Serialise once (unless ``text`` is already rendered) and queue for each client; never waits on a socket."""
+    if text is None:
+        text = ingest.dumps(payload)
+    droppable = payload.get("type") in DROPPABLE_TYPES
+    metrics.BROADCAST_MESSAGES.labels(type=payload.get("type")).inc(len(targets))
+    stale: List[LiveClient] = []
+    for client in targets:
+        if client.closed:
+            stale.append(client)
+        else:
+            client.enqueue(text, droppable, keyframe_of)
 
-    NOSE_TIP, MOUTH_LEFT, MOUTH_RIGHT, BROW_LEFT, BROW_RIGHT = 1, 61, 291, 105, 334
-    mouth_asym, brow_asym = [], []
-    for p in packets:
-        pts = p.face_points
-        if len(pts) > max(BROW_RIGHT, MOUTH_RIGHT):
-            try:
-                nose_y = pts[NOSE_TIP][1]
-                mouth_asym.append(abs(abs(pts[MOUTH_LEFT][1] - nose_y) - abs(pts[MOUTH_RIGHT][1] - nose_y)) * 100)
-                brow_asym.append(abs(abs(pts[BROW_LEFT][1] - nose_y) - abs(pts[BROW_RIGHT][1] - nose_y)) * 100)
-            except Exception:
-                continue
+    if stale:
+        async with clients_lock:
+            for client in stale:
+                if client in live_clients:
+                    live_clients.remove(client)
 
-    def safe_mean(vals):
-        return mean(vals) if vals else None
 
+async def broadcast_to_live_clients(payload: Dict[str, Any], session_id: Optional[str] = None) -> None:
+    """Send JSON payload to the live_state clients following ``session_id`` (on every worker)."""
+    if session_id is not None:
+        payload = {**payload, "session_id": session_id}
+    droppable = payload.get("type") in DROPPABLE_TYPES
+    await bus.publish(BusEvent("message", session_id, payload, droppable=droppable))
+
+
+async def broadcast_text(text: str, msg_type: str, session_id: str) -> None:
+    """Like ``broadcast_to_live_clients`` for a message already rendered to JSON (with its session_id)."""
+    await bus.publish(BusEvent("message", session_id, {"type": msg_type}, text=text, droppable=msg_type in DROPPABLE_TYPES))
+
+
+async def broadcast_live_frame(
+    session_id: str,
+    summary: Dict[str, Any],
+    points: np.ndarray,
+    points_list: Optional[list] = None,
+    point_indices: Optional[Sequence[int]] = None,
+) -> None:
+    """Fan a vitals frame out to followers on every worker.
+
+    ``point_indices`` names the MediaPipe index of each row of a landmark-subset frame.
+    """
+    event = BusEvent("frame", session_id, summary, points, points_list, point_indices, droppable=True)
+    await bus.publish(event)
+
+
+async def _reset_live_stream(session_id: str) -> None:
+    """A session restarted or ended: every worker drops its live encoder state for it."""
+    await bus.publish(BusEvent("reset", session_id))
+
+
+async def _deliver_event(event: BusEvent) -> None:
+    """Bus callback: hand an event to this worker's /live_state clients."""
+    if event.kind == "frame":
+        await _deliver_frame(event.session_id, event.payload, event.points, event.points_list, event.point_indices)
+    elif event.kind == "message":
+        payload = event.payload
+        if payload.get("type") == "final" and event.session_id is not None:
+            bus_finals.pop(event.session_id, None)
+            bus_finals[event.session_id] = payload
+            while len(bus_finals) > MAX_SESSIONS:
+                del bus_finals[next(iter(bus_finals))]
+        targets = [client for client in list(live_clients) if client.wants(event.session_id)]
+        logs.sample("broadcast", "sent", type=payload.get("type"), session=event.session_id, clients=len(targets))
+        await _send_to_clients(payload, targets, event.text)
+    elif event.kind == "reset":
+        _drop_live_encoders(event.session_id)
+
+
+async def _deliver_frame(
+    session_id: str,
+    summary: Dict[str, Any],
+    points: np.ndarray,
+    points_list: Optional[list] = None,
+    point_indices: Optional[Sequence[int]] = None,
+) -> None:
+    """Encode a frame once per live-stream policy for the local followers.
+
+    Delta keyframes are queued as the last thing a slow client drops; if one
+    is dropped anyway, the encoder sends a new keyframe with this frame.
+    """
+    groups: Dict[LivePolicy, List[LiveClient]] = {}
+    for client in list(live_clients):
+        if client.wants(session_id):
+            groups.setdefault(client.policy, []).append(client)
+
+    for policy, targets in groups.items():
+        encoder = live_encoders.get((session_id, policy))
+        if encoder is None:
+            encoder = live_encoders[(session_id, policy)] = LiveEncoder(policy)
+        if any([client.take_lost_keyframe(session_id) for client in targets]):
+            encoder.request_keyframe()
+        payload = encoder.encode(summary, points, points_list, point_indices=point_indices)
+        if payload is not None:
+            payload["session_id"] = session_id
+            quantized = payload["data"].get("face_points_q")
+            keyframe = policy.delta and quantized is not None and quantized["key"]
+            await _send_to_clients(payload, targets, keyframe_of=session_id if keyframe else None)
+
+
+def _drop_live_encoders(session_id: str) -> None:
+    for key in [key for key in live_encoders if key[0] == session_id]:
+        del live_encoders[key]
+
+
+def _spawn(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+
+async def _archive_session(
+    session_id: str,
+    store: SessionStore,
+    report: Dict[str, Any],
+    stats: Dict[str, Any],
+    dsp: Optional[asyncio.Task] = None,
+    mesh: Optional[SessionStore] = None,
+) -> None:
+    """Write a finished session (and its full meshes) to disk off the event loop, with ``dsp``'s vitals DSP once done."""
+    try:
+        if dsp is not None:
+            stats = await _with_dsp(stats, dsp)
+        with metrics.STAGE_SECONDS.time(stage="archive"):
+            meta = await asyncio.to_thread(archive.write, session_id, store, report, stats, mesh)
+        logs.event("archive", "written", session=session_id, archive_id=meta["archive_id"], frames=meta["frames"])
+    except Exception as exc:
+        logs.event("archive", "failed", level=logging.ERROR, session=session_id, error=str(exc))
+
+
+def _raw_dump_url(session_id: str) -> str:
+    return f"/sessions/{session_id}/raw_dump"
+
+
+def _mesh_dump_url(session_id: str) -> str:
+    return f"/sessions/{session_id}/mesh_dump"
+
+
+async def stream_raw_dump(session_id: str, store: SessionStore) -> None:
+    """Broadcast a finished session as raw_dump_begin / raw_dump_chunk* / raw_dump_end.
+
+    Chunks are rendered one at a time with a yield to the event loop in between,
+    so a long session never becomes one multi-MB allocation or frame.
+    """
+    total = len(store)
+    chunks = (total + RAW_DUMP_CHUNK - 1) // RAW_DUMP_CHUNK
+    with profiling.span("raw_dump"):
+        await broadcast_to_live_clients(
+            {"type": "raw_dump_begin", "total": total, "chunks": chunks, "chunk_size": RAW_DUMP_CHUNK, "url": _raw_dump_url(session_id), "mesh_url": _mesh_dump_url(session_id)},
+            session_id,
+        )
+        # Rendered in the analysis workers when they are enabled, else here between loop yields
+        async with aclosing(analysis_pool().dump_chunks(store, session_id, RAW_DUMP_CHUNK)) as chunks:
+            async for text in chunks:
+                await broadcast_text(text, "raw_dump_chunk", session_id)
+        await broadcast_to_live_clients({"type": "raw_dump_end", "total": total}, session_id)
+
+
+async def _replay_session(client: LiveClient, session: Session) -> None:
+    """Queue a late subscriber a pointer to the last raw dump plus the final report of ``session``.
+
+    The dump itself is pulled lazily over HTTP instead of being pushed on connect.
+    """
+    async with session.lock:
+        store = session.last_store
+        final_report = session.last_final_report
+        engine = session.last_report_engine
+    if store is not None:
+        client.enqueue(
+            ingest.dumps(
+                {
+                    "type": "raw_dump_available",
+                    "total": len(store),
+                    "url": _raw_dump_url(session.session_id),
+                    "mesh_url": _mesh_dump_url(session.session_id),
+                    "session_id": session.session_id,
+                }
+            ),
+            False,
+        )
+    if final_report is not None:
+        message = {"type": "final", "gemini_report": final_report, "engine": engine, "session_id": session.session_id}
+        client.enqueue(ingest.dumps(message), False)
+
+
+async def _replay_followed(client: LiveClient) -> None:
+    """Replay every followed session: local ones in full, other workers' ones from their last final."""
+    local = set()
+    for session in sessions.all():
+        local.add(session.session_id)
+        if client.wants(session.session_id):
+            await _replay_session(client, session)
+    for session_id, final in list(bus_finals.items()):
+        if session_id not in local and client.wants(session_id):
+            client.enqueue(ingest.dumps(final), False)
+
+
+async def _finish_session(
+    session: Session,
+    store: SessionStore,
+    accumulator: SessionAccumulator,
+    ended_at: float,
+    mesh: Optional[SessionStore] = None,
+) -> None:
+    """Triage a finished scan, publish its raw dump and ``final`` report, archive it.
+
+    Pipelined: the prompt comes from the streaming features (no packet dump),
+    the Gemini call starts first, and the raw dump is rendered and broadcast
+    while it runs. Outside ``llm`` mode the local CPSS engine answers
+    immediately; ambiguous scans get a second ``final`` (``engine: "gemini"``)
+    when Gemini returns, unless ``accept_escalation`` keeps the local report.
+    Gemini is not asked about a scan without full-mesh frames, and a Gemini
+    failure fallback never becomes the final report.
+    ``ended_at`` is the ``perf_counter`` of ``session_end``; ``mesh`` holds the
+    scan's rate-limited full meshes under a landmark profile and is archived with it.
+    """
+    # Accumulators were updated per packet, so these are O(1). The whole-scan vitals DSP
+    # runs in the analysis pool meanwhile; only the Gemini prompt and the archive wait for it.
+    with metrics.STAGE_SECONDS.time(stage="compute_stats"), profiling.span("stats"):
+        stats = accumulator.stats()
+    dsp = _spawn(_vitals_dsp(session.session_id, store))
+    with metrics.STAGE_SECONDS.time(stage="bio_features"), profiling.span("features"):
+        features = accumulator.bio_features()
+    with metrics.STAGE_SECONDS.time(stage="local_triage"), profiling.span("triage"):
+        local_report = local_triage(stats, features)
+
+    # A Gemini call started on sustained provisional HIGH stands if the whole scan agrees
+    async with session.lock:
+        early, session.early_report = session.early_report, None
+    if early is not None and local_report["risk_level"] != "HIGH":
+        early.cancel()
+        early = None
+
+    llm = TRIAGE_MODE == "llm" and int(features.get("packets_analyzed") or 0) > 0
+    escalate = TRIAGE_MODE == "local-first" and (early is not None or needs_escalation(features))
+    gemini: Optional[asyncio.Task] = None
+    if llm or escalate:
+        gemini = early or _spawn(_gemini_report(stats, store, features, dsp))
+
+    async with session.lock:
+        session.last_store = store
+    dump = _spawn(stream_raw_dump(session.session_id, store))
+
+    if llm:
+        report, engine = await gemini, "gemini"
+        if early is not None and not accept_escalation(local_report, report, confirmation=True):
+            # The early call saw part of the scan and did not confirm it: ask again about the whole scan
+            report = await _spawn(_gemini_report(stats, store, features, dsp))
+        if report.get("fallback"):
+            report, engine = local_report, "local"
+    else:
+        report, engine = local_report, "local"
+    async with session.lock:
+        session.last_final_report = report
+        session.last_report_engine = engine
+    elapsed_ms = (time.perf_counter() - ended_at) * 1000
+    time_to_final.record(elapsed_ms)
+    session.last_time_to_report_ms = round(elapsed_ms, 2)
+    final = {"type": "final", "gemini_report": report, "engine": engine, "escalated": escalate, "time_to_report_ms": round(elapsed_ms, 2)}
+    with profiling.span("broadcast"):
+        await broadcast_to_live_clients(final, session.session_id)
+    logs.event("presage_stream", "final", session=session.session_id, engine=engine, risk=report.get("risk_level"), ms=round(elapsed_ms, 1))
+
+    if escalate:
+        _spawn(_escalate(session, store, stats, local_report, gemini, ended_at, dsp, confirmation=early is not None, mesh=mesh))
+    elif archive is not None and len(store):
+        _spawn(_archive_session(session.session_id, store, report, stats, dsp, mesh))
+    await dump
+
+
+async def _vitals_dsp(session_id: str, store: SessionStore) -> Optional[Dict[str, Any]]:
+    """``vitals_features`` of a finished scan from the analysis pool; ``None`` if it fails."""
+    try:
+        with metrics.STAGE_SECONDS.time(stage="vitals_dsp"), profiling.span("vitals_dsp"):
+            return await analysis_pool().vitals(store)
+    except Exception as exc:
+        logs.event("analysis_pool", "vitals_failed", level=logging.ERROR, session=session_id, error=str(exc))
+        return None
+
+
+async def _with_dsp(stats: Dict[str, Any], dsp: asyncio.Task) -> Dict[str, Any]:
+    vitals = await dsp
+    if vitals is not None:
+        stats["vitals_dsp"] = vitals
+    return stats
+
+
+async def _gemini_report(stats: Dict[str, Any], store: SessionStore, features: Dict[str, Any], dsp: asyncio.Task) -> Dict[str, Any]:
+    """Gemini's report once the vitals DSP has joined ``stats`` (the prompt and cache key use it)."""
+    return await call_gemini_report(await _with_dsp(stats, dsp), store, features=features)
+
+
+async def _escalate(
+    session: Session,
+    store: SessionStore,
+    stats: Dict[str, Any],
+    local_report: Dict[str, Any],
+    gemini: asyncio.Task,
+    ended_at: float,
+    dsp: Optional[asyncio.Task] = None,
+    confirmation: bool = False,
+    mesh: Optional[SessionStore] = None,
+) -> None:
+    """Publish Gemini's second opinion on an ambiguous (or early-flagged) local result.
+
+    A failure fallback, or a downgrade of a local HIGH, is not published; the
+    local report stands and is what gets archived. An early-flagged scan's
+    report (``confirmation``) was made on partial stats and is published only
+    if it is at least as severe as the local one.
+    """
+    report = await gemini
+    elapsed_ms = (time.perf_counter() - ended_at) * 1000
+    time_to_gemini.record(elapsed_ms)
+    if not accept_escalation(local_report, report, confirmation):
+        logs.event(
+            "presage_stream", "escalation_rejected", level=logging.WARNING, session=session.session_id,
+            local=local_report.get("risk_level"), gemini=report.get("risk_level"), fallback=bool(report.get("fallback")),
+        )
+        if archive is not None and len(store):
+            await _archive_session(session.session_id, store, local_report, stats, dsp, mesh)
+        return
+    async with session.lock:
+        current = session.last_store is store  # a new scan has not replaced this one
+        if current:
+            session.last_final_report = report
+            session.last_report_engine = "gemini"
+    if current:
+        final = {"type": "final", "gemini_report": report, "engine": "gemini", "time_to_report_ms": round(elapsed_ms, 2)}
+        await broadcast_to_live_clients(final, session.session_id)
+        logs.event("presage_stream", "escalated_final", session=session.session_id, risk=report.get("risk_level"), ms=round(elapsed_ms, 1))
+    if archive is not None and len(store):
+        await _archive_session(session.session_id, store, report, stats, dsp, mesh)
+
+
+# --- HTTP Endpoints ---
+
+@app.get("/sessions")
+async def list_sessions() -> Dict[str, Any]:
+    """Known sessions, so dashboards can choose which ones to follow."""
+    return {"sessions": [s.summary() for s in sessions.all()]}
+
+
+@app.get("/report_cache")
+async def get_report_cache() -> Dict[str, Any]:
+    """Hit/miss counters of the triage report cache."""
+    return report_cache.stats()
+
+
+@app.get("/triage")
+async def get_triage_stats() -> Dict[str, Any]:
+    """Model backend queue depth, in-flight calls, timeouts and time-to-final-report."""
     return {
-        "count": len(packets),
-        "heart_rate_mean": safe_mean(hr_values),
-        "breathing_rate_mean": safe_mean(br_values),
-        "quality_mean": safe_mean(quality_values),
-        "mouth_asymmetry_mean": safe_mean(mouth_asym),
-        "brow_asymmetry_mean": safe_mean(brow_asym),
-        "duration_ms": (packets[-1].timestamp - packets[0].timestamp).total_seconds() * 1000 if packets else 0,
+        **triage_runner().stats(),
+        "time_to_final_report": time_to_final.summary(),
+        "time_to_gemini_report": time_to_gemini.summary(),
     }
 
 
-async def broadcast_to_live_clients(payload: Dict[str, Any]) -> None:
-    """Send JSON payload to all connected live_state clients."""
-    stale: List[WebSocket] = []
-    client_count = len(live_clients)
-    print(f"[broadcast] type={payload.get('type')} -> {client_count} clients")
-    for client in list(live_clients):
-        try:
-            await client.send_json(payload)
-        except (WebSocketDisconnect, RuntimeError):
-            stale.append(client)
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """Prometheus text exposition: ingest, validation, lock wait, broadcast, stage and model timings."""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+# --- Admin: runtime profiling (see profiling.py) ---
+
+ADMIN_TOKEN = os.getenv("NEURO_SENTRY_ADMIN_TOKEN") or None
+# Peers allowed without a token. Behind a reverse proxy every request comes from the
+# proxy (usually 127.0.0.1), so set NEURO_SENTRY_ADMIN_TOKEN there.
+ADMIN_HOSTS = {h.strip() for h in os.getenv("NEURO_SENTRY_ADMIN_HOSTS", "127.0.0.1,::1,localhost").split(",") if h.strip()}
+
+
+def _require_admin(request: Request) -> None:
+    """``X-Admin-Token`` must match ``NEURO_SENTRY_ADMIN_TOKEN``; without a token only ``ADMIN_HOSTS`` peers are allowed."""
+    if ADMIN_TOKEN is not None:
+        if request.headers.get("x-admin-token") != ADMIN_TOKEN:
+            raise HTTPException(status_code=403, detail="admin token required")
+    elif request.client is None or request.client.host not in ADMIN_HOSTS:
+        raise HTTPException(status_code=403, detail="admin endpoints are loopback-only without NEURO_SENTRY_ADMIN_TOKEN")
 
-    if stale:
-        async with state_lock:
-            for client in stale:
-                if client in live_clients:
-                    live_clients.remove(client)
+
+@app.get("/admin/profile")
+async def get_profile(request: Request) -> Dict[str, Any]:
+    """State of the current/last profiling run: samples, hottest frames, per-stage spans."""
+    _require_admin(request)
+    return profiling.profiler.status()
+
+
+@app.post("/admin/profile/start")
+async def start_profile(
+    request: Request,
+    mode: str = "sample",
+    seconds: Optional[float] = None,
+    sessions: Optional[int] = None,
+    interval_ms: float = profiling.DEFAULT_INTERVAL * 1000,
+) -> Dict[str, Any]:
+    """Profile the event loop until ``seconds`` pass or ``sessions`` scans finish (or ``/stop``)."""
+    _require_admin(request)
+    if not seconds and not sessions:
+        raise HTTPException(status_code=400, detail="give seconds and/or sessions")
+    try:
+        status = profiling.profiler.start(mode, seconds=seconds, sessions=sessions, interval=interval_ms / 1000)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    logs.event("admin", "profile_start", mode=mode, seconds=seconds, sessions=sessions)
+    return status
+
+
+@app.post("/admin/profile/stop")
+async def stop_profile(request: Request) -> Dict[str, Any]:
+    _require_admin(request)
+    logs.event("admin", "profile_stop")
+    return profiling.profiler.stop()
+
+
+@app.get("/admin/profile/download")
+async def download_profile(request: Request, kind: str = "stacks") -> Response:
+    """``stacks`` (sampled, folded), ``spans`` (stage spans, folded, microseconds) or ``pstats`` (cProfile)."""
+    _require_admin(request)
+    profiler = profiling.profiler
+    stamp = datetime.fromtimestamp(profiler.started_at or time.time()).strftime("%Y%m%d-%H%M%S")
+    if kind == "pstats":
+        data = profiler.pstats_bytes()
+        if data is None:
+            raise HTTPException(status_code=404, detail="no cProfile run to download")
+        filename, media_type = f"neuro-sentry-{stamp}.pstats", "application/octet-stream"
+    elif kind in ("stacks", "spans"):
+        text = profiler.stacks_folded() if kind == "stacks" else profiler.spans_folded()
+        if not text:
+            raise HTTPException(status_code=404, detail=f"no {kind} recorded")
+        data = text.encode()
+        filename, media_type = f"neuro-sentry-{stamp}-{kind}.folded", "text/plain; charset=utf-8"
+    else:
+        raise HTTPException(status_code=400, detail="kind must be stacks, spans or pstats")
+    return Response(data, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+def _ndjson_response(store: SessionStore, offset: int, limit: Optional[int], gzip: bool) -> StreamingResponse:
+    """Stream ``store`` as NDJSON (one packet per line), optionally gzip-compressed."""
+    stop = None if limit is None else offset + max(0, limit)
+
+    async def ndjson() -> AsyncIterator[bytes]:
+        compressor = zlib.compressobj(wbits=31) if gzip else None  # wbits=31 -> gzip container
+        for chunk in store.iter_dump_chunks(RAW_DUMP_CHUNK, max(0, offset), stop):
+            body = "".join(ingest.dumps(packet) + "\n" for packet in chunk).encode()
+            yield compressor.compress(body) if compressor else body
+            await asyncio.sleep(0)
+        if compressor:
+            yield compressor.flush()
+
+    media_type = "application/gzip" if gzip else "application/x-ndjson"
+    headers = {"X-Total-Frames": str(len(store))}
+    return StreamingResponse(ndjson(), media_type=media_type, headers=headers)
+
+
+@app.get("/sessions/{session_id}/raw_dump")
+async def get_raw_dump(session_id: str, offset: int = 0, limit: Optional[int] = None, gzip: bool = False) -> StreamingResponse:
+    """Stream the last finished scan of ``session_id`` as NDJSON (one packet per line).
+
+    ``offset``/``limit`` page through frames; ``gzip=1`` compresses the stream.
+    Falls back to the newest archived scan of that session (e.g. after a restart).
+    """
+    session = sessions.get(session_id)
+    store = session.last_store if session is not None else None
+    if store is None and archive is not None:
+        latest = archive.list(session_id=session_id, limit=1)
+        if latest:
+            store = archive.open(latest[0]["archive_id"])
+    if store is None:
+        raise HTTPException(status_code=404, detail=f"no finished session {session_id!r}")
+    return _ndjson_response(store, offset, limit, gzip)
+
+
+@app.get("/sessions/{session_id}/mesh_dump")
+async def get_mesh_dump(session_id: str, offset: int = 0, limit: Optional[int] = None, gzip: bool = False) -> StreamingResponse:
+    """The rate-limited full meshes of ``session_id``'s last finished scan, as ``raw_dump`` does the frames.
+
+    Only landmark-profile scans have them; falls back to the newest archived scan.
+    """
+    session = sessions.get(session_id)
+    mesh = session.last_mesh_store if session is not None else None
+    if mesh is None and archive is not None:
+        latest = archive.list(session_id=session_id, limit=1)
+        if latest:
+            mesh = archive.open_mesh(latest[0]["archive_id"])
+    if mesh is None:
+        raise HTTPException(status_code=404, detail=f"no full-mesh frames for session {session_id!r}")
+    return _ndjson_response(mesh, offset, limit, gzip)
+
+
+@app.get("/archive")
+async def list_archive(
+    session_id: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    limit: int = 100,
+) -> Dict[str, Any]:
+    """Archived sessions, newest first; ``since``/``until`` are epoch seconds."""
+    if archive is None:
+        return {"sessions": []}
+    records = await asyncio.to_thread(archive.list, session_id, since, until, limit)
+    return {"sessions": records}
+
+
+@app.get("/archive/{archive_id}")
+async def get_archived_session(archive_id: str) -> Dict[str, Any]:
+    """Meta, stats and final report of one archived session."""
+    if archive is None:
+        raise HTTPException(status_code=404, detail="archive disabled")
+    try:
+        meta = await asyncio.to_thread(archive.meta, archive_id)
+        report = await asyncio.to_thread(archive.report, archive_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"no archived session {archive_id!r}")
+    urls = {"raw_dump_url": f"/archive/{archive_id}/raw_dump"}
+    if meta.get("mesh_frames"):
+        urls["mesh_dump_url"] = f"/archive/{archive_id}/mesh_dump"
+    return {**meta, "gemini_report": report, **urls}
+
+
+@app.get("/archive/{archive_id}/raw_dump")
+async def get_archived_raw_dump(archive_id: str, offset: int = 0, limit: Optional[int] = None, gzip: bool = False) -> StreamingResponse:
+    """Archived frames as NDJSON, read from memory-mapped arrays."""
+    if archive is None:
+        raise HTTPException(status_code=404, detail="archive disabled")
+    try:
+        store = await asyncio.to_thread(archive.open, archive_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"no archived session {archive_id!r}")
+    return _ndjson_response(store, offset, limit, gzip)
+
+
+@app.get("/archive/{archive_id}/mesh_dump")
+async def get_archived_mesh_dump(archive_id: str, offset: int = 0, limit: Optional[int] = None, gzip: bool = False) -> StreamingResponse:
+    """Archived full-mesh frames of a landmark-profile session as NDJSON."""
+    if archive is None:
+        raise HTTPException(status_code=404, detail="archive disabled")
+    try:
+        mesh = await asyncio.to_thread(archive.open_mesh, archive_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"no archived session {archive_id!r}")
+    if mesh is None:
+        raise HTTPException(status_code=404, detail=f"no full-mesh frames in {archive_id!r}")
+    return _ndjson_response(mesh, offset, limit, gzip)
 
 
 # --- WebSocket Endpoints ---
 
 @app.websocket("/presage_stream")
 async def presage_stream(websocket: WebSocket) -> None:
-    """iOS bridge pushes Presage control + vitals packets here."""
-    await websocket.accept()
-    print("[presage_stream] iOS client connected.")
+    """iOS bridge pushes Presage control + vitals packets here.
 
-    global session_active, session_buffer, last_raw_dump, last_final_report
+    The session id comes from ``session_start`` (``session_id`` or ``device_id``),
+    else the ``?session_id=``/``?device_id=`` query param, else one is minted
+    for the connection. Vitals go to the connection's current session, either
+    as JSON text or as binary frames (``wire.py``) alongside text control messages.
+    """
+    await websocket.accept()
+    params = websocket.query_params
+    connection_id = params.get("session_id") or params.get("device_id") or uuid.uuid4().hex[:12]
+    session = sessions.get_or_create(connection_id)
+    logs.event("presage_stream", "connected", session=session.session_id)
 
     try:
         while True:
-            message = await websocket.receive_text()
-            raw = json.loads(message)
-            msg_type = raw.get("type")
-            print(f"[presage_stream] received msg_type={msg_type}")
+            with profiling.span("receive"):  # includes waiting for the bridge
+                message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            frame: Optional[ingest.VitalsFrame] = None
+            if message.get("bytes") is not None:
+                # Binary frames are always vitals (see wire.py)
+                raw: Dict[str, Any] = {}
+                msg_type = "vitals"
+                try:
+                    with profiling.span("validate"):
+                        frame = wire.decode_frame(message["bytes"])
+                except ingest.FrameValidationError as exc:
+                    metrics.VALIDATION_FAILURES.labels(format="binary").inc()
+                    logs.sample("presage_stream", "frame_rejected", session=session.session_id, error=str(exc))
+                    continue
+            else:
+                with profiling.span("parse"):
+                    raw = ingest.loads(message["text"])
+                msg_type = raw.get("type")
+            logs.sample("presage_stream", "received", msg_type=msg_type, session=session.session_id)
 
             if msg_type == "session_start":
-                async with state_lock:
-                    session_buffer = []
-                    session_active = True
-                    last_raw_dump = None
-                    last_final_report = None
-                print("[presage_stream] session_start")
+                requested_id = raw.get("session_id") or raw.get("device_id")
+                if requested_id:
+                    session = sessions.get_or_create(str(requested_id))
+                try:
+                    profile = LandmarkProfile.from_request(raw.get("landmark_profile"))
+                except ValueError as exc:
+                    logs.event("presage_stream", "bad_profile", level=logging.WARNING, session=session.session_id, error=str(exc))
+                    profile = LandmarkProfile()
+                async with session.lock:
+                    session.reset(profile)
+                await _reset_live_stream(session.session_id)
+                if raw.get("landmark_profile") is not None:
+                    # Tell the bridge which landmarks to send on subset frames and how often to send the mesh
+                    ack = {"type": "session_ack", "session_id": session.session_id, "landmark_profile": profile.ack()}
+                    await websocket.send_text(ingest.dumps(ack))
+                logs.event("presage_stream", "session_start", session=session.session_id, profile=profile.name)
 
             elif msg_type == "vitals":
-                async with state_lock:
-                    if not session_active:
-                        continue
-                try:
-                    packet = PresagePacket.model_validate(raw)
-                except Exception as exc:
-                    print(f"[presage_stream] Packet validation failed: {exc}; keys={list(raw.keys())}")
+                if not session.active:
                     continue
+                if frame is None:
+                    try:
+                        with profiling.span("validate"):
+                            frame = ingest.decode_vitals(raw)
+                    except Exception as exc:
+                        metrics.VALIDATION_FAILURES.labels(format="json").inc()
+                        logs.sample(
+                            "presage_stream", "frame_rejected",
+                            session=session.session_id, error=str(exc), keys=",".join(raw.keys()),
+                        )
+                        continue
 
-                async with state_lock:
-                    session_buffer.append(packet)
+                profile = session.profile
+                # Subset frames carry the profile's landmarks in order; full meshes are sent as-is
+                live_indices = None
+                if profile.is_subset and not profile.is_full_mesh(frame.points):
+                    live_indices = profile.indices[: frame.points.shape[0]]
+
+                waited = time.perf_counter()
+                async with session.lock:
+                    metrics.LOCK_WAIT.observe(time.perf_counter() - waited)
+                    with profiling.span("buffer_append"):
+                        index = session.append_frame(frame)
+                        session.accumulator.observe(session.store, index)
                     live_summary = {
-                        "heart_rate": packet.heart_rate,
-                        "breathing_rate": packet.breathing_rate,
-                        "quality": packet.quality,
-                        "blood_pressure": packet.blood_pressure,
-                        "face_points": packet.face_points,
-                        "session_packet_count": len(session_buffer),
+                        "heart_rate": frame.heart_rate,
+                        "breathing_rate": frame.breathing_rate,
+                        "quality": frame.quality,
+                        "blood_pressure": frame.blood_pressure,
+                        "session_packet_count": len(session.store),
+                        "partial_stats": session.accumulator.partial(),
                     }
-                await broadcast_to_live_clients({"type": "live", "data": live_summary})
+                    provisional = None
+                    if session.provisional.due(session.store):
+                        stats = session.accumulator.stats()
+                        with metrics.STAGE_SECONDS.time(stage="provisional"), profiling.span("provisional"):
+                            provisional = session.provisional.update(session.store, stats)
+                        if session.provisional.should_trigger() and TRIAGE_MODE != "local":
+                            # HIGH has persisted: start Gemini now so the final report is ready at session_end
+                            session.early_report = _spawn(
+                                call_gemini_report(stats, session.store, features=session.accumulator.bio_features())
+                            )
+                            logs.event("presage_stream", "early_gemini", session=session.session_id)
+                metrics.PACKETS_INGESTED.labels(format="json" if raw else "binary").inc()
+                metrics.INGEST_RATE.mark()
+                # Text frames were validated as an (n, 2|3) block, so their parsed lists can be reused
+                with profiling.span("broadcast"):
+                    await broadcast_live_frame(session.session_id, live_summary, frame.points, raw.get("face_points"), live_indices)
+                    if provisional is not None:
+                        await broadcast_to_live_clients(provisional, session.session_id)
 
             elif msg_type == "session_end":
-                async with state_lock:
-                    buffer_copy = list(session_buffer)
-                    session_buffer = []
-                    session_active = False
-
-                stats = _compute_stats(buffer_copy)
-                dump_data = [p.model_dump(mode="json") for p in buffer_copy]
-                gemini_report = await call_gemini_report(stats, dump_data)
-
-                async with state_lock:
-                    last_raw_dump = dump_data
-                    last_final_report = gemini_report
-
-                await broadcast_to_live_clients({"type": "raw_dump", "packets": dump_data})
-                await broadcast_to_live_clients({"type": "final", "gemini_report": gemini_report})
-                print("[presage_stream] session_end -> final report broadcast")
+                ended_at = time.perf_counter()
+                async with session.lock:
+                    accumulator = session.accumulator
+                    session.accumulator = SessionAccumulator()
+                    store = session.finish()
+                    mesh = session.last_mesh_store
+                await _reset_live_stream(session.session_id)
+
+                with profiling.span("session_end"):
+                    await _finish_session(session, store, accumulator, ended_at, mesh)
+                profiling.profiler.session_finished()
 
     except WebSocketDisconnect:
-        print("[presage_stream] iOS client disconnected.")
+        logs.event("presage_stream", "disconnected", session=session.session_id)
     except Exception as exc:
-        print(f"[presage_stream] Error: {exc}")
+        logs.event("presage_stream", "error", level=logging.ERROR, session=session.session_id, error=str(exc))
 
 
 @app.websocket("/live_state")
 async def live_state(websocket: WebSocket) -> None:
-    """Frontend clients subscribe here for live and final messages."""
+    """Frontend clients subscribe here for live and final messages.
+
+    ``?sessions=a,b`` picks the sessions to follow (default: all). Clients can
+    switch later by sending ``{"type": "follow", "sessions": [...]}``. Rate,
+    landmark subset and quantisation are chosen with the params in ``live_policy``.
+    """
     await websocket.accept()
-    async with state_lock:
-        live_clients.append(websocket)
-        print(f"[live_state] Web client connected. Total: {len(live_clients)}")
-        if last_raw_dump is not None:
-            await websocket.send_json({"type": "raw_dump", "packets": last_raw_dump})
-        if last_final_report is not None:
-            await websocket.send_json({"type": "final", "gemini_report": last_final_report})
+    params = websocket.query_params
+    client = LiveClient(
+        websocket=websocket,
+        follow=parse_follow(params.get("sessions")),
+        policy=LivePolicy.from_params(params),
+    )
+    client.start()
+    async with clients_lock:
+        live_clients.append(client)
+        for (_, policy), encoder in live_encoders.items():
+            if policy == client.policy:
+                encoder.request_keyframe()
+        logs.event("live_state", "connected", client=client.client_id, total=len(live_clients))
 
     try:
+        await _replay_followed(client)
+
         while True:
-            await asyncio.sleep(60)  # keep alive
+            message = await websocket.receive_text()
+            try:
+                raw = json.loads(message)
+            except ValueError:
+                continue
+            if isinstance(raw, dict) and raw.get("type") == "follow":
+                client.follow = parse_follow(raw.get("sessions"))
+                logs.event("live_state", "follow", client=client.client_id, sessions=",".join(sorted(client.follow)) if client.follow else "all")
+                await _replay_followed(client)
     except WebSocketDisconnect:
-        print("[live_state] Web client disconnected.")
+        logs.event("live_state", "disconnected", client=client.client_id)
     finally:
-        async with state_lock:
-            if websocket in live_clients:
-                live_clients.remove(websocket)
-        print(f"[live_state] Cleaned up client. Total: {len(live_clients)}")
+        if client.overflowed:
+            logs.event("live_state", "backlog_overflow", level=logging.WARNING, client=client.client_id, limit=client.max_backlog)
+        async with clients_lock:
+            if client in live_clients:
+                live_clients.remove(client)
+        await client.close()
+        logs.event("live_state", "cleaned_up", client=client.client_id, total=len(live_clients), sent=client.sent, dropped=client.dropped)
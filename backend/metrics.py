@@ -0,0 +1,268 @@
+"""Process metrics in the Prometheus text exposition format (served at ``GET /metrics``).
+
+A small in-process registry rather than ``prometheus_client``: counters,
+gauges and fixed-bucket histograms with labels, plus scrape-time collectors
+for values that already live elsewhere (session buffers, runner and cache
+counters). Updates are plain attribute arithmetic, cheap enough for the
+per-frame path.
+"""
+
+from __future__ import annotations
+
+import bisect
+import math
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+# Seconds; spans socket sends (~100 us) up to model calls (seconds)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Tuple[str, ...]
+# (labels, value) rows of one metric family, as yielded by collectors
+Sample = Tuple[Mapping[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def set(self, value: float) -> None:
+        self.value = float(value)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Labels, object] = {}
+
+    def _new_child(self) -> object:
+        raise NotImplementedError
+
+    def labels(self, **labels: str):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._new_child()
+        return child
+
+    def remove(self, **labels: str) -> None:
+        self._children.pop(tuple(str(labels[name]) for name in self.labelnames), None)
+
+    def _unlabelled(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} needs labels {self.labelnames}")
+        return self.labels()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in list(self._children.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.value)}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._unlabelled().inc(amount)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._unlabelled().set(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._unlabelled().observe(value)
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Observe the duration of the ``with`` block."""
+        child = self.labels(**labels)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            child.observe(time.perf_counter() - start)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), child.counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {child.count}")
+        return lines
+
+
+class RateMeter:
+    """Events per second over the last ``window`` seconds, in one-second buckets."""
+
+    def __init__(self, window: int = 10) -> None:
+        self.window = window
+        self._buckets: Deque[List[float]] = deque()
+
+    def mark(self, count: int = 1, now: Optional[float] = None) -> None:
+        second = math.floor(time.monotonic() if now is None else now)
+        if self._buckets and self._buckets[-1][0] == second:
+            self._buckets[-1][1] += count
+        else:
+            self._buckets.append([second, count])
+            while self._buckets and self._buckets[0][0] <= second - self.window:
+                self._buckets.popleft()
+
+    def rate(self, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        cutoff = math.floor(now) - self.window
+        return sum(count for second, count in self._buckets if second > cutoff) / self.window
+
+
+Collector = Callable[[], Iterable[Tuple[str, str, str, Iterable[Sample]]]]
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Collector] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector: Collector) -> None:
+        """``collector()`` yields ``(name, kind, help, [(labels, value), ...])`` at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    if value is None:
+                        continue
+                    lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+PACKETS_INGESTED = REGISTRY.register(Counter(
+    "neuro_sentry_packets_ingested_total", "Vitals frames appended to a session store.", ["format"]))
+INGEST_RATE = RateMeter()
+VALIDATION_FAILURES = REGISTRY.register(Counter(
+    "neuro_sentry_validation_failures_total", "Vitals frames rejected by ingest validation.", ["format"]))
+LOCK_WAIT = REGISTRY.register(Histogram(
+    "neuro_sentry_session_lock_wait_seconds", "Time spent waiting for a session lock on the vitals path."))
+BROADCAST_LATENCY = REGISTRY.register(Histogram(
+    "neuro_sentry_broadcast_latency_seconds", "Enqueue-to-sent time of /live_state messages per client.", ["client"]))
+BROADCAST_MESSAGES = REGISTRY.register(Counter(
+    "neuro_sentry_broadcast_messages_total", "Messages fanned out to /live_state clients, by type.", ["type"]))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "neuro_sentry_stage_seconds", "Duration of analysis stages (stats, features, prompt build, DSP, triage).", ["stage"]))
+MODEL_LATENCY = REGISTRY.register(Histogram(
+    "neuro_sentry_model_latency_seconds", "Model (Gemini/stub) call latency including queueing for a worker.", ["backend", "outcome"]))
+
+
+def _ingest_rate() -> Iterable[Tuple[str, str, str, Iterable[Sample]]]:
+    yield ("neuro_sentry_ingest_packets_per_second", "gauge",
+           f"Vitals frames ingested per second over the last {INGEST_RATE.window} s.", [({}, INGEST_RATE.rate())])
+
+
+REGISTRY.add_collector(_ingest_rate)
+
+
+__all__ = [
+    "BROADCAST_LATENCY",
+    "BROADCAST_MESSAGES",
+    "CONTENT_TYPE",
+    "Counter",
+    "Gauge",
+    "Histogram",
+    "INGEST_RATE",
+    "LOCK_WAIT",
+    "MODEL_LATENCY",
+    "PACKETS_INGESTED",
+    "REGISTRY",
+    "RateMeter",
+    "Registry",
+    "STAGE_SECONDS",
+    "VALIDATION_FAILURES",
+]
@@ -0,0 +1,224 @@
+"""Model backends for the triage call and the bounded runner that feeds them.
+
+One backend instance lives for the whole process (the Gemini one holds a single
+``genai.Client`` and its pooled HTTP connections). Calls go through
+``TriageRunner``: a dedicated thread pool of ``NEURO_SENTRY_TRIAGE_WORKERS``
+threads, an asyncio semaphore in front of it so excess ``session_end``s queue
+instead of spawning threads, and a per-call timeout. A call that times out
+keeps its worker slot until its thread actually returns.
+
+    NEURO_SENTRY_MODEL_BACKEND=gemini    gemini | stub (deterministic, no network)
+    NEURO_SENTRY_GEMINI_MODEL=gemini-2.0-flash
+    NEURO_SENTRY_TRIAGE_WORKERS=4
+    NEURO_SENTRY_TRIAGE_TIMEOUT=20       seconds per call
+    NEURO_SENTRY_STUB_LATENCY=0          seconds the stub sleeps per call
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+try:
+    from google import genai
+    from google.genai import types as genai_types
+except Exception:
+    genai = None
+    genai_types = None
+
+from metrics import MODEL_LATENCY
+
+MODEL_BACKEND = os.getenv("NEURO_SENTRY_MODEL_BACKEND", "gemini").strip().lower()
+GEMINI_MODEL = os.getenv("NEURO_SENTRY_GEMINI_MODEL", "gemini-2.0-flash")
+TRIAGE_WORKERS = int(os.getenv("NEURO_SENTRY_TRIAGE_WORKERS", "4"))
+TRIAGE_TIMEOUT = float(os.getenv("NEURO_SENTRY_TRIAGE_TIMEOUT", "20"))
+STUB_LATENCY = float(os.getenv("NEURO_SENTRY_STUB_LATENCY", "0"))
+
+
+class ModelBackend:
+    """Blocking ``generate(prompt, schema) -> dict``; runs on a triage worker thread."""
+
+    name = "base"
+
+    def generate(self, prompt: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class GeminiBackend(ModelBackend):
+    name = "gemini"
+
+    def __init__(self, api_key: str, model: str = GEMINI_MODEL, timeout: float = TRIAGE_TIMEOUT) -> None:
+        self.model = model
+        try:
+            http_options = genai_types.HttpOptions(timeout=int(timeout * 1000))
+            self.client = genai.Client(api_key=api_key, http_options=http_options)
+        except (AttributeError, TypeError):  # older SDKs without HttpOptions
+            self.client = genai.Client(api_key=api_key)
+
+    def generate(self, prompt: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+        response = self.client.models.generate_content(
+            model=self.model,
+            contents=prompt,
+            config=genai_types.GenerateContentConfig(
+                response_mime_type="application/json",
+                response_schema=schema,
+                temperature=0.0,  # Deterministic mode
+            ),
+        )
+        return json.loads(response.text)
+
+    def close(self) -> None:
+        close = getattr(self.client, "close", None)
+        if callable(close):
+            close()
+
+
+class StubBackend(ModelBackend):
+    """Offline stand-in: reads the telemetry JSON at the end of the prompt and applies the CPSS thresholds."""
+
+    name = "stub"
+
+    def __init__(self, latency: float = STUB_LATENCY) -> None:
+        self.latency = latency
+        self.calls = 0
+
+    def generate(self, prompt: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        try:
+            telemetry = json.loads(prompt.rsplit("LIVE TELEMETRY:\n", 1)[1])
+            mouth = float(telemetry["physics_engine_output"]["mouth_asymmetry_index"])
+        except (IndexError, KeyError, TypeError, ValueError):
+            mouth = 0.0
+        if mouth > 0.15:
+            risk, probability = "HIGH", 0.7
+        elif mouth >= 0.08:
+            risk, probability = "MED", 0.3
+        else:
+            risk, probability = "LOW", 0.02
+        return {
+            "risk_level": risk,
+            "stroke_probability": probability,
+            "summary": f"Stub triage: mouth asymmetry index {mouth:.4f}.",
+            "rationale": "Stub model backend (no network); CPSS thresholds 0.08 / 0.15.",
+            "recommendation": "Stub output for testing only.",
+            "confidence": 0.5,
+        }
+
+
+def create_backend(kind: str = MODEL_BACKEND) -> Optional[ModelBackend]:
+    """The configured backend, or ``None`` when Gemini is selected but unavailable."""
+    if kind == "stub":
+        return StubBackend()
+    api_key = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+    if not api_key or not genai:
+        return None
+    return GeminiBackend(api_key)
+
+
+class TriageRunner:
+    """Bounded, instrumented executor for blocking model calls."""
+
+    def __init__(self, backend: Optional[ModelBackend], workers: int = TRIAGE_WORKERS, timeout: float = TRIAGE_TIMEOUT) -> None:
+        self.backend = backend
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.queued = 0
+        self.in_flight = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.last_latency_s: Optional[float] = None
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="triage")
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def available(self) -> bool:
+        return self.backend is not None
+
+    async def generate(self, prompt: str, schema: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Queue for a worker, then run ``backend.generate``; raises on timeout/error."""
+        if self.backend is None:
+            raise RuntimeError("no model backend configured")
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        loop = asyncio.get_running_loop()
+        queued_at = time.perf_counter()
+        outcome = "error"
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+        start = time.perf_counter()
+        try:
+            job = self._executor.submit(self.backend.generate, prompt, schema)
+        except BaseException:
+            self._release()
+            raise
+        # A timed-out call keeps its thread busy, so the slot is freed when the thread returns
+        job.add_done_callback(lambda _: self._release_from_thread(loop))
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(job), timeout or self.timeout)
+            self.completed += 1
+            outcome = "ok"
+            return result
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            outcome = "timeout"
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.last_latency_s = time.perf_counter() - start
+            MODEL_LATENCY.labels(backend=self.backend.name, outcome=outcome).observe(time.perf_counter() - queued_at)
+
+    def _release(self) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def _release_from_thread(self, loop: asyncio.AbstractEventLoop) -> None:
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            pass  # loop already closed (shutdown)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self.backend.name if self.backend else None,
+            "workers": self.workers,
+            "timeout_s": self.timeout,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "last_latency_s": None if self.last_latency_s is None else round(self.last_latency_s, 4),
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self.backend is not None:
+            self.backend.close()
+
+
+__all__ = [
+    "GeminiBackend",
+    "ModelBackend",
+    "StubBackend",
+    "TriageRunner",
+    "create_backend",
+]
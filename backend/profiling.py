@@ -0,0 +1,266 @@
+"""Runtime profiling that the admin endpoints can switch on without a redeploy.
+
+Two modes, each bounded by a number of seconds and/or finished sessions:
+
+* ``sample``: a background thread snapshots the event-loop thread's stack
+  every ``interval`` seconds (``sys._current_frames``) and counts identical
+  stacks. The dump is in folded format (``frame;frame;frame count``), which
+  flamegraph.pl, speedscope and inferno read directly.
+* ``cprofile``: deterministic ``cProfile`` of the event-loop thread; the dump
+  is a pstats file (snakeviz, ``flameprof``, ``python -m pstats``).
+
+While either runs, ``span(name)`` blocks record per-stage wall time, nested
+by context (``vitals;validate``, ``session_end;llm``), also downloadable as a
+folded file weighted in microseconds. Inactive spans cost one attribute check.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import marshal
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+MODES = ("sample", "cprofile")
+DEFAULT_INTERVAL = 0.005  # seconds between stack samples
+MAX_DEPTH = 128
+
+_span_path: ContextVar[str] = ContextVar("neuro_sentry_span", default="")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def fold_stack(frame) -> str:
+    """``root;...;leaf`` labels for ``frame`` and its callers."""
+    labels: List[str] = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    """Counts folded stacks of one thread, sampled from a daemon thread."""
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_INTERVAL) -> None:
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join(timeout=1.0)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[fold_stack(frame)] += 1
+                self.samples += 1
+            del frame
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "path", "token", "start")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> None:
+        parent = _span_path.get()
+        self.path = f"{parent};{self.name}" if parent else self.name
+        self.token = _span_path.set(self.path)
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc: Any) -> None:
+        elapsed = time.perf_counter() - self.start
+        _span_path.reset(self.token)
+        profiler.record_span(self.path, elapsed)
+
+
+class Profiler:
+    """One profiling run at a time; results stay downloadable until the next start."""
+
+    def __init__(self) -> None:
+        self.active = False
+        self.mode: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self.seconds: Optional[float] = None
+        self.max_sessions: Optional[int] = None
+        self.sessions = 0
+        self.spans: Dict[str, List[float]] = {}  # path -> [count, total_s, max_s]
+        self._sampler: Optional[StackSampler] = None
+        self._cprofile: Optional[cProfile.Profile] = None
+        self._pstats: Optional[bytes] = None
+        self._timer = None
+
+    def start(
+        self,
+        mode: str = "sample",
+        seconds: Optional[float] = None,
+        sessions: Optional[int] = None,
+        interval: float = DEFAULT_INTERVAL,
+    ) -> Dict[str, Any]:
+        """Begin profiling on the calling (event-loop) thread; stops after ``seconds`` or ``sessions``."""
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}")
+        if self.active:
+            raise RuntimeError("profiling already running")
+        self.mode = mode
+        self.seconds = seconds
+        self.max_sessions = sessions
+        self.sessions = 0
+        self.spans = {}
+        self._sampler = None
+        self._pstats = None
+        if mode == "sample":
+            self._sampler = StackSampler(threading.get_ident(), max(0.001, interval))
+            self._sampler.start()
+        else:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+        self.active = True
+        self.started_at = time.time()
+        self.stopped_at = None
+        if seconds:
+            self._timer = asyncio.get_running_loop().call_later(seconds, self.stop)
+        return self.status()
+
+    def stop(self) -> Dict[str, Any]:
+        if not self.active:
+            return self.status()
+        self.active = False
+        self.stopped_at = time.time()
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self._sampler is not None:
+            self._sampler.stop()
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.create_stats()
+            self._pstats = marshal.dumps(self._cprofile.stats)
+            self._cprofile = None
+        return self.status()
+
+    def session_finished(self) -> None:
+        """Count a finished scan; stops a run limited to N sessions."""
+        if not self.active:
+            return
+        self.sessions += 1
+        if self.max_sessions and self.sessions >= self.max_sessions:
+            self.stop()
+
+    def record_span(self, path: str, elapsed: float) -> None:
+        entry = self.spans.get(path)
+        if entry is None:
+            self.spans[path] = [1, elapsed, elapsed]
+        else:
+            entry[0] += 1
+            entry[1] += elapsed
+            if elapsed > entry[2]:
+                entry[2] = elapsed
+
+    # --- Results ---
+
+    def span_summary(self) -> Dict[str, Dict[str, float]]:
+        return {
+            path: {
+                "count": int(count),
+                "total_ms": round(total * 1000, 3),
+                "mean_ms": round(total / count * 1000, 4),
+                "max_ms": round(peak * 1000, 3),
+            }
+            for path, (count, total, peak) in sorted(self.spans.items())
+        }
+
+    def stacks_folded(self) -> str:
+        if self._sampler is None:
+            return ""
+        return "".join(f"{stack} {count}\n" for stack, count in self._sampler.stacks.most_common())
+
+    def spans_folded(self) -> str:
+        """Span paths weighted by total microseconds (self time of a parent is its total minus children)."""
+        totals = {path: entry[1] for path, entry in self.spans.items()}
+        lines = []
+        for path, total in sorted(totals.items()):
+            prefix = path + ";"
+            children = sum(t for p, t in totals.items() if p.startswith(prefix) and ";" not in p[len(prefix):])
+            self_us = int(round(max(0.0, total - children) * 1e6))
+            if self_us:
+                lines.append(f"{path} {self_us}\n")
+        return "".join(lines)
+
+    def pstats_bytes(self) -> Optional[bytes]:
+        return self._pstats
+
+    def top_functions(self, limit: int = 15) -> List[Dict[str, Any]]:
+        """Leaf frames by sample count (where the loop thread actually was)."""
+        if self._sampler is None or not self._sampler.samples:
+            return []
+        leaves: Counter[str] = Counter()
+        for stack, count in self._sampler.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        total = self._sampler.samples
+        return [{"frame": frame, "samples": count, "share": round(count / total, 4)} for frame, count in leaves.most_common(limit)]
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "mode": self.mode,
+            "started_at": self.started_at,
+            "stopped_at": self.stopped_at,
+            "seconds": self.seconds,
+            "sessions": self.sessions,
+            "max_sessions": self.max_sessions,
+            "samples": self._sampler.samples if self._sampler is not None else None,
+            "top_functions": self.top_functions(),
+            "spans": self.span_summary(),
+            "downloads": {
+                "stacks": self._sampler is not None,
+                "spans": bool(self.spans),
+                "pstats": self._pstats is not None,
+            },
+        }
+
+
+profiler = Profiler()
+
+
+def span(name: str):
+    """``with span("validate"):`` times a stage while profiling is on; a no-op otherwise."""
+    if not profiler.active:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+__all__ = ["MODES", "Profiler", "StackSampler", "fold_stack", "profiler", "span"]
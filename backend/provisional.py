@@ -0,0 +1,112 @@
+"""Rolling-window triage while a scan is still streaming.
+
+Every ``PROVISIONAL_EVERY`` seconds of frame time, ``RollingTriage`` recomputes
+mouth asymmetry over the last ``PROVISIONAL_WINDOW`` seconds of the session
+store and runs the local CPSS engine on it, yielding a ``provisional`` message
+for /live_state. Once HIGH has held for ``EARLY_TRIGGER`` seconds it flags that
+the Gemini call should start before ``session_end``.
+
+    NEURO_SENTRY_PROVISIONAL_WINDOW=10   seconds of frames per evaluation
+    NEURO_SENTRY_PROVISIONAL_EVERY=1     seconds between evaluations (0 = every frame)
+    NEURO_SENTRY_EARLY_TRIGGER=5         seconds of sustained HIGH before the early call (0 = off)
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+
+from features import analysis_mask, asymmetry_features, asymmetry_frames, quality_weights, robust_summary
+from session_store import SessionStore
+from triage_engine import local_triage
+from vitals_dsp import BR_RANGE, HR_RANGE, signal_features
+
+PROVISIONAL_WINDOW = float(os.getenv("NEURO_SENTRY_PROVISIONAL_WINDOW", "10"))
+PROVISIONAL_EVERY = float(os.getenv("NEURO_SENTRY_PROVISIONAL_EVERY", "1"))
+EARLY_TRIGGER = float(os.getenv("NEURO_SENTRY_EARLY_TRIGGER", "5"))
+
+
+class RollingTriage:
+    """Per-session provisional risk over a sliding window of frame timestamps."""
+
+    def __init__(
+        self,
+        window: float = PROVISIONAL_WINDOW,
+        every: float = PROVISIONAL_EVERY,
+        early_trigger: float = EARLY_TRIGGER,
+    ) -> None:
+        self.window = window
+        self.every = every
+        self.early_trigger = early_trigger
+        self.evaluations = 0
+        self.triggered = False
+        self.last: Optional[Dict[str, Any]] = None
+        self._last_eval = float("-inf")
+        self._high_since: Optional[float] = None
+
+    def window_features(self, store: SessionStore) -> Dict[str, Any]:
+        """``compute_bio_features`` restricted to the last ``window`` seconds."""
+        n = len(store)
+        timestamps = store.timestamps
+        start = int(np.searchsorted(timestamps, timestamps[-1] - self.window, side="left"))
+        counts = store.point_counts[start:n]
+        asym = asymmetry_frames(store.landmarks[start:n], counts, store.landmark_indices)
+        used = analysis_mask(asym, counts, store.landmark_indices)
+        summary = robust_summary(asym.mouth, used, quality_weights(store.quality[start:n]))
+        hr = signal_features(timestamps[start:n], store.heart_rate[start:n], store.quality[start:n], HR_RANGE)
+        br = signal_features(timestamps[start:n], store.breathing_rate[start:n], store.quality[start:n], BR_RANGE)
+        return {
+            **asymmetry_features(summary, int(np.count_nonzero(used))),
+            "window_frames": n - start,
+            "heart_rate": hr["smoothed_last"],
+            "breathing_rate": br["smoothed_last"],
+        }
+
+    def due(self, store: SessionStore) -> bool:
+        return len(store) > 0 and float(store.timestamps[-1]) - self._last_eval >= self.every
+
+    def update(self, store: SessionStore, stats: Mapping[str, Any]) -> Optional[Dict[str, Any]]:
+        """Evaluate if due; returns the ``provisional`` payload or ``None``."""
+        if not self.due(store):
+            return None
+        now = float(store.timestamps[-1])
+        self._last_eval = now
+        self.evaluations += 1
+
+        features = self.window_features(store)
+        report = local_triage(stats, features)
+        if report["risk_level"] == "HIGH":
+            if self._high_since is None:
+                self._high_since = now
+        else:
+            self._high_since = None
+        high_for = 0.0 if self._high_since is None else now - self._high_since
+
+        self.last = {
+            "risk_level": report["risk_level"],
+            "stroke_probability": report["stroke_probability"],
+            "confidence": report["confidence"],
+            "summary": report["summary"],
+            "mouth_asymmetry_index": features["mouth_asymmetry_index"],
+            "frames": features["window_frames"],
+            # Outlier-gated, low-pass filtered vitals over the window
+            "heart_rate_filtered": features["heart_rate"],
+            "breathing_rate_filtered": features["breathing_rate"],
+            "window_s": self.window,
+            "high_for_s": round(high_for, 2),
+        }
+        return {"type": "provisional", "data": self.last}
+
+    def should_trigger(self) -> bool:
+        """True once per scan, when HIGH has persisted for ``early_trigger`` seconds."""
+        if self.triggered or not self.early_trigger or self._high_since is None or self.last is None:
+            return False
+        if self.last["high_for_s"] < self.early_trigger:
+            return False
+        self.triggered = True
+        return True
+
+
+__all__ = ["EARLY_TRIGGER", "PROVISIONAL_EVERY", "PROVISIONAL_WINDOW", "RollingTriage"]
@@ -0,0 +1,214 @@
+"""Re-score archived sessions with the current feature code and triage rules.
+
+After a change to the CPSS thresholds (``triage_engine.py``) or the
+asymmetry math (``features.py`` / ``gemini_prompt.py``), this recomputes
+every archived session's stats, vitals DSP and bio features from its
+memory-mapped columns. The sessions are spread over worker processes, and the
+result is one table row per session, next to the risk level that was
+archived with it::
+
+    python backend/reanalyse.py backend/archive --out rescored.csv
+    python backend/reanalyse.py /data/archive --report local --workers 8 --out rescored.jsonl
+    python backend/reanalyse.py --session-id bed-3 --since 2026-01-01 --report stub
+
+``--report local`` adds the local CPSS engine's report. ``--report stub``
+builds the real Gemini prompt and answers it with the offline stub model.
+No network is used either way.
+
+As a library::
+
+    from reanalyse import reanalyse, write_table
+    rows = reanalyse("backend/archive", report="local")
+    write_table(rows, "rescored.csv")
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from analysis_pool import analyse_store
+from archive import ARCHIVE_DIR, SessionArchive
+from gemini_prompt import build_triage_prompt
+from triage_engine import local_triage
+
+REPORT_MODES = ("none", "local", "stub")
+
+
+def _flatten(prefix: str, value: Any, out: Dict[str, Any]) -> None:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            _flatten(f"{prefix}.{key}" if prefix else str(key), item, out)
+    else:
+        out[prefix] = value
+
+
+def _report(mode: str, stats: Dict[str, Any], features: Dict[str, Any], store) -> Optional[Dict[str, Any]]:
+    if mode == "local":
+        return local_triage(stats, features)
+    if mode == "stub":
+        from gemini_dummy import REPORT_SCHEMA
+        from model_backends import StubBackend
+
+        return StubBackend(latency=0.0).generate(build_triage_prompt(stats, store, features=features), REPORT_SCHEMA)
+    return None
+
+
+def reanalyse_session(archive: SessionArchive, archive_id: str, report: str = "none") -> Dict[str, Any]:
+    """One flat result row: archive meta, recomputed ``stats.*`` / ``features.*`` and optionally ``report.*``."""
+    meta = archive.meta(archive_id)
+    row: Dict[str, Any] = {
+        "archive_id": archive_id,
+        "session_id": meta.get("session_id"),
+        "started_at": meta.get("started_at"),
+        "frames": meta.get("frames"),
+        "landmarks": meta.get("landmarks"),
+        "archived_risk": meta.get("risk_level"),
+    }
+    store = archive.open(archive_id)
+    stats, features = analyse_store(store)
+    _flatten("stats", stats, row)
+    _flatten("features", features, row)
+    result = _report(report, stats, features, store)
+    if result is not None:
+        _flatten("report", result, row)
+        row["risk_changed"] = result.get("risk_level") != row["archived_risk"]
+    return row
+
+
+def _job(root: str, archive_id: str, report: str) -> Dict[str, Any]:
+    """Worker entry point: never raises, so one bad session does not stop the batch."""
+    try:
+        return reanalyse_session(SessionArchive(root), archive_id, report)
+    except Exception as exc:
+        return {"archive_id": archive_id, "error": f"{type(exc).__name__}: {exc}"}
+
+
+def select_ids(
+    archive: SessionArchive,
+    session_id: Optional[str] = None,
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    limit: Optional[int] = None,
+) -> List[str]:
+    """Archive ids, oldest first, filtered by session id and start time (epoch seconds)."""
+    ids = archive.ids()
+    if session_id is not None or since is not None or until is not None:
+        selected = []
+        for archive_id in ids:
+            meta = archive.meta(archive_id)
+            ts = meta.get("started_ts") or 0.0
+            if session_id is not None and meta.get("session_id") != session_id:
+                continue
+            if (since is not None and ts < since) or (until is not None and ts > until):
+                continue
+            selected.append(archive_id)
+        ids = selected
+    return ids if limit is None else ids[: max(0, limit)]
+
+
+def reanalyse(
+    root: str | Path,
+    archive_ids: Optional[Sequence[str]] = None,
+    report: str = "none",
+    workers: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Result rows for ``archive_ids`` (default: every archived session), in input order.
+
+    ``workers`` processes share the sessions (default: one per CPU; 0 or 1 runs
+    in this process). Each worker maps its sessions' ``.npy`` columns itself, so
+    only ids and result rows cross process boundaries.
+    """
+    if report not in REPORT_MODES:
+        raise ValueError(f"report must be one of {REPORT_MODES}")
+    root = str(root)
+    if archive_ids is None:
+        archive_ids = SessionArchive(root).ids()
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    if workers <= 1 or len(archive_ids) <= 1:
+        return [_job(root, archive_id, report) for archive_id in archive_ids]
+    chunksize = max(1, len(archive_ids) // (workers * 8))
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(_job, [root] * len(archive_ids), archive_ids, [report] * len(archive_ids), chunksize=chunksize))
+
+
+def write_table(rows: Iterable[Dict[str, Any]], path: str | Path) -> Path:
+    """CSV (columns in first-seen order; nested values as JSON) or, for ``.jsonl``, one object per line."""
+    path = Path(path)
+    rows = list(rows)
+    if path.suffix == ".jsonl":
+        with open(path, "w") as out:
+            for row in rows:
+                out.write(json.dumps(row) + "\n")
+        return path
+    columns: Dict[str, None] = {}
+    for row in rows:
+        columns.update(dict.fromkeys(row))
+    with open(path, "w", newline="") as out:
+        writer = csv.DictWriter(out, fieldnames=list(columns), restval="")
+        writer.writeheader()
+        for row in rows:
+            writer.writerow({k: json.dumps(v) if isinstance(v, (list, tuple)) else v for k, v in row.items()})
+    return path
+
+
+def _epoch(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+
+
+def print_summary(rows: List[Dict[str, Any]], elapsed: float) -> None:
+    errors = [row for row in rows if "error" in row]
+    print(f"sessions={len(rows)} errors={len(errors)} elapsed={elapsed:.2f}s ({len(rows) / elapsed if elapsed else 0:.1f} sessions/s)")
+    for row in errors[:5]:
+        print(f"  error {row['archive_id']}: {row['error']}")
+    if any("report.risk_level" in row for row in rows):
+        risks = Counter(row.get("report.risk_level") for row in rows if "error" not in row)
+        changed = sum(1 for row in rows if row.get("risk_changed"))
+        print(f"risk levels: {dict(sorted(risks.items(), key=lambda kv: str(kv[0])))}  changed vs archived: {changed}")
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("archive_dir", nargs="?", default=ARCHIVE_DIR, help="session archive root (NEURO_SENTRY_ARCHIVE_DIR)")
+    parser.add_argument("--out", type=Path, default=Path("reanalysis.csv"), help=".csv or .jsonl results table")
+    parser.add_argument("--report", choices=REPORT_MODES, default="none", help="also produce a local-engine or stub-model report")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU)")
+    parser.add_argument("--session-id", default=None)
+    parser.add_argument("--since", default=None, help="start time lower bound (epoch seconds or ISO 8601)")
+    parser.add_argument("--until", default=None, help="start time upper bound (epoch seconds or ISO 8601)")
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+
+    if not args.archive_dir or not Path(args.archive_dir).is_dir():
+        sys.exit(f"no archive directory at {args.archive_dir!r}")
+    archive = SessionArchive(args.archive_dir)
+    ids = select_ids(archive, args.session_id, _epoch(args.since), _epoch(args.until), args.limit)
+    print(f"{len(ids)} archived session(s) in {args.archive_dir}, report={args.report}")
+    started = time.perf_counter()
+    rows = reanalyse(args.archive_dir, ids, args.report, args.workers)
+    print_summary(rows, time.perf_counter() - started)
+    print(f"results written to {write_table(rows, args.out)}")
+
+
+__all__ = ["REPORT_MODES", "reanalyse", "reanalyse_session", "select_ids", "write_table"]
+
+
+if __name__ == "__main__":
+    main_cli()
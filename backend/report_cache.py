@@ -0,0 +1,207 @@
+"""LRU/TTL cache of triage reports keyed on quantised session features.
+
+The triage call runs at ``temperature=0.0`` on a prompt built only from the
+bio features, the vitals summary and a technician note, so scans whose numbers
+fall in the same buckets get the same report. The key hashes every bucketed
+prompt input, the technician-note and CPSS threshold bands, and
+``PROMPT_VERSION``; bump the version whenever the prompt or schema changes.
+
+    NEURO_SENTRY_REPORT_CACHE_SIZE=256     entries kept (0 disables the cache)
+    NEURO_SENTRY_REPORT_CACHE_TTL=86400    seconds an entry stays valid
+    NEURO_SENTRY_REPORT_CACHE_FILE=path    optional JSON file to persist entries
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+import numbers
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from gemini_prompt import PROMPT_VERSION, tech_note_band
+import logs
+from triage_engine import MIN_FRAMES, cpss_band
+
+# Bucket width per prompt input (stats and features share one namespace, nested
+# vitals_dsp values are dotted). Buckets are floor-based, so the CPSS cut points
+# 0.02 / 0.08 / 0.15 are bucket edges; the bands are hashed as well.
+QUANTA: Dict[str, float] = {
+    "mouth_asymmetry_index": 0.005,
+    "mouth_asymmetry_median": 0.005,
+    "mouth_asymmetry_p90": 0.005,
+    "mouth_asymmetry_window_var_max": 0.0001,
+    "packets_analyzed": float(MIN_FRAMES),
+    "mouth_asymmetry_mean": 0.5,
+    "brow_asymmetry_mean": 0.5,
+    "heart_rate_mean": 2.0,
+    "breathing_rate_mean": 1.0,
+    "quality_mean": 0.05,
+    "count": 150.0,
+    "duration_ms": 5000.0,
+    "vitals_dsp.heart_rate.weighted_mean": 2.0,
+    "vitals_dsp.heart_rate.smoothed_last": 2.0,
+    "vitals_dsp.breathing_rate.weighted_mean": 1.0,
+    "vitals_dsp.breathing_rate.smoothed_last": 1.0,
+    "vitals_dsp.hrv.sdnn_ms": 10.0,
+    "vitals_dsp.hrv.rmssd_ms": 10.0,
+}
+# Other numeric inputs are kept to this many significant digits
+FALLBACK_DIGITS = 2
+
+
+def _bucket(value: Any, step: float) -> Optional[int]:
+    if value is None:
+        return None
+    value = float(value)
+    if not math.isfinite(value):
+        return None
+    return math.floor(value / step)
+
+
+def _quantise(name: str, value: Any) -> Any:
+    if isinstance(value, (list, tuple)):
+        return [_quantise(name, item) for item in value]
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, numbers.Real):
+        step = QUANTA.get(name)
+        if step is not None:
+            return _bucket(value, step)
+        return float(f"{value:.{FALLBACK_DIGITS}g}") if math.isfinite(value) else None
+    return str(value)
+
+
+def _leaves(prefix: str, value: Any, out: Dict[str, Any]) -> None:
+    if isinstance(value, Mapping):
+        for key, item in value.items():
+            _leaves(f"{prefix}.{key}" if prefix else str(key), item, out)
+    else:
+        out[prefix] = value
+
+
+def feature_key(stats: Mapping[str, Any], features: Mapping[str, Any], version: str = PROMPT_VERSION) -> str:
+    """Stable hash of every quantised prompt input, the threshold bands and the prompt version.
+
+    The technician-note and CPSS bands go in explicitly, so two scans on either
+    side of a clinical threshold never share a report.
+    """
+    leaves: Dict[str, Any] = {}
+    _leaves("", {**stats, **features}, leaves)
+    mouth = float(features.get("mouth_asymmetry_index") or 0.0)
+    vector = [version, tech_note_band(mouth), cpss_band(mouth)]
+    vector += [[name, _quantise(name, value)] for name, value in sorted(leaves.items())]
+    return hashlib.sha256(json.dumps(vector, separators=(",", ":")).encode()).hexdigest()[:32]
+
+
+class ReportCache:
+    """In-memory LRU with per-entry expiry, optionally mirrored to a JSON file."""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 86400.0, path: Optional[str | Path] = None) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = Path(path) if path else None
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        if self.path is not None:
+            self._load()
+
+    @classmethod
+    def from_env(cls) -> "ReportCache":
+        return cls(
+            max_entries=int(os.getenv("NEURO_SENTRY_REPORT_CACHE_SIZE", "256")),
+            ttl=float(os.getenv("NEURO_SENTRY_REPORT_CACHE_TTL", "86400")),
+            path=os.getenv("NEURO_SENTRY_REPORT_CACHE_FILE") or None,
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, key: str, report: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), dict(report))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "persisted": str(self.path) if self.path else None,
+        }
+
+    # --- Persistence (blocking; call via asyncio.to_thread from the event loop) ---
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        with self._lock:
+            data = {key: {"stored_at": ts, "report": report} for key, (ts, report) in self._entries.items()}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        tmp.write_text(json.dumps(data))
+        tmp.replace(self.path)
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            logs.event("report_cache", "unreadable_file", level=logging.WARNING, path=str(self.path), error=str(exc))
+            return
+        now = time.time()
+        for key, entry in sorted(data.items(), key=lambda item: item[1].get("stored_at", 0.0)):
+            stored_at = float(entry.get("stored_at", 0.0))
+            if now - stored_at <= self.ttl and isinstance(entry.get("report"), dict):
+                self._entries[key] = (stored_at, entry["report"])
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+__all__ = ["QUANTA", "ReportCache", "feature_key"]
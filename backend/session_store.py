@@ -0,0 +1,302 @@
+"""Columnar NumPy buffer for one session's vitals frames."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from schemas import PresagePacket
+
+if TYPE_CHECKING:
+    from ingest import VitalsFrame
+
+DEFAULT_CAPACITY = 256
+DEFAULT_LANDMARKS = 468
+
+
+def _to_epoch(ts: datetime) -> float:
+    return ts.timestamp()
+
+
+def _iso(epoch: float) -> str:
+    """Match pydantic's JSON rendering of an aware UTC datetime."""
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _opt(value: Optional[float]) -> float:
+    return np.nan if value is None else value
+
+
+class SessionStore:
+    """Preallocated, growable columns for a session.
+
+    Landmarks live in one float32 ``(frames, landmarks, 3)`` block (z is NaN for
+    2-D points, rows past ``point_counts[i]`` are unused); timestamps (epoch
+    seconds) and vitals are float64 1-D columns with NaN for "not reported".
+    Both axes grow by doubling, so appends are amortised O(1).
+
+    ``landmark_indices`` names the MediaPipe index of each landmark row when the
+    session streams a landmark subset (``None`` = full mesh, row == index).
+    """
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        n_landmarks: Optional[int] = None,
+        landmark_indices: Optional[Sequence[int]] = None,
+    ) -> None:
+        capacity = max(1, capacity)
+        self.landmark_indices = None if landmark_indices is None else tuple(int(i) for i in landmark_indices)
+        if n_landmarks is None:
+            n_landmarks = DEFAULT_LANDMARKS if self.landmark_indices is None else len(self.landmark_indices)
+        self._len = 0
+        self._timestamps = np.empty(capacity, dtype=np.float64)
+        self._heart_rate = np.full(capacity, np.nan, dtype=np.float64)
+        self._breathing_rate = np.full(capacity, np.nan, dtype=np.float64)
+        self._quality = np.full(capacity, np.nan, dtype=np.float64)
+        self._point_counts = np.zeros(capacity, dtype=np.int32)
+        self._landmarks = np.full((capacity, max(1, n_landmarks), 3), np.nan, dtype=np.float32)
+        # Rarely present, so kept sparse by frame index.
+        self.blood_pressure: Dict[int, Dict[str, float]] = {}
+        self.regions: Dict[int, Dict[str, float]] = {}
+
+    # --- Column views (length == number of frames) ---
+
+    def __len__(self) -> int:
+        return self._len
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._timestamps[: self._len]
+
+    @property
+    def heart_rate(self) -> np.ndarray:
+        return self._heart_rate[: self._len]
+
+    @property
+    def breathing_rate(self) -> np.ndarray:
+        return self._breathing_rate[: self._len]
+
+    @property
+    def quality(self) -> np.ndarray:
+        return self._quality[: self._len]
+
+    @property
+    def point_counts(self) -> np.ndarray:
+        return self._point_counts[: self._len]
+
+    @property
+    def landmarks(self) -> np.ndarray:
+        return self._landmarks[: self._len]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the preallocated columns (not just the used part)."""
+        return sum(
+            a.nbytes
+            for a in (
+                self._timestamps,
+                self._heart_rate,
+                self._breathing_rate,
+                self._quality,
+                self._point_counts,
+                self._landmarks,
+            )
+        )
+
+    # --- Appends ---
+
+    def _grow(self, frames: int, landmarks: int) -> None:
+        capacity, width = self._landmarks.shape[:2]
+        new_capacity = max(capacity, 1)
+        while new_capacity < frames:
+            new_capacity *= 2
+        new_width = max(width, landmarks)
+        if new_capacity == capacity and new_width == width:
+            return
+
+        def grown(col: np.ndarray, fill: float) -> np.ndarray:
+            out = np.full(new_capacity, fill, dtype=col.dtype)
+            out[: self._len] = col[: self._len]
+            return out
+
+        self._timestamps = grown(self._timestamps, 0.0)
+        self._heart_rate = grown(self._heart_rate, np.nan)
+        self._breathing_rate = grown(self._breathing_rate, np.nan)
+        self._quality = grown(self._quality, np.nan)
+        self._point_counts = grown(self._point_counts, 0)
+        landmarks_block = np.full((new_capacity, new_width, 3), np.nan, dtype=np.float32)
+        landmarks_block[: self._len, :width] = self._landmarks[: self._len]
+        self._landmarks = landmarks_block
+
+    def append(
+        self,
+        timestamp: float,
+        heart_rate: Optional[float],
+        breathing_rate: Optional[float],
+        quality: Optional[float],
+        points: np.ndarray | Sequence[Sequence[float]],
+        blood_pressure: Optional[Dict[str, float]] = None,
+        regions: Optional[Dict[str, float]] = None,
+    ) -> int:
+        """Append one frame; ``points`` is ``(n, 2)`` or ``(n, 3)``. Returns its index."""
+        i = self._len
+        if isinstance(points, np.ndarray):
+            n = points.shape[0] if points.ndim == 2 else 0
+        else:
+            n = len(points)
+        self._grow(i + 1, n)
+
+        self._timestamps[i] = timestamp
+        self._heart_rate[i] = _opt(heart_rate)
+        self._breathing_rate[i] = _opt(breathing_rate)
+        self._quality[i] = _opt(quality)
+        self._point_counts[i] = n
+        if n:
+            if not isinstance(points, np.ndarray):
+                try:
+                    points = np.asarray(points, dtype=np.float32)
+                except ValueError:  # ragged: mixed 2-D and 3-D points
+                    row = self._landmarks[i]
+                    for j, pt in enumerate(points):
+                        row[j, : len(pt)] = pt
+                    points = None
+            if points is not None:
+                dims = min(points.shape[1], 3)
+                self._landmarks[i, :n, :dims] = points[:, :dims]
+        if blood_pressure:
+            self.blood_pressure[i] = blood_pressure
+        if regions:
+            self.regions[i] = regions
+        self._len = i + 1
+        return i
+
+    @classmethod
+    def from_columns(
+        cls,
+        timestamps: np.ndarray,
+        heart_rate: np.ndarray,
+        breathing_rate: np.ndarray,
+        quality: np.ndarray,
+        point_counts: np.ndarray,
+        landmarks: np.ndarray,
+        blood_pressure: Optional[Dict[int, Dict[str, float]]] = None,
+        regions: Optional[Dict[int, Dict[str, float]]] = None,
+        landmark_indices: Optional[Sequence[int]] = None,
+    ) -> "SessionStore":
+        """Wrap existing (e.g. memory-mapped) columns without copying them.
+
+        The result is meant for reading; appending reallocates into RAM.
+        """
+        store = cls.__new__(cls)
+        store.landmark_indices = None if landmark_indices is None else tuple(int(i) for i in landmark_indices)
+        store._len = int(timestamps.shape[0])
+        store._timestamps = timestamps
+        store._heart_rate = heart_rate
+        store._breathing_rate = breathing_rate
+        store._quality = quality
+        store._point_counts = point_counts
+        store._landmarks = landmarks
+        store.blood_pressure = blood_pressure or {}
+        store.regions = regions or {}
+        return store
+
+    @classmethod
+    def from_dumps(cls, packets: Sequence[Dict[str, Any]]) -> "SessionStore":
+        """Build a store from raw-dump style dicts (``face_points`` etc.)."""
+        store = cls(capacity=len(packets))
+        for p in packets:
+            ts = p.get("timestamp")
+            if isinstance(ts, str):
+                ts = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+            store.append(
+                _to_epoch(ts) if isinstance(ts, datetime) else float(ts or 0.0),
+                p.get("heart_rate"),
+                p.get("breathing_rate"),
+                p.get("quality"),
+                p.get("face_points") or [],
+                p.get("blood_pressure"),
+                p.get("regions"),
+            )
+        return store
+
+    def append_packet(self, packet: PresagePacket) -> int:
+        return self.append(
+            _to_epoch(packet.timestamp),
+            packet.heart_rate,
+            packet.breathing_rate,
+            packet.quality,
+            packet.face_points,
+            packet.blood_pressure,
+            packet.regions,
+        )
+
+    def append_frame(self, frame: "VitalsFrame") -> int:
+        """Append a fast-path frame; its landmarks are already one array."""
+        return self.append(
+            frame.timestamp,
+            frame.heart_rate,
+            frame.breathing_rate,
+            frame.quality,
+            frame.points,
+            frame.blood_pressure,
+            frame.regions,
+        )
+
+    # --- Reads ---
+
+    def frame_points(self, i: int) -> List[List[float]]:
+        """Landmarks of frame ``i`` as ``[x, y]``/``[x, y, z]`` lists."""
+        n = int(self._point_counts[i])
+        pts = self._landmarks[i, :n]
+        z = pts[:, 2]
+        if np.isnan(z).all():
+            return pts[:, :2].tolist()
+        if not np.isnan(z).any():
+            return pts.tolist()
+        return [p[:2] if p[2] != p[2] else p for p in pts.tolist()]
+
+    def frame_dump(self, i: int) -> Dict[str, Any]:
+        """Frame ``i`` shaped like ``PresagePacket.model_dump(mode="json")``."""
+
+        def value(col: np.ndarray) -> Optional[float]:
+            v = col[i]
+            return None if v != v else float(v)
+
+        dump = {
+            "type": "vitals",
+            "timestamp": _iso(float(self._timestamps[i])),
+            "heart_rate": value(self._heart_rate),
+            "breathing_rate": value(self._breathing_rate),
+            "quality": value(self._quality),
+            "blood_pressure": self.blood_pressure.get(i),
+            "face_points": self.frame_points(i),
+            "regions": self.regions.get(i, {}),
+        }
+        if self.landmark_indices is not None:
+            dump["face_point_indices"] = list(self.landmark_indices[: int(self._point_counts[i])])
+        return dump
+
+    def iter_dump(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        stop = self._len if stop is None else min(stop, self._len)
+        for i in range(start, stop):
+            yield self.frame_dump(i)
+
+    def iter_dump_chunks(self, chunk_size: int, start: int = 0, stop: Optional[int] = None) -> Iterator[List[Dict[str, Any]]]:
+        """Raw dump in lists of at most ``chunk_size`` frames."""
+        stop = self._len if stop is None else min(stop, self._len)
+        for offset in range(start, stop, max(1, chunk_size)):
+            yield list(self.iter_dump(offset, min(offset + chunk_size, stop)))
+
+    def to_dump(self) -> List[Dict[str, Any]]:
+        return list(self.iter_dump())
+
+    def duration_ms(self) -> float:
+        if not self._len:
+            return 0
+        return float(self._timestamps[self._len - 1] - self._timestamps[0]) * 1000
+
+
+__all__ = ["DEFAULT_CAPACITY", "DEFAULT_LANDMARKS", "SessionStore"]
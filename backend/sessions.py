@@ -0,0 +1,137 @@
+"""Per-device session registry so concurrent bridges don't clobber each other."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from dataclasses import dataclass, field, replace
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from landmark_profile import LandmarkProfile
+from provisional import RollingTriage
+from session_store import SessionStore
+from streaming_stats import SessionAccumulator
+
+if TYPE_CHECKING:
+    from ingest import VitalsFrame
+
+# Finished sessions are kept for late /live_state subscribers; cap how many.
+MAX_SESSIONS = int(os.getenv("NEURO_SENTRY_MAX_SESSIONS", "32"))
+
+
+@dataclass
+class Session:
+    """One bridge's scan: its own lock, columnar frame store and last results."""
+
+    session_id: str
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    store: SessionStore = field(default_factory=SessionStore)
+    accumulator: SessionAccumulator = field(default_factory=SessionAccumulator)
+    active: bool = False
+    # Frames of the last finished scan; raw dumps are rendered from it in chunks on demand.
+    last_store: Optional[SessionStore] = None
+    last_final_report: Optional[Dict[str, Any]] = None
+    # "local" or "gemini": which engine produced last_final_report
+    last_report_engine: Optional[str] = None
+    # Rolling-window evaluator and the Gemini call it may start before session_end
+    provisional: RollingTriage = field(default_factory=RollingTriage)
+    early_report: Optional[asyncio.Task] = None
+    last_time_to_report_ms: Optional[float] = None
+    # Negotiated on session_start; under a subset profile full meshes are kept apart, rate-limited
+    profile: LandmarkProfile = field(default_factory=LandmarkProfile)
+    mesh_store: SessionStore = field(default_factory=lambda: SessionStore(capacity=16))
+    last_mesh_store: Optional[SessionStore] = None
+    _last_mesh_ts: float = float("-inf")
+
+    def new_store(self) -> SessionStore:
+        return SessionStore(landmark_indices=self.profile.indices)
+
+    def reset(self, profile: Optional[LandmarkProfile] = None) -> None:
+        """Start a fresh scan. Caller must hold ``lock``."""
+        if profile is not None:
+            self.profile = profile
+        self.store = self.new_store()
+        self.mesh_store = SessionStore(capacity=16)
+        self.last_mesh_store = None
+        self._last_mesh_ts = float("-inf")
+        self.accumulator = SessionAccumulator()
+        self.active = True
+        self.last_store = None
+        self.last_final_report = None
+        self.last_report_engine = None
+        self.provisional = RollingTriage()
+        if self.early_report is not None:
+            self.early_report.cancel()
+            self.early_report = None
+
+    def append_frame(self, frame: "VitalsFrame") -> int:
+        """Add a vitals frame to the analysis store. Caller must hold ``lock``.
+
+        Under a subset profile a full-mesh frame contributes its subset rows to
+        ``store`` and, at most ``mesh_hz`` times a second, the whole mesh to ``mesh_store``.
+        """
+        profile = self.profile
+        if profile.is_subset and profile.is_full_mesh(frame.points):
+            if profile.mesh_hz and frame.timestamp - self._last_mesh_ts >= 1.0 / profile.mesh_hz:
+                self.mesh_store.append(frame.timestamp, None, None, None, frame.points)
+                self._last_mesh_ts = frame.timestamp
+            frame = replace(frame, points=profile.subset(frame.points))
+        return self.store.append_frame(frame)
+
+    def finish(self) -> SessionStore:
+        """End the scan: hand back its store and start empty ones. Caller must hold ``lock``."""
+        store = self.store
+        self.store = self.new_store()
+        self.last_mesh_store, self.mesh_store = self.mesh_store, SessionStore(capacity=16)
+        self.active = False
+        return store
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "session_id": self.session_id,
+            "active": self.active,
+            "packet_count": len(self.store),
+            "last_frame_count": len(self.last_store) if self.last_store is not None else 0,
+            "has_final_report": self.last_final_report is not None,
+            "report_engine": self.last_report_engine,
+            "time_to_report_ms": self.last_time_to_report_ms,
+            "landmark_profile": self.profile.name,
+            "mesh_frame_count": len(self.mesh_store),
+        }
+
+
+class SessionRegistry:
+    """Sessions keyed by device/session id.
+
+    Lookups never await, so the dict itself needs no lock; every session
+    carries its own lock for its buffer and results.
+    """
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS) -> None:
+        self.max_sessions = max_sessions
+        self._sessions: Dict[str, Session] = {}
+
+    def get(self, session_id: str) -> Optional[Session]:
+        return self._sessions.get(session_id)
+
+    def get_or_create(self, session_id: str) -> Session:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = Session(session_id=session_id)
+            self._sessions[session_id] = session
+            self._evict()
+        return session
+
+    def all(self) -> List[Session]:
+        return list(self._sessions.values())
+
+    def _evict(self) -> None:
+        """Drop the oldest inactive sessions once over the cap."""
+        overflow = len(self._sessions) - self.max_sessions
+        if overflow <= 0:
+            return
+        for session_id in [s.session_id for s in self._sessions.values() if not s.active][:overflow]:
+            del self._sessions[session_id]
+
+
+__all__ = ["MAX_SESSIONS", "Session", "SessionRegistry"]
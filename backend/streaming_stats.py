@@ -0,0 +1,148 @@
+"""Running per-session accumulators so final stats are ready when session_end arrives."""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from features import analysis_mask, asymmetry_features, asymmetry_frames, quality_weights, robust_summary
+from session_store import SessionStore
+
+
+@dataclass
+class RunningStat:
+    """Welford's online mean/variance."""
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def update(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    @property
+    def variance(self) -> Optional[float]:
+        return self.m2 / (self.count - 1) if self.count > 1 else None
+
+    @property
+    def std(self) -> Optional[float]:
+        var = self.variance
+        return math.sqrt(var) if var is not None else None
+
+    def mean_or_none(self) -> Optional[float]:
+        return self.mean if self.count else None
+
+
+class GrowableSeries:
+    """Append-only float64 column (amortised O(1) appends) for per-frame values."""
+
+    def __init__(self, capacity: int = 256) -> None:
+        self._data = np.empty(max(1, capacity), dtype=np.float64)
+        self._len = 0
+
+    def __len__(self) -> int:
+        return self._len
+
+    def append(self, value: float) -> None:
+        if self._len == self._data.shape[0]:
+            grown = np.empty(self._data.shape[0] * 2, dtype=np.float64)
+            grown[: self._len] = self._data[: self._len]
+            self._data = grown
+        self._data[self._len] = value
+        self._len += 1
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._data[: self._len]
+
+
+@dataclass
+class SessionAccumulator:
+    """Everything ``compute_stats``/``compute_bio_features`` need, updated per frame."""
+
+    count: int = 0
+    first_ts: Optional[float] = None
+    last_ts: Optional[float] = None
+    heart_rate: RunningStat = field(default_factory=RunningStat)
+    breathing_rate: RunningStat = field(default_factory=RunningStat)
+    quality: RunningStat = field(default_factory=RunningStat)
+    # Raw (unnormalised) y-offsets, as in compute_stats
+    mouth_raw: RunningStat = field(default_factory=RunningStat)
+    brow_raw: RunningStat = field(default_factory=RunningStat)
+    # Face-height normalised mouth asymmetry over full-mesh frames, as in compute_bio_features
+    mouth_index: RunningStat = field(default_factory=RunningStat)
+    # The same per-frame values and their quality weights, for robust aggregation
+    mouth_series: GrowableSeries = field(default_factory=GrowableSeries)
+    mouth_weights: GrowableSeries = field(default_factory=GrowableSeries)
+
+    def observe(self, store: SessionStore, i: int) -> None:
+        """Fold frame ``i`` of ``store`` into the running totals."""
+        ts = float(store.timestamps[i])
+        if self.first_ts is None:
+            self.first_ts = ts
+        self.last_ts = ts
+        self.count += 1
+
+        for stat, col in ((self.heart_rate, store.heart_rate), (self.breathing_rate, store.breathing_rate), (self.quality, store.quality)):
+            value = col[i]
+            if value == value:  # not NaN
+                stat.update(float(value))
+
+        counts = store.point_counts[i : i + 1]
+        asym = asymmetry_frames(store.landmarks[i : i + 1], counts, store.landmark_indices)
+        if asym.has_points[0]:
+            self.mouth_raw.update(float(asym.mouth_raw[0]))
+            self.brow_raw.update(float(asym.brow_raw[0]))
+            if analysis_mask(asym, counts, store.landmark_indices)[0]:
+                self.mouth_index.update(float(asym.mouth[0]))
+                self.mouth_series.append(float(asym.mouth[0]))
+                self.mouth_weights.append(float(quality_weights(store.quality[i : i + 1])[0]))
+
+    def stats(self) -> Dict[str, Any]:
+        """Same shape as ``compute_stats`` over the frames seen so far."""
+        if not self.count:
+            return {"count": 0, "heart_rate_mean": None, "breathing_rate_mean": None, "quality_mean": None, "duration_ms": 0}
+
+        def percent(stat: RunningStat) -> Optional[float]:
+            return stat.mean * 100 if stat.count else None
+
+        return {
+            "count": self.count,
+            "heart_rate_mean": self.heart_rate.mean_or_none(),
+            "breathing_rate_mean": self.breathing_rate.mean_or_none(),
+            "quality_mean": self.quality.mean_or_none(),
+            "mouth_asymmetry_mean": percent(self.mouth_raw),
+            "brow_asymmetry_mean": percent(self.brow_raw),
+            "duration_ms": (self.last_ts - self.first_ts) * 1000,
+        }
+
+    def bio_features(self) -> Dict[str, float]:
+        """Same shape as ``compute_bio_features`` over the frames seen so far."""
+        values = self.mouth_series.values
+        summary = robust_summary(values, np.ones(values.shape[0], dtype=bool), self.mouth_weights.values)
+        return asymmetry_features(summary, self.mouth_index.count)
+
+    def partial(self) -> Dict[str, Any]:
+        """Compact running stats for the ``live`` broadcast."""
+
+        def rounded(value: Optional[float], digits: int = 2) -> Optional[float]:
+            return None if value is None else round(value, digits)
+
+        return {
+            "heart_rate_mean": rounded(self.heart_rate.mean_or_none()),
+            "heart_rate_std": rounded(self.heart_rate.std),
+            "breathing_rate_mean": rounded(self.breathing_rate.mean_or_none()),
+            "breathing_rate_std": rounded(self.breathing_rate.std),
+            "quality_mean": rounded(self.quality.mean_or_none(), 3),
+            "mouth_asymmetry_index": rounded(self.mouth_index.mean_or_none(), 4),
+            "duration_ms": (self.last_ts - self.first_ts) * 1000 if self.count else 0,
+        }
+
+
+__all__ = ["GrowableSeries", "RunningStat", "SessionAccumulator"]
@@ -0,0 +1,6 @@
+"""Backend modules import each other as top-level modules (``from features import ...``)."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,26 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", None)
+    return TestClient(main.app)
+
+
+def test_non_loopback_peer_rejected_without_token(client):
+    assert client.get("/admin/profile").status_code == 403
+
+
+def test_allowed_peer_admitted(client, monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_HOSTS", {"testclient"})
+    assert client.get("/admin/profile").status_code == 200
+
+
+def test_token_required_when_set(client, monkeypatch):
+    monkeypatch.setattr(main, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(main, "ADMIN_HOSTS", {"testclient"})
+    assert client.get("/admin/profile").status_code == 403
+    assert client.get("/admin/profile", headers={"X-Admin-Token": "secret"}).status_code == 200
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from ingest import MAX_POINTS, FrameValidationError, landmark_array, parse_vitals, parse_vitals_strict
+
+
+def _points(n):
+    return np.zeros((n, 3)).tolist()
+
+
+def test_full_mesh_accepted():
+    assert landmark_array(_points(MAX_POINTS)).shape == (MAX_POINTS, 3)
+
+
+@pytest.mark.parametrize("parse", [parse_vitals, parse_vitals_strict])
+def test_frame_over_point_cap_rejected(parse):
+    with pytest.raises(FrameValidationError):
+        parse({"timestamp": 0.0, "face_points": _points(MAX_POINTS + 1)})
+
+
+def test_ragged_frame_over_point_cap_rejected():
+    points = _points(MAX_POINTS) + [[0.0, 0.0]]
+    with pytest.raises(FrameValidationError):
+        landmark_array(points)
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from features import FULL_MESH_POINTS, KEY_INDICES
+from landmark_profile import LandmarkProfile
+from session_store import DEFAULT_LANDMARKS
+
+
+def test_custom_indices_include_key_indices():
+    profile = LandmarkProfile.from_request({"indices": [10, 467], "mesh_hz": 2})
+    assert profile.indices == tuple(sorted({10, 467, *KEY_INDICES}))
+    assert profile.mesh_hz == 2.0
+
+
+def test_index_past_mesh_rejected():
+    with pytest.raises(ValueError):
+        LandmarkProfile.from_request({"indices": [DEFAULT_LANDMARKS]})
+
+
+def test_profile_longer_than_subset_cap_rejected():
+    with pytest.raises(ValueError):
+        LandmarkProfile.from_request({"indices": range(DEFAULT_LANDMARKS)})
+    profile = LandmarkProfile.from_request({"indices": range(FULL_MESH_POINTS - len(KEY_INDICES))})
+    assert len(profile.indices) <= FULL_MESH_POINTS
+    assert not profile.is_full_mesh(np.zeros((len(profile.indices), 3), dtype=np.float32))
+
+
+def test_negative_index_rejected():
+    with pytest.raises(ValueError):
+        LandmarkProfile.from_request({"indices": [-1]})
+
+
+def test_non_iterable_indices_rejected():
+    with pytest.raises(ValueError):
+        LandmarkProfile.from_request({"indices": 5})
+
+
+@pytest.mark.parametrize("indices", ["1,33", {"a": 1}, {1: 2}])
+def test_string_or_mapping_indices_rejected(indices):
+    with pytest.raises(ValueError):
+        LandmarkProfile.from_request({"indices": indices})
+
+
+@pytest.mark.parametrize("entry", [{"i": 1}, [1], 1.5, "1", True, None])
+def test_non_int_entries_rejected(entry):
+    with pytest.raises(ValueError):
+        LandmarkProfile.from_request({"indices": [1, entry]})
+
+
+def test_subset_of_short_mesh_keeps_leading_indices():
+    profile = LandmarkProfile.from_request({"indices": [450]})
+    points = np.arange(420 * 3, dtype=np.float32).reshape(420, 3)
+    rows = profile.subset(points)
+    assert rows.shape[0] == len(KEY_INDICES)
+    np.testing.assert_array_equal(rows, points[sorted(KEY_INDICES)])
@@ -0,0 +1,58 @@
+import numpy as np
+
+from live_clients import LiveClient
+from live_policy import LiveEncoder, LivePolicy
+
+
+def _delta_encoder() -> LiveEncoder:
+    return LiveEncoder(LivePolicy.from_params({"delta": "1", "keyframe_every": "3"}))
+
+
+def _quantized(encoder: LiveEncoder, shift: float = 0.0) -> dict:
+    points = np.array([[10.0, 20.0], [30.0, 40.0], [50.0, 80.0]]) + shift
+    return encoder.encode({}, points, now=0.0)["data"]["face_points_q"]
+
+
+def test_deltas_name_their_keyframe():
+    encoder = _delta_encoder()
+    key = _quantized(encoder)
+    delta = _quantized(encoder, 1.0)
+    assert key["key"] and not delta["key"]
+    assert delta["key_id"] == key["key_id"]
+    encoder.request_keyframe()
+    assert _quantized(encoder)["key_id"] != key["key_id"]
+
+
+def test_keyframe_ids_unique_across_encoders():
+    assert _quantized(_delta_encoder())["key_id"] != _quantized(_delta_encoder())["key_id"]
+
+
+def test_keyframe_dropped_last():
+    client = LiveClient(websocket=None, max_pending=2)
+    client.enqueue("key", keyframe_of="s")
+    client.enqueue("delta-1")
+    client.enqueue("delta-2")
+    assert [entry[1] for entry in client._queue] == ["key", "delta-2"]
+    assert not client.take_lost_keyframe("s")
+
+
+def test_dropped_keyframe_is_reported_once():
+    client = LiveClient(websocket=None, max_pending=1)
+    client.enqueue("key-1", keyframe_of="s")
+    client.enqueue("key-2", keyframe_of="s")
+    assert [entry[1] for entry in client._queue] == ["key-2"]
+    assert client.dropped == 1
+    assert client.take_lost_keyframe("s")
+    assert not client.take_lost_keyframe("s")
+
+
+def test_non_droppable_backlog_is_bounded():
+    client = LiveClient(websocket=None, max_backlog=10)
+    client.enqueue("chunk", droppable=False)
+    client.enqueue("chunk", droppable=False)
+    assert not client.closed
+    client.enqueue("chunk", droppable=False)
+    assert client.closed and client.overflowed
+    assert client.pending == 0
+    client.enqueue("final", droppable=False)
+    assert client.pending == 0
@@ -0,0 +1,41 @@
+import asyncio
+import threading
+
+import pytest
+
+from model_backends import ModelBackend, TriageRunner
+
+
+class BlockingBackend(ModelBackend):
+    name = "blocking"
+
+    def __init__(self) -> None:
+        self.release = threading.Event()
+
+    def generate(self, prompt, schema):
+        self.release.wait(5)
+        return {"risk_level": "LOW"}
+
+
+def test_timed_out_call_holds_its_slot_until_the_thread_returns():
+    backend = BlockingBackend()
+    runner = TriageRunner(backend, workers=1, timeout=0.05)
+
+    async def scenario():
+        with pytest.raises(asyncio.TimeoutError):
+            await runner.generate("prompt", {})
+        assert runner.in_flight == 1
+        assert runner._semaphore.locked()
+        backend.release.set()
+        for _ in range(100):
+            if not runner._semaphore.locked():
+                break
+            await asyncio.sleep(0.01)
+        assert runner.in_flight == 0
+        assert await runner.generate("prompt", {}) == {"risk_level": "LOW"}
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        backend.release.set()
+        runner.shutdown()
@@ -0,0 +1,38 @@
+import math
+
+from report_cache import feature_key
+
+
+def _key(mouth, **stats):
+    return feature_key({"count": 300, "heart_rate_mean": 72.0, **stats}, {"mouth_asymmetry_index": mouth, "packets_analyzed": 300})
+
+
+def test_same_bucket_shares_a_key():
+    assert _key(0.031, heart_rate_mean=72.4) == _key(0.033, heart_rate_mean=73.1)
+
+
+def test_neighbouring_buckets_differ():
+    assert _key(0.031) != _key(0.036)
+    assert _key(0.03, heart_rate_mean=72.0) != _key(0.03, heart_rate_mean=74.0)
+
+
+def test_cpss_threshold_separates_keys():
+    for threshold in (0.02, 0.08, 0.15):
+        assert _key(threshold - 1e-6) != _key(threshold)
+
+
+def test_prompt_version_is_part_of_the_key():
+    stats, features = {"count": 300}, {"mouth_asymmetry_index": 0.05}
+    assert feature_key(stats, features, "v1") != feature_key(stats, features, "v2")
+
+
+def test_missing_and_non_finite_values_match():
+    assert _key(0.05, quality_mean=None) == _key(0.05, quality_mean=math.nan)
+
+
+def test_nested_dsp_values_are_bucketed():
+    def key(rate):
+        return feature_key({"vitals_dsp": {"heart_rate": {"weighted_mean": rate}}}, {"mouth_asymmetry_index": 0.05})
+
+    assert key(70.1) == key(71.9)
+    assert key(70.1) != key(72.1)
@@ -0,0 +1,37 @@
+import numpy as np
+
+from session_store import SessionStore
+
+
+def _points(n, value):
+    return np.full((n, 2), value, dtype=np.float32)
+
+
+def test_append_past_capacity_keeps_frames():
+    store = SessionStore(capacity=2, n_landmarks=3)
+    for i in range(5):
+        store.append(float(i), 60.0 + i, None, 0.9, _points(3, i))
+    assert len(store) == 5
+    assert store._timestamps.shape[0] == 8
+    np.testing.assert_array_equal(store.timestamps, np.arange(5.0))
+    np.testing.assert_array_equal(store.heart_rate, 60.0 + np.arange(5.0))
+    assert np.isnan(store.breathing_rate).all()
+    np.testing.assert_array_equal(store.landmarks[:, 0, 0], np.arange(5.0))
+
+
+def test_wider_frame_widens_every_row():
+    store = SessionStore(capacity=4, n_landmarks=2)
+    store.append(0.0, None, None, None, _points(2, 1.0))
+    store.append(1.0, None, None, None, _points(5, 2.0))
+    assert store.landmarks.shape == (2, 5, 3)
+    np.testing.assert_array_equal(store.point_counts, [2, 5])
+    np.testing.assert_array_equal(store.landmarks[0, :2, :2], _points(2, 1.0))
+    assert np.isnan(store.landmarks[0, 2:]).all()
+    np.testing.assert_array_equal(store.landmarks[1, :, :2], _points(5, 2.0))
+
+
+def test_narrower_frame_does_not_shrink():
+    store = SessionStore(capacity=4, n_landmarks=5)
+    store.append(0.0, None, None, None, _points(2, 1.0))
+    assert store.landmarks.shape == (1, 5, 3)
+    assert store.point_counts[0] == 2
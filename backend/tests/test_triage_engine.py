@@ -0,0 +1,57 @@
+import pytest
+
+from triage_engine import MIN_FRAMES, accept_escalation, local_triage, needs_escalation
+
+
+@pytest.mark.parametrize("frames", [0, 1, MIN_FRAMES - 1])
+def test_too_few_frames_is_inconclusive(frames):
+    features = {"mouth_asymmetry_index": 0.0, "packets_analyzed": frames}
+    report = local_triage({}, features)
+    assert report["risk_level"] == "MED"
+    assert report["summary"].startswith("Insufficient data")
+    assert report["confidence"] < 0.5
+    # The prompt would read the near-zero index as healthy, so the model is not asked
+    assert not needs_escalation(features)
+
+
+@pytest.mark.parametrize("mouth", [0.0, 0.1, 0.3])
+def test_insufficient_data_is_never_escalated(mouth):
+    assert not needs_escalation({"mouth_asymmetry_index": mouth, "packets_analyzed": 5})
+
+
+def test_missing_features_are_inconclusive():
+    assert not needs_escalation({})
+    assert local_triage({}, {})["summary"].startswith("Insufficient data")
+
+
+@pytest.mark.parametrize("mouth, risk", [(0.01, "LOW"), (0.05, "LOW"), (0.1, "MED"), (0.3, "HIGH")])
+def test_enough_frames_use_cpss_bands(mouth, risk):
+    features = {"mouth_asymmetry_index": mouth, "packets_analyzed": MIN_FRAMES}
+    assert local_triage({}, features)["risk_level"] == risk
+    assert needs_escalation(features) == (risk == "MED")
+
+
+def _report(risk, **extra):
+    return {"risk_level": risk, "stroke_probability": 0.5, "confidence": 0.9, **extra}
+
+
+@pytest.mark.parametrize("local", ["LOW", "MED", "HIGH"])
+def test_fallback_never_replaces_local_report(local):
+    assert not accept_escalation(_report(local), _report("LOW", fallback=True))
+
+
+@pytest.mark.parametrize("escalated, accepted", [("LOW", False), ("MED", False), ("HIGH", True)])
+def test_escalation_never_downgrades_high(escalated, accepted):
+    assert accept_escalation(_report("HIGH"), _report(escalated)) == accepted
+
+
+@pytest.mark.parametrize("escalated", ["LOW", "MED", "HIGH"])
+def test_escalation_settles_ambiguous_scan(escalated):
+    assert accept_escalation(_report("MED"), _report(escalated))
+
+
+@pytest.mark.parametrize("local, escalated, accepted", [
+    ("HIGH", "HIGH", True), ("HIGH", "MED", False), ("MED", "LOW", False), ("MED", "HIGH", True), ("LOW", "LOW", True),
+])
+def test_early_report_only_confirms(local, escalated, accepted):
+    assert accept_escalation(_report(local), _report(escalated), confirmation=True) == accepted
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from ingest import MAX_POINTS, FrameValidationError
+from wire import HEADER, decode_frame, encode_frame
+
+
+def test_frame_over_point_cap_rejected():
+    data = encode_frame(0.0, np.zeros((MAX_POINTS + 1, 3), dtype=np.float32))
+    with pytest.raises(FrameValidationError):
+        decode_frame(data)
+
+
+@pytest.mark.parametrize("dims", [2, 3])
+def test_round_trip(dims):
+    points = np.arange(468 * dims, dtype=np.float32).reshape(468, dims)
+    frame = decode_frame(encode_frame(1767225600.25, points, heart_rate=71.5, quality=0.75))
+    assert frame.timestamp == 1767225600.25
+    assert frame.heart_rate == 71.5
+    assert frame.breathing_rate is None
+    assert frame.quality == 0.75
+    np.testing.assert_array_equal(frame.points, points)
+
+
+def test_empty_frame_round_trips():
+    frame = decode_frame(encode_frame(0.0, np.empty((0, 2), dtype=np.float32)))
+    assert frame.points.shape == (0, 2)
+
+
+def _header_with(**fields):
+    values = dict(zip(
+        ("magic", "version", "dims", "flags", "n", "r0", "ts", "hr", "br", "quality", "r1"),
+        HEADER.unpack_from(encode_frame(0.0, np.zeros((2, 2), dtype=np.float32))),
+    ))
+    values.update(fields)
+    return HEADER.pack(*values.values())
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"NSV1",
+        _header_with(magic=b"NSV2") + bytes(16),
+        _header_with(version=2) + bytes(16),
+        _header_with(dims=4) + bytes(32),
+        _header_with() + bytes(12),
+        _header_with() + bytes(20),
+    ],
+    ids=["short", "magic", "version", "dims", "truncated", "trailing"],
+)
+def test_malformed_frame_rejected(data):
+    with pytest.raises(FrameValidationError):
+        decode_frame(data)
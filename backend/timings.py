@@ -0,0 +1,41 @@
+"""Rolling latency summaries for user-visible waits (e.g. session_end -> final report)."""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Any, Deque, Dict
+
+import numpy as np
+
+
+class LatencyWindow:
+    """Last ``size`` samples in milliseconds plus an all-time count."""
+
+    def __init__(self, size: int = 256) -> None:
+        self.count = 0
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def record(self, ms: float) -> None:
+        self.count += 1
+        self._samples.append(float(ms))
+
+    @property
+    def last(self) -> float | None:
+        return self._samples[-1] if self._samples else None
+
+    def summary(self) -> Dict[str, Any]:
+        if not self._samples:
+            return {"count": self.count, "last_ms": None, "mean_ms": None, "p50_ms": None, "p95_ms": None, "max_ms": None}
+        values = np.fromiter(self._samples, dtype=np.float64)
+        p50, p95 = np.percentile(values, [50, 95])
+        return {
+            "count": self.count,
+            "last_ms": round(self._samples[-1], 2),
+            "mean_ms": round(float(values.mean()), 2),
+            "p50_ms": round(float(p50), 2),
+            "p95_ms": round(float(p95), 2),
+            "max_ms": round(float(values.max()), 2),
+        }
+
+
+__all__ = ["LatencyWindow"]
@@ -0,0 +1,144 @@
+"""In-process CPSS triage: the rules ``build_triage_prompt`` hands to Gemini, evaluated locally.
+
+``local_triage`` returns the same report schema as the model in microseconds.
+Only scans whose mouth asymmetry falls in the ambiguous band are worth
+escalating to the LLM. Scans with too few full-mesh frames to judge (including
+none at all) get an "insufficient data" report and are not escalated: the
+prompt would read their near-zero index as healthy. An escalated answer
+replaces the local one only if ``accept_escalation`` allows it.
+
+    NEURO_SENTRY_TRIAGE_MODE=local-first   local report now, Gemini in the background when ambiguous
+                             llm           always wait for Gemini (original behaviour)
+                             local         never call Gemini
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, Mapping, Optional
+
+import numpy as np
+
+TRIAGE_MODE = os.getenv("NEURO_SENTRY_TRIAGE_MODE", "local-first").strip().lower()
+
+# Thresholds on mouth_asymmetry_index (see CPSS_PROTOCOL in gemini_prompt.py)
+NORMAL_LIMIT = 0.02   # within normal physiological limits
+SAFE_LIMIT = 0.08     # < 8%: clinically insignificant
+LESION_LIMIT = 0.15   # > 15%: probable lesion
+# Full-mesh frames below which the index is too noisy to trust on its own
+MIN_FRAMES = 15
+
+# Piecewise-linear stroke probability over the asymmetry index
+_PROB_X = (0.0, NORMAL_LIMIT, SAFE_LIMIT, LESION_LIMIT, 0.30)
+_PROB_Y = (0.01, 0.02, 0.05, 0.50, 0.90)
+
+
+def cpss_band(mouth: float) -> str:
+    if mouth < NORMAL_LIMIT:
+        return "normal"
+    if mouth < SAFE_LIMIT:
+        return "mild"
+    if mouth <= LESION_LIMIT:
+        return "ambiguous"
+    return "lesion"
+
+
+def insufficient_data(features: Mapping[str, Any]) -> bool:
+    """Too few full-mesh frames (possibly none) for the index to mean anything."""
+    return int(features.get("packets_analyzed") or 0) < MIN_FRAMES
+
+
+def needs_escalation(features: Mapping[str, Any]) -> bool:
+    """Ambiguous asymmetry over enough frames; inconclusive scans keep their local report."""
+    mouth = float(features.get("mouth_asymmetry_index") or 0.0)
+    return not insufficient_data(features) and cpss_band(mouth) == "ambiguous"
+
+
+_SEVERITY = {"LOW": 0, "MED": 1, "HIGH": 2}
+
+
+def accept_escalation(local: Mapping[str, Any], escalated: Mapping[str, Any], confirmation: bool = False) -> bool:
+    """Whether the model's report may replace ``local``: never a failure fallback, never a downgrade of HIGH.
+
+    A ``confirmation`` (the early call, made on partial stats while the scan
+    was streaming) may only keep or raise the local risk level.
+    """
+    if escalated.get("fallback"):
+        return False
+    local_level = _SEVERITY.get(str(local.get("risk_level")), 0)
+    level = _SEVERITY.get(str(escalated.get("risk_level")), -1)
+    if confirmation:
+        return level >= local_level
+    return local.get("risk_level") != "HIGH" or level == _SEVERITY["HIGH"]
+
+
+def local_triage(stats: Mapping[str, Any], features: Mapping[str, Any]) -> Dict[str, Any]:
+    """CPSS facial-droop rules as a report dict (same keys as the Gemini schema)."""
+    mouth = float(features.get("mouth_asymmetry_index") or 0.0)
+    frames = int(features.get("packets_analyzed") or 0)
+    band = cpss_band(mouth)
+    probability = float(np.interp(mouth, _PROB_X, _PROB_Y))
+    hr: Optional[float] = stats.get("heart_rate_mean")
+    dsp_hr = (stats.get("vitals_dsp") or {}).get("heart_rate") or {}
+    if dsp_hr.get("weighted_mean") is not None:
+        hr = dsp_hr["weighted_mean"]  # outlier-gated, quality-weighted
+
+    if insufficient_data(features):
+        # Inconclusive, not normal: an index over a handful of frames (or none) says nothing
+        risk = "MED"
+        summary = f"Insufficient data: {frames} usable full-mesh frames, at least {MIN_FRAMES} needed to assess facial droop."
+        recommendation = "Repeat the scan facing the camera in good light; seek medical evaluation if symptoms are present."
+        confidence = 0.5 * frames / MIN_FRAMES
+    elif band == "lesion":
+        risk = "HIGH"
+        summary = f"Significant unilateral facial droop detected (asymmetry {mouth:.1%})."
+        recommendation = "Call emergency services now and note the time symptoms started."
+        # Distance past the lesion threshold, saturating at 2x
+        confidence = 0.75 + 0.2 * min(1.0, (mouth - LESION_LIMIT) / LESION_LIMIT)
+    elif band == "ambiguous":
+        risk = "MED"
+        summary = f"Moderate facial asymmetry (asymmetry {mouth:.1%}) between the safe and lesion thresholds."
+        recommendation = "Repeat the scan facing the camera; seek medical evaluation if asymmetry persists or other symptoms appear."
+        confidence = 0.5
+    else:
+        risk = "LOW"
+        summary = (
+            "Facial symmetry within normal physiological limits."
+            if band == "normal"
+            else f"Minor facial asymmetry (asymmetry {mouth:.1%}), below the clinical threshold."
+        )
+        recommendation = "No action needed. Repeat the scan if symptoms appear."
+        # Distance below the safe threshold
+        confidence = 0.7 + 0.25 * (SAFE_LIMIT - mouth) / SAFE_LIMIT
+
+    rationale = (
+        f"CPSS facial droop: mouth_asymmetry_index={mouth:.4f} over {frames} full-mesh frames "
+        f"(normal < {NORMAL_LIMIT}, safe < {SAFE_LIMIT}, lesion > {LESION_LIMIT})."
+    )
+    if hr is not None and hr > 100:
+        rationale += f" Elevated heart rate ({hr:.0f} bpm) alone is not a stroke sign."
+    if frames < MIN_FRAMES:
+        rationale += f" Only {frames} usable frames; the index is inconclusive."
+
+    return {
+        "risk_level": risk,
+        "stroke_probability": round(probability, 4),
+        "summary": summary,
+        "rationale": rationale,
+        "recommendation": recommendation,
+        "confidence": round(float(confidence), 3),
+    }
+
+
+__all__ = [
+    "LESION_LIMIT",
+    "MIN_FRAMES",
+    "NORMAL_LIMIT",
+    "SAFE_LIMIT",
+    "TRIAGE_MODE",
+    "accept_escalation",
+    "cpss_band",
+    "insufficient_data",
+    "local_triage",
+    "needs_escalation",
+]
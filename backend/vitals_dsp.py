@@ -0,0 +1,137 @@
+"""Vectorised DSP over a session's vitals columns (heart / breathing rate timelines).
+
+Per signal: quality-weighted outlier gating (the 40-200 BPM heart-rate gate of
+the retired ``compute_session_features``), resampling onto a uniform grid,
+zero-phase Butterworth low-pass smoothing, and for heart rate HRV-style
+features: SDNN/RMSSD of the implied beat intervals and LF/HF band powers from
+a Welch spectrum of the interval series. Everything runs as numpy/scipy array
+ops on ``SessionStore`` columns, O(n) per session.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+from scipy import integrate, signal
+
+from session_store import SessionStore
+
+HR_RANGE = (40.0, 200.0)   # BPM
+BR_RANGE = (4.0, 60.0)     # breaths per minute
+MIN_QUALITY = 0.2          # frames reporting a lower confidence are dropped
+RESAMPLE_HZ = 4.0          # uniform grid for filtering / spectra
+SMOOTH_CUTOFF_HZ = 0.2     # low-pass corner for the trend
+LF_BAND = (0.04, 0.15)
+HF_BAND = (0.15, 0.4)
+# Welch needs a few cycles of the lowest band
+MIN_SPECTRAL_SECONDS = 2.0 / LF_BAND[0]
+
+
+def _gate(values: np.ndarray, quality: np.ndarray, bounds: Tuple[float, float]) -> Tuple[np.ndarray, np.ndarray]:
+    """Mask of usable samples and their weights (quality in [0, 1]; missing quality counts as 1)."""
+    weights = np.where(np.isnan(quality), 1.0, np.clip(quality, 0.0, 1.0))
+    keep = np.isfinite(values) & (values > bounds[0]) & (values < bounds[1]) & (weights >= MIN_QUALITY)
+    return keep, weights
+
+
+def _resample(timestamps: np.ndarray, values: np.ndarray) -> Optional[np.ndarray]:
+    """Linear interpolation onto a ``RESAMPLE_HZ`` grid; ``None`` if under two samples/one step."""
+    if values.shape[0] < 2 or timestamps[-1] - timestamps[0] < 1.0 / RESAMPLE_HZ:
+        return None
+    grid = np.arange(timestamps[0], timestamps[-1], 1.0 / RESAMPLE_HZ)
+    return np.interp(grid, timestamps, values)
+
+
+def _smooth(series: np.ndarray) -> np.ndarray:
+    sos = signal.butter(2, SMOOTH_CUTOFF_HZ, btype="low", fs=RESAMPLE_HZ, output="sos")
+    padlen = 3 * (2 * sos.shape[0] + 1)
+    if series.shape[0] <= padlen:
+        return series
+    return signal.sosfiltfilt(sos, series)
+
+
+def _band_power(freqs: np.ndarray, psd: np.ndarray, band: Tuple[float, float]) -> float:
+    mask = (freqs >= band[0]) & (freqs < band[1])
+    if not mask.any():
+        return 0.0
+    return float(integrate.trapezoid(psd[mask], freqs[mask]))
+
+
+def _round(value: Optional[float], digits: int = 2) -> Optional[float]:
+    return None if value is None or not np.isfinite(value) else round(float(value), digits)
+
+
+def signal_features(
+    timestamps: np.ndarray,
+    values: np.ndarray,
+    quality: np.ndarray,
+    bounds: Tuple[float, float],
+) -> Dict[str, Any]:
+    """Gated, weighted and smoothed summary of one rate signal."""
+    keep, weights = _gate(values, quality, bounds)
+    kept = int(np.count_nonzero(keep))
+    out: Dict[str, Any] = {"samples": int(np.count_nonzero(np.isfinite(values))), "kept": kept}
+    if not kept:
+        out.update({"weighted_mean": None, "weighted_std": None, "smoothed_last": None, "smoothed_range": None})
+        return out
+
+    ts, v, w = timestamps[keep], values[keep], weights[keep]
+    mean = float(np.average(v, weights=w)) if w.sum() > 0 else float(v.mean())
+    std = float(np.sqrt(np.average((v - mean) ** 2, weights=w))) if w.sum() > 0 else float(v.std())
+    out["weighted_mean"] = _round(mean)
+    out["weighted_std"] = _round(std)
+
+    series = _resample(ts, v)
+    if series is None:
+        out["smoothed_last"] = _round(float(v[-1]))
+        out["smoothed_range"] = None
+        return out
+    smoothed = _smooth(series)
+    out["smoothed_last"] = _round(float(smoothed[-1]))
+    out["smoothed_range"] = [_round(float(smoothed.min())), _round(float(smoothed.max()))]
+    return out
+
+
+def hrv_features(timestamps: np.ndarray, heart_rate: np.ndarray, quality: np.ndarray) -> Dict[str, Any]:
+    """HRV-style features from the beat intervals implied by the heart-rate series.
+
+    The bridge reports rates, not beats, so these are proxies: interval
+    variability of ``60000 / HR`` and the LF/HF power of its uniform resampling.
+    """
+    keep, _ = _gate(heart_rate, quality, HR_RANGE)
+    ts = timestamps[keep]
+    rr_ms = 60000.0 / heart_rate[keep]
+    out: Dict[str, Any] = {"sdnn_ms": None, "rmssd_ms": None, "lf_power": None, "hf_power": None, "lf_hf_ratio": None}
+    if rr_ms.shape[0] >= 2:
+        out["sdnn_ms"] = _round(float(rr_ms.std(ddof=1)))
+        out["rmssd_ms"] = _round(float(np.sqrt(np.mean(np.diff(rr_ms) ** 2))))
+
+    if rr_ms.shape[0] < 2 or ts[-1] - ts[0] < MIN_SPECTRAL_SECONDS:
+        return out
+    series = _resample(ts, rr_ms)
+    series = signal.detrend(series, type="linear")
+    nperseg = min(series.shape[0], int(RESAMPLE_HZ * 64))
+    freqs, psd = signal.welch(series, fs=RESAMPLE_HZ, nperseg=nperseg)
+    lf = _band_power(freqs, psd, LF_BAND)
+    hf = _band_power(freqs, psd, HF_BAND)
+    out["lf_power"] = _round(lf, 3)
+    out["hf_power"] = _round(hf, 3)
+    out["lf_hf_ratio"] = _round(lf / hf, 3) if hf > 0 else None
+    return out
+
+
+def vitals_features(store: SessionStore) -> Dict[str, Any]:
+    """Heart/breathing-rate DSP summary for a whole session (``vitals_dsp`` in the stats)."""
+    if not len(store):
+        return {"heart_rate": None, "breathing_rate": None, "hrv": None}
+    ts = store.timestamps
+    quality = store.quality
+    return {
+        "heart_rate": signal_features(ts, store.heart_rate, quality, HR_RANGE),
+        "breathing_rate": signal_features(ts, store.breathing_rate, quality, BR_RANGE),
+        "hrv": hrv_features(ts, store.heart_rate, quality),
+    }
+
+
+__all__ = ["BR_RANGE", "HR_RANGE", "hrv_features", "signal_features", "vitals_features"]
@@ -0,0 +1,93 @@
+"""Binary vitals frames for /presage_stream.
+
+Layout (little-endian), 40-byte header followed by a packed float32 block::
+
+    0   4s   magic  b"NSV1"
+    4   B    version (1)
+    5   B    dims per point (2 or 3)
+    6   H    flags (reserved, 0)
+    8   I    point count n
+    12  I    reserved
+    16  d    timestamp, epoch seconds
+    24  f    heart_rate      (NaN = not reported)
+    28  f    breathing_rate  (NaN = not reported)
+    32  f    quality         (NaN = not reported)
+    36  f    reserved
+    40  f32[n * dims]  landmarks, row-major
+
+Control messages (session_start/session_end) stay JSON text frames. Frames
+with more than ``ingest.MAX_POINTS`` points are rejected, as on the JSON path.
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+from typing import Optional
+
+import numpy as np
+
+from ingest import FrameValidationError, VitalsFrame, check_point_count
+
+MAGIC = b"NSV1"
+VERSION = 1
+HEADER = struct.Struct("<4sBBHIIdffff")
+HEADER_SIZE = HEADER.size  # 40, keeps the float32 block 8-byte aligned
+
+
+def _opt(value: float) -> Optional[float]:
+    return None if math.isnan(value) else float(value)
+
+
+def decode_frame(data: bytes) -> VitalsFrame:
+    """Decode a binary vitals frame; landmarks are a zero-copy view into ``data``."""
+    if len(data) < HEADER_SIZE:
+        raise FrameValidationError(f"binary frame too short: {len(data)} bytes")
+    magic, version, dims, _flags, n, _r0, ts, hr, br, quality, _r1 = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise FrameValidationError(f"unknown binary frame {magic!r} v{version}")
+    if dims not in (2, 3):
+        raise FrameValidationError(f"binary frame dims must be 2 or 3, got {dims}")
+    check_point_count(n)
+    expected = HEADER_SIZE + n * dims * 4
+    if len(data) != expected:
+        raise FrameValidationError(f"binary frame is {len(data)} bytes, header says {expected}")
+    points = np.frombuffer(data, dtype="<f4", count=n * dims, offset=HEADER_SIZE).reshape(n, dims)
+    return VitalsFrame(
+        timestamp=ts,
+        heart_rate=_opt(hr),
+        breathing_rate=_opt(br),
+        quality=_opt(quality),
+        points=points,
+    )
+
+
+def encode_frame(
+    timestamp: float,
+    points: np.ndarray,
+    heart_rate: Optional[float] = None,
+    breathing_rate: Optional[float] = None,
+    quality: Optional[float] = None,
+) -> bytes:
+    """Pack one frame (used by the simulator and benchmarks)."""
+    block = np.ascontiguousarray(points, dtype="<f4")
+    if block.ndim != 2 or block.shape[1] not in (2, 3):
+        raise ValueError(f"points must be (n, 2|3), got {block.shape}")
+    nan = float("nan")
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        block.shape[1],
+        0,
+        block.shape[0],
+        0,
+        timestamp,
+        nan if heart_rate is None else heart_rate,
+        nan if breathing_rate is None else breathing_rate,
+        nan if quality is None else quality,
+        0.0,
+    )
+    return header + block.tobytes()
+
+
+__all__ = ["HEADER_SIZE", "MAGIC", "VERSION", "decode_frame", "encode_frame"]
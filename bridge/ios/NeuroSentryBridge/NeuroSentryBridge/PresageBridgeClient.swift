@@ -4,6 +4,12 @@ import SmartSpectraSwiftSDK
 
 // Set this to your Mac LAN IP (e.g., "ws://192.168.1.20:8000/presage_stream")
 private let BACKEND_WS = "ws://172.20.10.2:8000/presage_stream"
+// Send vitals as binary frames (header + packed float32 landmarks, see backend/wire.py)
+// instead of JSON text. Control messages stay JSON either way.
+private let USE_BINARY_FRAMES = false
+// Ask the backend for the "clinical" landmark profile on session_start: only the landmarks it
+// analyses on most frames, the full mesh at the acknowledged mesh_hz (see backend/landmark_profile.py).
+private let USE_LANDMARK_PROFILE = false
 
 struct PresagePacket: Codable {
     let type: String
@@ -22,6 +28,10 @@ final class PresageBridgeClient: ObservableObject {
     private var webSocket: URLSessionWebSocketTask?
     @Published var isRunning = false
     private var didLogFirstPacket = false
+    // From the backend's session_ack; nil until acknowledged (send full meshes meanwhile).
+    private var profileIndices: [Int]?
+    private var profileMeshInterval: TimeInterval = 1.0
+    private var lastMeshSent: TimeInterval = 0
 
     init(apiKey: String) {
         sdk.setApiKey(apiKey)
@@ -32,13 +42,15 @@ final class PresageBridgeClient: ObservableObject {
         guard !isRunning else { return }
         isRunning = true
         didLogFirstPacket = false
+        profileIndices = nil
+        lastMeshSent = 0
         connectWebSocket()
 
         DispatchQueue.main.asyncAfter(deadline: .now() + 0.8) {
             self.vitals.startProcessing()
             self.vitals.startRecording()
             self.observeMetrics()
-            self.sendControl(type: "session_start")
+            self.sendControl(type: "session_start", extra: USE_LANDMARK_PROFILE ? ["landmark_profile": "clinical"] : [:])
             print("[PresageBridge] session_start sent")
         }
     }
@@ -72,12 +84,40 @@ final class PresageBridgeClient: ObservableObject {
             switch result {
             case .failure(let error):
                 print("[PresageBridge] ws error: \(error.localizedDescription)")
-            case .success:
+            case .success(let message):
+                if case .string(let text) = message {
+                    self?.handleServerMessage(text)
+                }
                 self?.listen()
             }
         }
     }
 
+    private func handleServerMessage(_ text: String) {
+        guard let data = text.data(using: .utf8),
+              let json = try? JSONSerialization.jsonObject(with: data) as? [String: Any],
+              json["type"] as? String == "session_ack",
+              let profile = json["landmark_profile"] as? [String: Any] else { return }
+        let indices = profile["indices"] as? [Int]
+        let meshHz = (profile["mesh_hz"] as? NSNumber)?.doubleValue ?? 1.0
+        DispatchQueue.main.async {
+            self.profileIndices = indices
+            self.profileMeshInterval = meshHz > 0 ? 1.0 / meshHz : .infinity
+            print("[PresageBridge] landmark profile: \(indices?.count ?? 0) indices, mesh every \(self.profileMeshInterval)s")
+        }
+    }
+
+    /// Full mesh when due (or when no profile was negotiated), otherwise the profile's landmarks in order.
+    private func profilePoints(_ points: [[Double]]) -> [[Double]] {
+        guard let indices = profileIndices, !points.isEmpty else { return points }
+        let now = Date().timeIntervalSince1970
+        if now - lastMeshSent >= profileMeshInterval {
+            lastMeshSent = now
+            return points
+        }
+        return indices.map { $0 < points.count ? points[$0] : [0, 0] }
+    }
+
     private func observeMetrics() {
         sdk.$metricsBuffer
             .compactMap { $0 }
@@ -96,10 +136,23 @@ final class PresageBridgeClient: ObservableObject {
         if let lastLandmarks = sdk.edgeMetrics?.face.landmarks.last?.value {
             points = lastLandmarks.map { [Double($0.x), Double($0.y)] }
         }
+        points = profilePoints(points)
 
         // Blood pressure may not be provided by SDK; pass nil if unavailable.
         let bp: [String: Double]? = nil
 
+        if USE_BINARY_FRAMES {
+            let frame = encodeBinaryFrame(
+                timestamp: Date().timeIntervalSince1970,
+                heartRate: hrValue.map(Double.init),
+                breathingRate: brValue.map(Double.init),
+                quality: qualityValue.map(Double.init),
+                points: points
+            )
+            sendBinary(frame)
+            return
+        }
+
         let packet = PresagePacket(
             type: "vitals",
             timestamp: ISO8601DateFormatter().string(from: Date()),
@@ -131,9 +184,44 @@ final class PresageBridgeClient: ObservableObject {
         }
     }
 
-    private func sendControl(type: String) {
+    private func encodeBinaryFrame(timestamp: Double, heartRate: Double?, breathingRate: Double?, quality: Double?, points: [[Double]]) -> Data {
+        let dims = 2
+        var data = Data(capacity: 40 + points.count * dims * 4)
+        data.append(contentsOf: Array("NSV1".utf8))
+        data.append(UInt8(1))           // version
+        data.append(UInt8(dims))
+        appendLE(&data, UInt16(0))      // flags
+        appendLE(&data, UInt32(points.count))
+        appendLE(&data, UInt32(0))      // reserved
+        appendLE(&data, timestamp.bitPattern)
+        appendLE(&data, Float(heartRate ?? .nan).bitPattern)
+        appendLE(&data, Float(breathingRate ?? .nan).bitPattern)
+        appendLE(&data, Float(quality ?? .nan).bitPattern)
+        appendLE(&data, Float(0).bitPattern)  // reserved
+        for point in points {
+            for d in 0..<dims {
+                appendLE(&data, Float(d < point.count ? point[d] : 0).bitPattern)
+            }
+        }
+        return data
+    }
+
+    private func appendLE<T: FixedWidthInteger>(_ data: inout Data, _ value: T) {
+        var little = value.littleEndian
+        withUnsafeBytes(of: &little) { data.append(contentsOf: $0) }
+    }
+
+    private func sendBinary(_ frame: Data) {
+        guard let ws = webSocket else { return }
+        ws.send(.data(frame)) { error in
+            if let error = error { print("[PresageBridge] binary send error: \(error.localizedDescription)") }
+        }
+    }
+
+    private func sendControl(type: String, extra: [String: Any] = [:]) {
         guard let ws = webSocket else { return }
-        let payload: [String: Any] = ["type": type, "timestamp": ISO8601DateFormatter().string(from: Date())]
+        var payload: [String: Any] = ["type": type, "timestamp": ISO8601DateFormatter().string(from: Date())]
+        payload.merge(extra) { _, new in new }
         guard let data = try? JSONSerialization.data(withJSONObject: payload, options: []),
               let json = String(data: data, encoding: .utf8) else { return }
         ws.send(.string(json)) { error in
@@ -4,7 +4,43 @@ export type LiveVitals = {
   quality: number | null;
   blood_pressure?: { systolic: number; diastolic: number } | null;
   face_points?: number[][];
+  // MediaPipe indices of face_points when the live policy sends a landmark subset.
+  face_point_indices?: number[];
+  // int16 landmarks (quantize/delta live policy); decoded into face_points on receipt.
+  face_points_q?: QuantizedPoints;
   session_packet_count: number;
+  partial_stats?: PartialStats;
+};
+
+// Running session stats the backend updates on every vitals packet.
+export type PartialStats = {
+  heart_rate_mean: number | null;
+  heart_rate_std: number | null;
+  breathing_rate_mean: number | null;
+  breathing_rate_std: number | null;
+  quality_mean: number | null;
+  mouth_asymmetry_index: number | null;
+  duration_ms: number;
+};
+
+export type QuantizedPoints = {
+  key: boolean;
+  // Sequence id of the keyframe; deltas carry the id of the keyframe they apply to.
+  key_id: number;
+  scale: number;
+  offset: number[];
+  dims: number;
+  data: number[];
+};
+
+// Live-stream policy query params understood by /live_state (see backend/live_policy.py).
+export type LivePolicy = {
+  max_hz?: number;
+  mesh_hz?: number;
+  landmarks?: "full" | "key" | "none" | string;
+  quantize?: boolean;
+  delta?: boolean;
+  keyframe_every?: number;
 };
 
 export type GeminiReport = {
@@ -13,26 +49,102 @@ export type GeminiReport = {
   summary: string;
   recommendation: string;
   confidence: number;
+  rationale?: string;
   bell_palsy_probability?: number;
+  // Set on the backend's stand-in report when the model call failed.
+  fallback?: boolean;
+};
+
+export type ProvisionalTriage = {
+  risk_level: "LOW" | "MED" | "HIGH";
+  stroke_probability: number;
+  confidence: number;
+  summary: string;
+  mouth_asymmetry_index: number;
+  frames: number;
+  // Outlier-gated, low-pass filtered vitals over the window.
+  heart_rate_filtered: number | null;
+  breathing_rate_filtered: number | null;
+  window_s: number;
+  // How long HIGH has persisted; the backend starts Gemini early past a threshold.
+  high_for_s: number;
 };
 
-export type LiveStateMessage =
+export type LiveStateMessage = (
   | { type: "live"; data: LiveVitals }
-  | { type: "raw_dump"; packets: Record<string, unknown>[] }
-  | { type: "final"; gemini_report: GeminiReport };
+  // Raw dumps arrive in chunks after session_end; late joiners get a pointer and pull
+  // NDJSON from `url` (GET, optional ?offset=&limit=&gzip=1) when they need history.
+  | { type: "raw_dump_begin"; total: number; chunks: number; chunk_size: number; url: string; mesh_url: string }
+  | { type: "raw_dump_chunk"; seq: number; offset: number; packets: Record<string, unknown>[] }
+  | { type: "raw_dump_end"; total: number }
+  | { type: "raw_dump_available"; total: number; url: string; mesh_url: string }
+  // Rolling-window local triage while the scan is running (roughly once per second).
+  | { type: "provisional"; data: ProvisionalTriage }
+  // engine "local" is the instant CPSS report; escalated=true means a Gemini "final" follows.
+  | {
+      type: "final";
+      gemini_report: GeminiReport;
+      engine?: "local" | "gemini";
+      escalated?: boolean;
+      // Backend time from session_end to this report.
+      time_to_report_ms?: number;
+    }
+) & { session_id?: string };
 
 type Handlers = {
   onMessage: (payload: LiveStateMessage) => void;
   onStatusChange?: (status: "connecting" | "open" | "closed") => void;
+  // Session ids to follow; omit to follow every session.
+  sessions?: string[];
+  policy?: LivePolicy;
 };
 
-export function connectLiveState({ onMessage, onStatusChange }: Handlers) {
+// Last int16 keyframe per session, for delta-encoded landmarks.
+const keyframes = new Map<string, { id: number; data: number[] }>();
+
+export function decodeQuantizedPoints(sessionId: string, q: QuantizedPoints): number[][] | undefined {
+  if (q.key) {
+    keyframes.set(sessionId, { id: q.key_id, data: q.data });
+  }
+  const keyframe = keyframes.get(sessionId);
+  if (!keyframe || keyframe.id !== q.key_id || keyframe.data.length !== q.data.length) {
+    return undefined; // delta for a keyframe we never got; wait for the next one
+  }
+  const base = keyframe.data;
+  const points: number[][] = [];
+  for (let i = 0; i < q.data.length; i += q.dims) {
+    const point: number[] = [];
+    for (let d = 0; d < q.dims; d++) {
+      const value = q.key ? q.data[i + d] : base[i + d] + q.data[i + d];
+      point.push(value * q.scale + q.offset[d]);
+    }
+    points.push(point);
+  }
+  return points;
+}
+
+function buildUrl(base: string, sessions?: string[], policy?: LivePolicy) {
+  const params = new URLSearchParams();
+  if (sessions?.length) {
+    params.set("sessions", sessions.join(","));
+  }
+  Object.entries(policy ?? {}).forEach(([key, value]) => {
+    if (value !== undefined) {
+      params.set(key, typeof value === "boolean" ? (value ? "1" : "0") : String(value));
+    }
+  });
+  const query = params.toString();
+  return query ? `${base}?${query}` : base;
+}
+
+export function connectLiveState({ onMessage, onStatusChange, sessions, policy }: Handlers) {
   let socket: WebSocket | null = null;
   let reconnectTimer: number | undefined;
 
   const connect = () => {
     onStatusChange?.("connecting");
-    const url = (import.meta.env.VITE_BACKEND_WS as string) || "ws://172.20.10.2:8000/live_state";
+    const base = (import.meta.env.VITE_BACKEND_WS as string) || "ws://172.20.10.2:8000/live_state";
+    const url = buildUrl(base, sessions, policy);
     socket = new WebSocket(url);
 
     socket.onopen = () => {
@@ -43,6 +155,9 @@ export function connectLiveState({ onMessage, onStatusChange }: Handlers) {
     socket.onmessage = (event) => {
       try {
         const data = JSON.parse(event.data) as LiveStateMessage;
+        if (data.type === "live" && data.data.face_points_q) {
+          data.data.face_points = decodeQuantizedPoints(data.session_id ?? "", data.data.face_points_q);
+        }
         console.log("[live_state] message", (data as any).type);
         onMessage(data);
       } catch (err) {
@@ -1,42 +1,93 @@
+import argparse
 import asyncio
 import websockets
 import json
+import os
 import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
 from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit
+
+BACKEND_DIR = Path(__file__).resolve().parent / "backend"
+sys.path.append(str(BACKEND_DIR))
+
+DEFAULT_URI = "ws://172.20.10.2:8000/presage_stream"
+
+
+def make_face_points(count):
+    """Dummy face_points, each [x, y]."""
+    return [[random.uniform(0.1, 0.9), random.uniform(0.1, 0.9)] for _ in range(count)]
+
+
+async def send_presage_packets(uri=DEFAULT_URI, binary=False, points=5, profile=None):
+    if binary:
+        import numpy as np
+        from wire import encode_frame
 
-async def send_presage_packets():
-    uri = "ws://172.20.10.2:8000/presage_stream"
     try:
         async with websockets.connect(uri) as websocket:
-            print(f"Connected to {uri}")
+            print(f"Connected to {uri} ({'binary' if binary else 'json'} frames, {points} points)")
+            start = {"type": "session_start", "timestamp": datetime.now(timezone.utc).isoformat()}
+            indices, mesh_interval, last_mesh = None, 1.0, 0.0
+            if profile:
+                start["landmark_profile"] = profile
+            await websocket.send(json.dumps(start))
+            if profile:
+                ack = json.loads(await websocket.recv())
+                indices = ack["landmark_profile"]["indices"]
+                mesh_hz = ack["landmark_profile"]["mesh_hz"]
+                mesh_interval = 1.0 / mesh_hz if mesh_hz else float("inf")
+                print(f"Landmark profile {ack['landmark_profile']['name']}: {len(indices or [])} indices, mesh every {mesh_interval}s")
             while True:
                 # Generate dummy PresagePacket data
                 heart_rate = random.uniform(60.0, 100.0)
                 breathing_rate = random.uniform(12.0, 20.0)
                 quality = random.uniform(0.5, 1.0)
+                face_points = make_face_points(points)
+                if indices is not None:
+                    # Subset frames between full meshes (see backend/landmark_profile.py)
+                    now = asyncio.get_running_loop().time()
+                    if now - last_mesh >= mesh_interval:
+                        last_mesh = now
+                    else:
+                        face_points = [face_points[i] if i < len(face_points) else [0.0, 0.0] for i in indices]
 
-                # Generate dummy face_points (e.g., 5 points, each [x, y])
-                face_points = []
-                for _ in range(5):
-                    face_points.append([random.uniform(0.1, 0.9), random.uniform(0.1, 0.9)])
-
-                # Dummy regions data
-                regions = {
-                    "forehead": random.uniform(0.0, 1.0),
-                    "cheeks": random.uniform(0.0, 1.0)
-                }
-                
-                packet = {
-                    "timestamp": datetime.now(timezone.utc).isoformat(),
-                    "heart_rate": round(heart_rate, 2),
-                    "breathing_rate": round(breathing_rate, 2),
-                    "quality": round(quality, 2),
-                    "face_points": face_points,
-                    "regions": regions,
-                    "is_simulated": True # Indicate that this packet is from the simulator
-                }
-                
-                await websocket.send(json.dumps(packet))
+                if binary:
+                    # Packed float32 landmark block (see backend/wire.py)
+                    await websocket.send(
+                        encode_frame(
+                            datetime.now(timezone.utc).timestamp(),
+                            np.asarray(face_points, dtype=np.float32),
+                            heart_rate=heart_rate,
+                            breathing_rate=breathing_rate,
+                            quality=quality,
+                        )
+                    )
+                else:
+                    # Dummy regions data
+                    regions = {
+                        "forehead": random.uniform(0.0, 1.0),
+                        "cheeks": random.uniform(0.0, 1.0)
+                    }
+
+                    packet = {
+                        "type": "vitals",
+                        "timestamp": datetime.now(timezone.utc).isoformat(),
+                        "heart_rate": round(heart_rate, 2),
+                        "breathing_rate": round(breathing_rate, 2),
+                        "quality": round(quality, 2),
+                        "face_points": face_points,
+                        "regions": regions,
+                        "is_simulated": True # Indicate that this packet is from the simulator
+                    }
+
+                    await websocket.send(json.dumps(packet))
                 # print(f"Sent: {packet}")
                 await asyncio.sleep(random.uniform(0.2, 0.5)) # Send at 2-5 Hz
 
@@ -45,6 +96,347 @@ async def send_presage_packets():
     except Exception as e:
         print(f"An error occurred: {e}")
 
+
+# --- Load mode -----------------------------------------------------------------
+# N simulated bridges run full session_start / vitals / session_end cycles while
+# M /live_state subscribers measure how long frames and final reports take to
+# reach a dashboard. All timings use this process's clock, so the subscribers
+# pair live messages with the sending device by session_packet_count.
+
+# MediaPipe indices the backend analyses (backend/features.py KEY_INDICES)
+_FACE = {1: (0.5, 0.45), 33: (0.38, 0.38), 263: (0.62, 0.38), 105: (0.38, 0.32),
+         334: (0.62, 0.32), 61: (0.42, 0.62), 291: (0.58, 0.62), 152: (0.5, 0.8)}
+
+
+def make_mesh(points, rng, droop=0.0):
+    """A face-shaped (points, 2) normalized mesh; ``droop`` lowers the right mouth corner."""
+    import numpy as np
+
+    mesh = rng.uniform(0.3, 0.7, (points, 2)).astype(np.float32)
+    for index, (x, y) in _FACE.items():
+        if index < points:
+            mesh[index] = (x, y)
+    if 291 < points:
+        mesh[291, 1] += droop
+    return mesh
+
+
+def _percentiles(values):
+    import numpy as np
+
+    if not values:
+        return {"count": 0, "p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    ms = np.asarray(values, dtype=np.float64) * 1000.0
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "count": len(values),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(float(ms.max()), 2),
+    }
+
+
+class LoadStats:
+    """Timings shared by the simulated devices and subscribers of one run."""
+
+    def __init__(self):
+        self.frames_sent = 0
+        self.bytes_sent = 0
+        self.late_frames = 0          # frames sent more than one period behind schedule
+        self.send_times = {}          # (session_id, packet count) -> perf_counter at send
+        self.ended = {}               # session_id -> (cycle, perf_counter at session_end)
+        self.finals = {}              # (session_id, cycle) -> asyncio.Event, set on first final
+        self.live_latency = []
+        self.final_latency = []
+        self.server_time_to_report = []
+        self.live_received = 0
+        self.stream_seconds = 0.0     # summed over devices and cycles
+
+
+async def run_device(uri, device, args, stats, rng):
+    """One bridge: ``args.cycles`` scans of ``args.duration`` s at ``args.rate`` Hz."""
+    import numpy as np
+    from wire import encode_frame
+
+    session_id = f"sim-{device:03d}"
+    meshes = [make_mesh(args.points, rng, droop=args.droop) for _ in range(8)]
+    # Landmark blocks are serialised once so the generator's JSON cost stays off the measurement
+    mesh_json = [json.dumps(mesh.tolist()) for mesh in meshes]
+    period = 1.0 / args.rate
+    loop = asyncio.get_running_loop()
+    async with websockets.connect(f"{uri}?session_id={session_id}", max_size=None) as websocket:
+        for cycle in range(args.cycles):
+            start = {"type": "session_start", "session_id": session_id}
+            indices = None
+            if args.profile:
+                start["landmark_profile"] = args.profile
+            await websocket.send(json.dumps(start))
+            subset_json = mesh_json
+            if args.profile:
+                ack = json.loads(await websocket.recv())
+                indices = [i for i in ack["landmark_profile"]["indices"] if i < args.points]
+                subset_json = [json.dumps(mesh[indices].tolist()) for mesh in meshes]
+            mesh_every = max(1, int(round(args.rate)))  # one full mesh per second under a profile
+
+            began = loop.time()
+            for n in range(1, int(args.duration * args.rate) + 1):
+                due = began + (n - 1) * period
+                delay = due - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                elif -delay > period:
+                    stats.late_frames += 1
+                k = n % len(meshes)
+                subset = indices is not None and n % mesh_every
+                heart_rate = 72.0 + float(rng.normal(0, 2))
+                breathing_rate = 15.0 + float(rng.normal(0, 1))
+                if args.binary:
+                    points = meshes[k][indices] if subset else meshes[k]
+                    payload = encode_frame(
+                        time.time(), np.ascontiguousarray(points),
+                        heart_rate=heart_rate, breathing_rate=breathing_rate, quality=0.9,
+                    )
+                else:
+                    payload = (
+                        f'{{"type":"vitals","timestamp":{time.time()},"heart_rate":{heart_rate:.2f},'
+                        f'"breathing_rate":{breathing_rate:.2f},"quality":0.9,"is_simulated":true,'
+                        f'"face_points":{(subset_json if subset else mesh_json)[k]}}}'
+                    )
+                stats.send_times[(session_id, n)] = time.perf_counter()
+                await websocket.send(payload)
+                stats.frames_sent += 1
+                stats.bytes_sent += len(payload)
+            stats.stream_seconds += loop.time() - began
+
+            done = stats.finals[(session_id, cycle)] = asyncio.Event()
+            stats.ended[session_id] = (cycle, time.perf_counter())
+            await websocket.send(json.dumps({"type": "session_end", "session_id": session_id}))
+            if args.subscribers:
+                try:
+                    await asyncio.wait_for(done.wait(), timeout=args.final_timeout)
+                except asyncio.TimeoutError:
+                    print(f"[load] {session_id} cycle {cycle}: no final within {args.final_timeout}s")
+            else:
+                await asyncio.sleep(0.5)
+            # Frames of the finished scan can no longer be matched
+            for key in [key for key in stats.send_times if key[0] == session_id]:
+                del stats.send_times[key]
+
+
+async def run_subscriber(uri, stats, stop):
+    """One dashboard on /live_state following every session."""
+    from ingest import loads
+
+    seen = set()
+    async with websockets.connect(uri, max_size=None) as websocket:
+        while not stop.is_set():
+            try:
+                message = await asyncio.wait_for(websocket.recv(), timeout=0.5)
+            except asyncio.TimeoutError:
+                continue
+            now = time.perf_counter()
+            if isinstance(message, bytes):
+                continue
+            msg = loads(message)
+            kind = msg.get("type")
+            session_id = msg.get("session_id")
+            if kind == "live":
+                stats.live_received += 1
+                sent = stats.send_times.get((session_id, msg["data"].get("session_packet_count")))
+                if sent is not None:
+                    stats.live_latency.append(now - sent)
+            elif kind == "final" and session_id in stats.ended:
+                cycle, ended = stats.ended[session_id]
+                if (session_id, cycle) in seen:
+                    continue  # the escalated second final, or a replay
+                seen.add((session_id, cycle))
+                stats.final_latency.append(now - ended)
+                if msg.get("time_to_report_ms") is not None:
+                    stats.server_time_to_report.append(msg["time_to_report_ms"] / 1000.0)
+                event = stats.finals.get((session_id, cycle))
+                if event is not None:
+                    event.set()
+
+
+def _http_base(uri):
+    parts = urlsplit(uri)
+    scheme = "https" if parts.scheme == "wss" else "http"
+    return urlunsplit((scheme, parts.netloc, "", "", ""))
+
+
+def _get_json(url, timeout=5.0):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def start_server(args):
+    """Run the backend on a free local port with the stub model; returns (process, uri, archive dir)."""
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    archive_dir = tempfile.mkdtemp(prefix="neuro-sentry-load-")
+    env = dict(
+        os.environ,
+        NEURO_SENTRY_MODEL_BACKEND="stub",
+        NEURO_SENTRY_STUB_LATENCY=str(args.stub_latency),
+        NEURO_SENTRY_TRIAGE_MODE=args.triage_mode,
+        NEURO_SENTRY_ARCHIVE_DIR=archive_dir,
+        NEURO_SENTRY_REPORT_CACHE_FILE="",
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=None if args.server_log else subprocess.DEVNULL,
+        stderr=None if args.server_log else subprocess.DEVNULL,
+    )
+    base = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30.0
+    while True:
+        try:
+            _get_json(f"{base}/sessions", timeout=1.0)
+            break
+        except OSError:
+            if process.poll() is not None or time.monotonic() > deadline:
+                process.kill()
+                raise RuntimeError("backend did not start (run with --server-log to see why)")
+            time.sleep(0.2)
+    return process, f"ws://127.0.0.1:{port}/presage_stream", archive_dir
+
+
+async def run_load(uri, args):
+    import numpy as np
+
+    stats = LoadStats()
+    stop = asyncio.Event()
+    live_uri = uri.replace("/presage_stream", "/live_state")
+    subscribers = [asyncio.create_task(run_subscriber(live_uri, stats, stop)) for _ in range(args.subscribers)]
+    await asyncio.sleep(0.2)  # let them register before the first frame
+
+    rng = np.random.default_rng(args.seed)
+    began = time.perf_counter()
+    await asyncio.gather(*(
+        run_device(uri, device, args, stats, np.random.default_rng(rng.integers(1 << 32)))
+        for device in range(args.devices)
+    ))
+    elapsed = time.perf_counter() - began
+    stop.set()
+    await asyncio.gather(*subscribers, return_exceptions=True)
+
+    expected_live = stats.frames_sent * args.subscribers
+    result = {
+        "config": {
+            "devices": args.devices, "subscribers": args.subscribers, "points": args.points,
+            "rate_hz": args.rate, "duration_s": args.duration, "cycles": args.cycles,
+            "binary": args.binary, "profile": args.profile, "triage_mode": args.triage_mode if args.serve else None,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "frames_sent": stats.frames_sent,
+        "late_frames": stats.late_frames,
+        "target_fps": round(args.devices * args.rate, 1),
+        # Devices stream concurrently, so the aggregate rate is per-device rate x devices
+        "ingest_fps": round(stats.frames_sent * args.devices / max(stats.stream_seconds, 1e-9), 1),
+        "ingest_mb_s": round(stats.bytes_sent / 1e6 / max(elapsed, 1e-9), 3),
+        "live_received": stats.live_received,
+        "live_delivery": round(stats.live_received / expected_live, 4) if expected_live else None,
+        "broadcast_latency": _percentiles(stats.live_latency),
+        "time_to_final": _percentiles(stats.final_latency),
+        "server_time_to_report": _percentiles(stats.server_time_to_report),
+    }
+    try:
+        base = _http_base(uri)
+        result["server_triage"] = _get_json(f"{base}/triage")
+        accepted = sum(s.get("last_frame_count") or 0 for s in _get_json(f"{base}/sessions")["sessions"]
+                       if s["session_id"].startswith("sim-"))
+        result["frames_accepted_last_cycle"] = accepted
+    except OSError as exc:
+        print(f"[load] could not read server stats: {exc}")
+    return result
+
+
+def print_load_report(result, baseline=None):
+    """Human-readable summary; with a baseline, the relative change of each headline number."""
+    rows = [
+        ("ingest fps", result["ingest_fps"], ("ingest_fps",)),
+        ("live delivery", result["live_delivery"], ("live_delivery",)),
+        ("broadcast p50 ms", result["broadcast_latency"]["p50_ms"], ("broadcast_latency", "p50_ms")),
+        ("broadcast p95 ms", result["broadcast_latency"]["p95_ms"], ("broadcast_latency", "p95_ms")),
+        ("broadcast p99 ms", result["broadcast_latency"]["p99_ms"], ("broadcast_latency", "p99_ms")),
+        ("time-to-final p50 ms", result["time_to_final"]["p50_ms"], ("time_to_final", "p50_ms")),
+        ("time-to-final p95 ms", result["time_to_final"]["p95_ms"], ("time_to_final", "p95_ms")),
+    ]
+    server = (result.get("server_triage") or {}).get("time_to_final_report")
+    if server:
+        # Measured inside the backend, so available without subscribers
+        rows.append(("server report p50 ms", server["p50_ms"], ("server_triage", "time_to_final_report", "p50_ms")))
+        rows.append(("server report p95 ms", server["p95_ms"], ("server_triage", "time_to_final_report", "p95_ms")))
+    config = result["config"]
+    print(f"[load] {config['devices']} devices x {config['rate_hz']} Hz x {config['points']} points, "
+          f"{config['cycles']} cycle(s) of {config['duration_s']}s, {config['subscribers']} subscribers")
+    print(f"[load] sent {result['frames_sent']} frames in {result['elapsed_s']}s "
+          f"(target {result['target_fps']} fps, {result['late_frames']} late)")
+    for label, value, path in rows:
+        line = f"  {label:<22} {value}"
+        if baseline is not None:
+            old = baseline
+            for key in path:
+                old = (old or {}).get(key)
+            if isinstance(old, (int, float)) and isinstance(value, (int, float)) and old:
+                line += f"   (baseline {old}, {100.0 * (value - old) / old:+.1f}%)"
+        print(line)
+
+
+def main_load(args):
+    process = archive_dir = None
+    uri = args.uri
+    if args.serve:
+        process, uri, archive_dir = start_server(args)
+        print(f"[load] backend with stub model at {uri}")
+    try:
+        result = asyncio.run(run_load(uri, args))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+            import shutil
+            shutil.rmtree(archive_dir, ignore_errors=True)
+
+    baseline = None
+    if args.baseline and Path(args.baseline).exists():
+        baseline = json.loads(Path(args.baseline).read_text())
+    print_load_report(result, baseline)
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2))
+        print(f"[load] results written to {args.json}")
+
+
 if __name__ == "__main__":
-    print("Starting Presage Simulator. Ensure backend is running at ws://localhost:8000/presage_stream")
-    asyncio.run(send_presage_packets())
+    parser = argparse.ArgumentParser(description="Presage bridge simulator")
+    parser.add_argument("--uri", default=DEFAULT_URI)
+    parser.add_argument("--binary", action="store_true", help="send binary landmark frames instead of JSON")
+    parser.add_argument("--points", type=int, default=None, help="landmarks per frame (default 5, 468 with --load)")
+    parser.add_argument("--profile", default=None, help='landmark profile to negotiate, e.g. "clinical"')
+    load = parser.add_argument_group("load mode")
+    load.add_argument("--load", action="store_true", help="run N devices / M subscribers and report timings")
+    load.add_argument("--devices", type=int, default=4, help="concurrent simulated bridges")
+    load.add_argument("--subscribers", type=int, default=2, help="concurrent /live_state clients")
+    load.add_argument("--rate", type=float, default=30.0, help="frames per second per device")
+    load.add_argument("--duration", type=float, default=10.0, help="seconds of frames per scan")
+    load.add_argument("--cycles", type=int, default=1, help="session_start/vitals/session_end cycles per device")
+    load.add_argument("--droop", type=float, default=0.0, help="right mouth-corner offset (0.05 ~ HIGH risk)")
+    load.add_argument("--seed", type=int, default=0)
+    load.add_argument("--final-timeout", type=float, default=30.0, help="seconds to wait for each final report")
+    load.add_argument("--serve", action="store_true", help="start a local backend with the stub model")
+    load.add_argument("--triage-mode", default="local-first", help="NEURO_SENTRY_TRIAGE_MODE for --serve")
+    load.add_argument("--stub-latency", type=float, default=0.0, help="seconds per stub model call for --serve")
+    load.add_argument("--server-log", action="store_true", help="show the --serve backend's output")
+    load.add_argument("--json", default=None, help="write the results to this file")
+    load.add_argument("--baseline", default=None, help="earlier --json results to compare against")
+    args = parser.parse_args()
+    if args.load:
+        args.points = 468 if args.points is None else args.points
+        main_load(args)
+    else:
+        print(f"Starting Presage Simulator. Ensure backend is running at {args.uri}")
+        asyncio.run(send_presage_packets(args.uri, args.binary, args.points or 5, args.profile))